@@ -1,27 +1,64 @@
-import json
-from typing import Any, List
+import functools
+from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Body, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import crud
 import models
 import schemas
 from core.utils import (
     get_datasource_conn,
-    get_engine_introspection_cls,
+    get_datasource_conn_async,
+    get_datasource_table,
+    get_datasource_tables,
+    get_engine_async_conn_cls,
+    get_engine_async_errors,
     get_engine_error_cls,
     get_engine_conn_params_schema_cls,
     get_ssh_tunnel_error_cls,
+    get_pool_error_cls,
+    get_admission_error_cls,
+    get_datasource_params,
+    get_engine_operations_cls,
+    get_engine_explain_cls,
+    get_result_limits,
+    get_statement_timeout,
 )
-from core.redis import make_cache_key, cache
+from core.admission import admissions
+from core.arrow import ARROW_STREAM_MEDIA_TYPE, accepts_arrow, stream_arrow
+from core.guard import check_query_cost, CONFIRM, QUEUE
+from core.jobs import jobs, Job, ExportJob, JobQueueFullError
+from core.pool import async_pools, pools
+from core.preview import preview_table, TableNotFoundError
+from core.config import settings
+from core.redis import query_cache, schema_cache
+from core.schema import schema_refresher
+from core.results import ResultLimits, encode_json, estimate_rows, fetch_result, fetch_result_async, stream_ndjson
+from core.scripts import execute_script
+from core.sql import is_select_query
+from core.watchdog import QueryWatchdog, iterate_watched
 from api import deps
 
 
 router = APIRouter()
 
 
+def json_bytes_response(content, response: Response) -> Response:
+    """
+    Response encoded by orjson, skipping response model validation and jsonable_encoder walking every cell.
+    Headers set on the dependency response are kept.
+    """
+    return Response(encode_json(content), media_type='application/json', headers=dict(response.headers))
+
+
+def admission_rejected_response(e) -> JSONResponse:
+    return JSONResponse(status_code=429, content={'msg': str(e)}, headers={'Retry-After': str(e.retry_after)})
+
+
 @router.get('/', response_model=List[schemas.DataSource])
 def get_data_sources(
     db: Session = Depends(deps.get_db),
@@ -55,7 +92,7 @@ def create_data_source(
 
 
 @router.put('/{id}', response_model=schemas.DataSource)
-def update_data_source(
+async def update_data_source(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
@@ -63,7 +100,7 @@ def update_data_source(
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Update a data source.
+    Update a data source, its cached query results and schema are not served anymore.
     """
     data_source = crud.data_source.get(db=db, id=id)
     if not data_source or data_source.user_id != current_user.id:
@@ -82,7 +119,12 @@ def update_data_source(
         conn_params_schema_cls = get_engine_conn_params_schema_cls(data_source.engine.title)
         conn_params_schema_cls(**data_source_in.settings)
 
-    return crud.data_source.update(db=db, db_obj=data_source, obj_in=data_source_in)
+    data_source = crud.data_source.update(db=db, db_obj=data_source, obj_in=data_source_in)
+    await run_in_threadpool(pools.invalidate, data_source.id)
+    await async_pools.invalidate(data_source.id)
+    await query_cache.invalidate(data_source.id)
+    await schema_cache.invalidate(data_source.id)
+    return data_source
 
 
 @router.get('/{id}', response_model=schemas.DataSource)
@@ -102,7 +144,7 @@ def read_data_source(
 
 
 @router.delete('/{id}', response_model=schemas.DataSource)
-def delete_data_source(
+async def delete_data_source(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
@@ -114,77 +156,588 @@ def delete_data_source(
     data_source = crud.data_source.get(db=db, id=id)
     if not data_source or data_source.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Data source not found")
+    await run_in_threadpool(pools.invalidate, id)
+    await async_pools.invalidate(id)
+    await query_cache.invalidate(id)
+    await schema_cache.invalidate(id)
     return crud.data_source.remove(db=db, id=id)
 
 
-@router.post('/{id}/query', response_model=schemas.QueryResult, responses={'400': {'model': schemas.Msg}})
-def execute_query(
+async def stream_query_result(
+    request: Request,
+    data_source: models.DataSource,
+    query: str,
+    timeout: Optional[float],
+    stream,
+    media_type: str,
+    columnar: bool = False,
+    wire_format: bool = False,
+    limits: Optional[ResultLimits] = None,
+) -> Any:
+    """
+    Execute query and stream its result encoded by stream function, watched by query watchdog.
+    Reads are fetched by columnar cursor when columnar is set and engine has it,
+    values are fetched by wire format cursor when wire_format is set and engine has it.
+    Result is cut by limits, row limit of reads is pushed down to data source
+    and total rows of cut reads are estimated by the planner.
+    """
+    client_errors = (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls())
+    conn = watchdog = None
+    try:
+        admission = await admissions.acquire_async(data_source.id, data_source.user_id)
+        conn = await run_in_threadpool(get_datasource_conn, data_source, timeout, admission)
+        watchdog = QueryWatchdog(request, conn, get_statement_timeout(data_source, timeout))
+        # only plain reads could be declared as server-side cursors on every engine
+        server_side = is_select_query(query)
+        estimate_total = None
+        if server_side and limits:
+            operations = get_engine_operations_cls(data_source.engine.title)(conn)
+            estimate_total = functools.partial(estimate_rows, operations, query)
+            if limits.max_rows is not None:
+                query = operations.limit_query(query, limits.max_rows + 1) or query
+        cursor = conn.cursor(
+            server_side=server_side,
+            itersize=settings.QUERY_STREAM_BATCH_SIZE,
+            columnar=server_side and columnar,
+            wire_format=wire_format,
+        )
+        watchdog.start()
+        await run_in_threadpool(cursor.execute, query)
+        result = stream(
+            conn,
+            cursor,
+            batch_size=settings.QUERY_STREAM_BATCH_SIZE,
+            errors=client_errors,
+            limits=limits,
+            estimate_total=estimate_total,
+        )
+        # connection is released by the response stream from now on
+        conn = None
+        return StreamingResponse(iterate_watched(result, watchdog), media_type=media_type)
+    # client exceptions should be returned to client
+    except client_errors as e:
+        msg = watchdog and watchdog.message or str(e)
+        return JSONResponse(status_code=400, content={'msg': msg})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    finally:
+        if conn is not None:
+            if watchdog is not None:
+                await watchdog.stop()
+            await run_in_threadpool(conn.close)
+
+
+async def guard_query_cost(
+    request: Request, data_source: models.DataSource, query: str, force: bool
+) -> Optional[Response]:
+    """
+    Check query planner estimate against data source cost guard, return response replacing the query result
+    when it is exceeded: rejection, confirmation request or job the query is queued as.
+    The planner runs as interactive query, 429 is returned when it is not admitted in time.
+    """
+    max_rows, max_cost = data_source.cost_guard_max_rows, data_source.cost_guard_max_cost
+    action = data_source.cost_guard_action or CONFIRM
+    if (max_rows is None and max_cost is None) or (force and action == CONFIRM):
+        return None
+    params = get_datasource_params(data_source)
+    try:
+        admission = await admissions.acquire_async(data_source.id, data_source.user_id)
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    msg = await run_in_threadpool(check_query_cost, data_source.id, params, query, max_rows, max_cost, admission)
+    if msg is None:
+        return None
+    if action == CONFIRM:
+        return JSONResponse(status_code=409, content={'msg': '%s, pass force=true to run it' % msg})
+    if action == QUEUE:
+        try:
+            job = jobs.submit(Job(data_source.user_id, data_source.id, query), params)
+        except JobQueueFullError as e:
+            return JSONResponse(status_code=503, content={'msg': str(e)})
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(schemas.Job.from_orm(job)),
+            headers={'Location': request.url_for('read_job', id=job.id)},
+        )
+    return JSONResponse(status_code=400, content={'msg': msg})
+
+
+@router.post(
+    '/{id}/query',
+    response_model=schemas.QueryResult,
+    responses={
+        '200': {'content': {ARROW_STREAM_MEDIA_TYPE: {}}},
+        '202': {'model': schemas.Job},
+        '400': {'model': schemas.Msg},
+        '409': {'model': schemas.Msg},
+        '429': {'model': schemas.Msg},
+    },
+)
+async def execute_query(
     *,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db),
     id: int,
     query: str = Body(...),
+    timeout: Optional[float] = Query(
+        None, gt=0, description='Statement timeout in seconds, data source one is used by default'
+    ),
+    max_age: Optional[int] = Query(
+        None, ge=0, description='Serve cached result not older than max_age seconds, cache result otherwise'
+    ),
+    force: bool = Query(False, description='Run query exceeding data source cost guard with confirm action'),
+    wire_format: bool = Query(
+        False, description='Fetch decimal, temporal and UUID values as strings on engines having such casters'
+    ),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
-    Execute query for specified data source.
+    Execute query for specified data source, on asyncio driver when engine has it.
+    Query is cancelled on data source when client disconnects or statement timeout passes.
+    Results of read queries are cached when max_age is passed, X-Cache header reports cache status.
+    Result is streamed as Arrow IPC stream when requested with Accept header, such results are not cached.
+    Results are cut by data source and user row and byte budgets, truncated flag of JSON results reports it.
+    Arrow IPC stream schema metadata of cut results has the same truncated, rows_returned and estimated_total.
+    Queries over concurrency limits wait for a slot, 429 with Retry-After is returned when it is not given in time.
+    Queries exceeding data source cost guard are rejected, queued as a job (202) or need force=true (409).
+    With wire_format values skip Python objects construction and are returned as strings in data source text
+    format, by engines queried with sync drivers having such casters, asyncio drivers decode values natively.
     """
     data_source = crud.data_source.get(db=db, id=id)
     if not data_source or data_source.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Data source not found")
 
-    conn = None
+    limits = get_result_limits(data_source, current_user)
+    if accepts_arrow(request.headers.get('accept', '')):
+        if (guard_response := await guard_query_cost(request, data_source, query, force)) is not None:
+            return guard_response
+        return await stream_query_result(
+            request, data_source, query, timeout, stream_arrow, ARROW_STREAM_MEDIA_TYPE, columnar=True, limits=limits
+        )
+
+    cache_variant = {'max_rows': limits.max_rows, 'max_bytes': limits.max_bytes} if limits else {}
+    if wire_format:
+        cache_variant['wire_format'] = True
+    cacheable = max_age is not None and is_select_query(query)
+    if max_age is not None and not cacheable:
+        response.headers['X-Cache'] = 'BYPASS'
+    if cacheable:
+        # generation is read once, so result of the query is not cached into a newer one
+        cache_variant['generation'] = await query_cache.get_generation(id)
+        if (cached := await query_cache.get(id, query, max_age, **cache_variant)) is not None:
+            result, age = cached
+            response.headers['X-Cache'] = 'HIT'
+            response.headers['Age'] = str(int(age))
+            return json_bytes_response(result, response)
+        response.headers['X-Cache'] = 'MISS'
+
+    # cached results are served without planner estimate, it is checked only for queries going to run
+    if (guard_response := await guard_query_cost(request, data_source, query, force)) is not None:
+        return guard_response
+
+    is_async = get_engine_async_conn_cls(data_source.engine.title) is not None
+    client_errors = (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls())
+    if is_async:
+        client_errors += get_engine_async_errors(data_source.engine.title)
+    conn = watchdog = None
     try:
-        with get_datasource_conn(data_source) as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                if cursor.description is None:
-                    data = [(cursor.statusmessage, )]
-                    columns = ['status', ]
-                else:
-                    data = cursor.fetchall()
-                    columns = [c[0] for c in cursor.description]
-                return {'data': data, 'columns': columns}
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        if is_async:
+            conn = await get_datasource_conn_async(data_source, timeout, admission)
+        else:
+            conn = await run_in_threadpool(get_datasource_conn, data_source, timeout, admission)
+        watchdog = QueryWatchdog(request, conn, get_statement_timeout(data_source, timeout))
+        operations = get_engine_operations_cls(data_source.engine.title)(conn)
+        async with watchdog:
+            if is_async:
+                result = await fetch_result_async(conn, query, limits=limits, operations=operations)
+            else:
+                result = await run_in_threadpool(
+                    fetch_result, conn, query, limits=limits, operations=operations, wire_format=wire_format
+                )
     # client exceptions should be returned to client
-    except (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls()) as e:
-        return JSONResponse(status_code=400, content={'msg': str(e)})
+    except client_errors as e:
+        msg = watchdog and watchdog.message or str(e)
+        return JSONResponse(status_code=400, content={'msg': msg})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
     finally:
         if conn is not None:
-            conn.close()
+            if is_async:
+                await conn.close()
+            else:
+                await run_in_threadpool(conn.close)
 
+    if cacheable:
+        await query_cache.set(id, query, result, **cache_variant)
+    return json_bytes_response(result, response)
 
-@router.get('/{id}/schema', response_model=List[schemas.TableEntity], responses={'400': {'model': schemas.Msg}})
+
+@router.post(
+    '/{id}/script',
+    response_model=schemas.ScriptResult,
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}},
+)
+async def execute_script_query(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    script: str = Body(...),
+    stop_on_error: bool = Query(True, description='Roll back and skip the rest on the first failed statement'),
+    timeout: Optional[float] = Query(
+        None, gt=0, description='Statement timeout in seconds, data source one is used by default'
+    ),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Execute multi-statement script for specified data source on a single connection in a single transaction.
+    Statements are split by engine dialect rules, every one gets its status, rowcount and elapsed time.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    client_errors = (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls())
+    conn = watchdog = None
+    try:
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        conn = await run_in_threadpool(get_datasource_conn, data_source, timeout, admission)
+        watchdog = QueryWatchdog(request, conn, get_statement_timeout(data_source, timeout))
+        operations = get_engine_operations_cls(data_source.engine.title)(conn)
+        async with watchdog:
+            result = await run_in_threadpool(
+                execute_script,
+                conn,
+                operations,
+                script,
+                stop_on_error=stop_on_error,
+                errors=client_errors,
+                is_cancelled=lambda: watchdog.reason is not None,
+            )
+        if watchdog.message:
+            return JSONResponse(status_code=400, content={'msg': watchdog.message})
+        return result
+    # client exceptions should be returned to client
+    except client_errors as e:
+        msg = watchdog and watchdog.message or str(e)
+        return JSONResponse(status_code=400, content={'msg': msg})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    finally:
+        if conn is not None:
+            await run_in_threadpool(conn.close)
+
+
+@router.post(
+    '/{id}/explain',
+    response_model=schemas.QueryPlan,
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}},
+)
+async def explain_query(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    query: str = Body(...),
+    analyze: bool = Query(False, description='Execute read query to report actual rows and time of plan nodes'),
+    timeout: Optional[float] = Query(
+        None, gt=0, description='Statement timeout in seconds, data source one is used by default'
+    ),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get query plan of specified data source as a tree of nodes with estimated rows and cost.
+    The query is not executed unless analyze is set.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    explain_cls = get_engine_explain_cls(data_source.engine.title)
+    if analyze and not explain_cls.supports_analyze:
+        return JSONResponse(status_code=400, content={'msg': 'Plan analyze is not supported by data source engine'})
+    # analyzed statements are executed, so writes are not allowed
+    if analyze and not is_select_query(query):
+        return JSONResponse(status_code=400, content={'msg': 'Only read queries could be analyzed'})
+
+    client_errors = (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls())
+    conn = watchdog = None
+    try:
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        conn = await run_in_threadpool(get_datasource_conn, data_source, timeout, admission)
+        watchdog = QueryWatchdog(request, conn, get_statement_timeout(data_source, timeout))
+        async with watchdog:
+            return await run_in_threadpool(explain_cls(conn).explain, query, analyze)
+    # client exceptions should be returned to client
+    except client_errors as e:
+        msg = watchdog and watchdog.message or str(e)
+        return JSONResponse(status_code=400, content={'msg': msg})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    finally:
+        if conn is not None:
+            await run_in_threadpool(conn.close)
+
+
+@router.post(
+    '/{id}/query/stream',
+    response_class=StreamingResponse,
+    responses={
+        '200': {'content': {'application/x-ndjson': {}}},
+        '400': {'model': schemas.Msg},
+        '429': {'model': schemas.Msg},
+    },
+)
+async def execute_query_stream(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    query: str = Body(...),
+    timeout: Optional[float] = Query(
+        None, gt=0, description='Statement timeout in seconds, data source one is used by default'
+    ),
+    wire_format: bool = Query(
+        False, description='Fetch decimal, temporal and UUID values as strings on engines having such casters'
+    ),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Execute query for specified data source and stream result as NDJSON.
+    The first line contains result columns, every next line contains a batch of rows.
+    Result is cut by data source and user row and byte budgets, the last line reports it with truncated,
+    rows_returned and estimated_total fields of JSON results.
+    Query is cancelled on data source when client disconnects or statement timeout passes.
+    With wire_format values skip Python objects construction and are streamed as strings in data source text
+    format, by engines having such casters.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    return await stream_query_result(
+        request,
+        data_source,
+        query,
+        timeout,
+        stream_ndjson,
+        'application/x-ndjson',
+        wire_format=wire_format,
+        limits=get_result_limits(data_source, current_user),
+    )
+
+
+@router.get(
+    '/{id}/tables/{table}/preview',
+    response_model=schemas.TablePreview,
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}},
+)
+async def preview_data_source_table(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    table: str,
+    limit: int = Query(100, ge=1, le=settings.QUERY_PREVIEW_MAX_ROWS),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get sample of specified data source table rows for browsing.
+    Large tables are sampled by engine (TABLESAMPLE, SAMPLE or primary key ranges), so preview is fast
+    whatever the table size. Smaller ones are read as is.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    client_errors = (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls())
+    conn = watchdog = None
+    try:
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        conn = await run_in_threadpool(get_datasource_conn, data_source, None, admission)
+        watchdog = QueryWatchdog(request, conn, get_statement_timeout(data_source))
+        async with watchdog:
+            return await run_in_threadpool(preview_table, conn, data_source.engine.title, table, limit)
+    except TableNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    # client exceptions should be returned to client
+    except client_errors as e:
+        msg = watchdog and watchdog.message or str(e)
+        return JSONResponse(status_code=400, content={'msg': msg})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    finally:
+        if conn is not None:
+            await run_in_threadpool(conn.close)
+
+
+@router.post('/{id}/jobs', response_model=schemas.Job, responses={'503': {'model': schemas.Msg}})
+def create_query_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    query: str = Body(...),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Run query for specified data source in background.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+    try:
+        return jobs.submit(Job(current_user.id, data_source.id, query), get_datasource_params(data_source))
+    except JobQueueFullError as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+
+
+@router.post('/{id}/exports', response_model=schemas.Job, responses={'503': {'model': schemas.Msg}})
+def create_export_job(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    query: str = Body(...),
+    format: str = Query('csv', regex='^(%s)$' % '|'.join(ExportJob.formats)),
+    compress: bool = Query(False, description='Gzip CSV file'),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Export query result of specified data source to file in background.
+    The file is downloaded from /jobs/{id}/download when the job succeeds.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+    job = ExportJob(current_user.id, data_source.id, query, format, compress=compress)
+    try:
+        return jobs.submit(job, get_datasource_params(data_source))
+    except JobQueueFullError as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+
+
+@router.get(
+    '/{id}/schema',
+    response_model=List[schemas.TableEntity],
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}},
+)
 async def get_data_source_schema(
     *,
     db: Session = Depends(deps.get_db),
     id: int,
-    from_cache: bool = False,
+    from_cache: Optional[bool] = Query(
+        None, description='Serve cached schema whatever its age (true) or refresh it (false), cache policy by default'
+    ),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get specified data source schema.
+    Cached schema is served at once, it is refreshed in background when older than soft TTL
+    and before being served when older than hard TTL.
+    Refreshed schema is merged from the cached one and tables changed since it was read,
+    on engines reporting table changes by catalog markers.
     """
     data_source = crud.data_source.get(db=db, id=id)
     if not data_source or data_source.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Data source not found")
 
-    if from_cache:
-        cache_key = make_cache_key(datasourceschema=id)
-        if (schema := await cache.get(cache_key, decoder=json.loads)) is not None:
-            return schema
+    if from_cache and (cached := await schema_cache.get(id)) is not None:
+        return cached[0]
 
-    conn = None
+    try:
+        params = get_datasource_params(data_source)
+        if from_cache is None:
+            return await schema_refresher.get(id, params, current_user.id)
+        return await schema_refresher.refresh(id, params, current_user.id)
+    # client exceptions should be returned to client
+    except (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls()) as e:
+        return JSONResponse(status_code=400, content={'msg': str(e)})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+
+
+@router.get(
+    '/{id}/schema/tables',
+    response_model=schemas.TableList,
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}, '503': {'model': schemas.Msg}},
+)
+async def get_data_source_tables(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    search: Optional[str] = Query(None, description='Case insensitive part of table names'),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=10000),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get page of specified data source table names, without columns and constraints.
+    Tables are read by /schema/tables/{table} one by one, so schema tree is shown without reading the whole schema.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
 
     try:
-        with get_datasource_conn(data_source) as conn:
-            introspection_cls = get_engine_introspection_cls(data_source.engine.title)
-            introspection = introspection_cls(conn)
-            schema = introspection.get_structure()
-            cache_key = make_cache_key(datasourceschema=id)
-            await cache.set(cache_key, schema, encoder=json.dumps)
-            return schema
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        tables = await run_in_threadpool(
+            get_datasource_tables, data_source.id, get_datasource_params(data_source), admission
+        )
     # client exceptions should be returned to client
     except (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls()) as e:
         return JSONResponse(status_code=400, content={'msg': str(e)})
-    finally:
-        if conn is not None:
-            conn.close()
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    if search:
+        tables = [table for table in tables if search.lower() in table['name'].lower()]
+    return {'tables': tables[skip:skip + limit], 'skip': skip, 'limit': limit, 'total': len(tables)}
+
+
+@router.get(
+    '/{id}/schema/tables/{table}',
+    response_model=schemas.TableEntity,
+    responses={'400': {'model': schemas.Msg}, '429': {'model': schemas.Msg}, '503': {'model': schemas.Msg}},
+)
+async def get_data_source_table(
+    *,
+    db: Session = Depends(deps.get_db),
+    id: int,
+    table: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get specified data source table with its columns and constraints, read by table filtered catalog queries.
+    """
+    data_source = crud.data_source.get(db=db, id=id)
+    if not data_source or data_source.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Data source not found")
+
+    try:
+        params = get_datasource_params(data_source)
+        admission = await admissions.acquire_async(data_source.id, current_user.id)
+        entity = await run_in_threadpool(get_datasource_table, data_source.id, params, table, admission)
+    # client exceptions should be returned to client
+    except (get_engine_error_cls(data_source.engine.title), get_ssh_tunnel_error_cls()) as e:
+        return JSONResponse(status_code=400, content={'msg': str(e)})
+    except get_pool_error_cls() as e:
+        return JSONResponse(status_code=503, content={'msg': str(e)})
+    except get_admission_error_cls() as e:
+        return admission_rejected_response(e)
+    if entity is None:
+        raise HTTPException(status_code=404, detail='Table %s not found' % table)
+    return entity
@@ -0,0 +1,99 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from fastapi.responses import JSONResponse
+
+import models
+import schemas
+from api import deps
+from core.downloads import RangeFileResponse
+from core.jobs import jobs, SUCCEEDED
+
+
+router = APIRouter()
+
+
+def get_user_job(id: str, user: models.User):
+    job = jobs.get(id)
+    if not job or job.user_id != user.id:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return job
+
+
+@router.get('/{id}', response_model=schemas.Job)
+def read_job(
+    *,
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get query job status.
+    """
+    return get_user_job(id, current_user)
+
+
+@router.get('/{id}/result', response_model=schemas.JobResult, responses={'400': {'model': schemas.Msg}})
+def read_job_result(
+    *,
+    id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=100000),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Get page of query job result. Rows already fetched are available while job is running.
+    """
+    job = get_user_job(id, current_user)
+    if job.format is not None:
+        return JSONResponse(status_code=400, content={'msg': 'Export result is available for download only'})
+    data = job.read_rows(skip, limit)
+    return {
+        'status': job.status,
+        'columns': job.columns,
+        'data': data,
+        'skip': skip,
+        'limit': limit,
+        'total': job.rows_fetched,
+    }
+
+
+@router.get(
+    '/{id}/download',
+    response_class=RangeFileResponse,
+    responses={'206': {}, '400': {'model': schemas.Msg}, '416': {}},
+)
+def download_job_result(
+    *,
+    id: str,
+    range: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Download exported file of succeeded export job. Single byte ranges are supported to resume downloads.
+    """
+    job = get_user_job(id, current_user)
+    if job.format is None:
+        return JSONResponse(status_code=400, content={'msg': 'Job is not an export'})
+    if job.status != SUCCEEDED:
+        return JSONResponse(status_code=400, content={'msg': 'Export is %s' % job.status})
+    return RangeFileResponse(
+        job.spool_path, range_header=range, if_range=if_range, filename=job.filename, media_type=job.media_type
+    )
+
+
+@router.delete('/{id}', response_model=schemas.Job)
+def delete_job(
+    *,
+    id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Cancel running query job or remove finished one with its result.
+    """
+    job = get_user_job(id, current_user)
+    if job.is_finished:
+        jobs.remove(job.id)
+    else:
+        job.cancel()
+    return job
@@ -0,0 +1,139 @@
+import asyncio
+import contextlib
+import logging
+import threading
+from typing import Any, List
+
+from fastapi import APIRouter, Depends, Body, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.orm import Session
+
+import crud
+import models
+import schemas
+from api import deps
+from core.batch import batches, execute_batch_item
+from core.config import settings
+from core.results import encode_json, encode_ndjson_line
+from core.utils import (
+    get_engine_error_cls,
+    get_ssh_tunnel_error_cls,
+    get_pool_error_cls,
+    get_admission_error_cls,
+    get_datasource_params,
+    get_result_limits,
+)
+from core.watchdog import QueryWatchdog
+
+
+router = APIRouter()
+
+
+@router.post(
+    '/batch',
+    response_model=List[schemas.BatchQueryItemResult],
+    responses={'200': {'content': {'application/x-ndjson': {}}}, '400': {'model': schemas.Msg}},
+)
+async def execute_query_batch(
+    *,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+    items: List[schemas.BatchQueryItem] = Body(...),
+    stream: bool = Query(False, description='Stream item results as NDJSON lines in order of completion'),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Execute queries for current user data sources concurrently.
+    Every item gets either result or error message, failed items do not affect the others.
+    Item queries are cancelled on data source when client disconnects or statement timeout passes.
+    """
+    if len(items) > settings.QUERY_BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=400, content={'msg': 'Batch is limited to %s queries' % settings.QUERY_BATCH_MAX_ITEMS}
+        )
+
+    # data sources are loaded once, so db session is not used while queries are running
+    data_sources = {}
+    for datasource_id in {item.datasource_id for item in items}:
+        data_source = crud.data_source.get(db=db, id=datasource_id)
+        if data_source and data_source.user_id == current_user.id:
+            data_sources[datasource_id] = {
+                'params': get_datasource_params(data_source),
+                'limits': get_result_limits(data_source, current_user),
+                'errors': (
+                    get_engine_error_cls(data_source.engine.title),
+                    get_ssh_tunnel_error_cls(),
+                    get_pool_error_cls(),
+                    get_admission_error_cls(),
+                ),
+            }
+
+    async def run_item(index: int, item: schemas.BatchQueryItem) -> dict:
+        item_result = {'index': index, 'datasource_id': item.datasource_id, 'result': None, 'msg': None}
+        if (data_source := data_sources.get(item.datasource_id)) is None:
+            item_result['msg'] = 'Data source not found'
+            return item_result
+        # worker still waiting for a query slot gives up when the item is cancelled
+        cancelled = threading.Event()
+        loop = asyncio.get_event_loop()
+        watchdog = None
+
+        @contextlib.contextmanager
+        def watch(conn):
+            nonlocal watchdog
+            # runs on executor worker, watchdog runs on event loop and is stopped before connection release
+            watchdog = QueryWatchdog(request, conn, item.timeout or data_source['params']['statement_timeout'])
+            loop.call_soon_threadsafe(watchdog.start)
+            if cancelled.is_set():
+                watchdog.cancel()
+            try:
+                yield
+            finally:
+                asyncio.run_coroutine_threadsafe(watchdog.stop(), loop).result()
+
+        try:
+            item_result['result'] = await batches.run(
+                item.datasource_id,
+                execute_batch_item,
+                item.datasource_id,
+                data_source['params'],
+                item.query,
+                data_source['limits'],
+                item.timeout,
+                current_user.id,
+                cancelled.is_set,
+                watch,
+            )
+        # query is left running by the worker when the item is cancelled
+        except asyncio.CancelledError:
+            # set before watchdog is checked, so a watchdog started meanwhile sees it
+            cancelled.set()
+            if watchdog is not None:
+                watchdog.cancel()
+            raise
+        # client exceptions should be returned to client
+        except data_source['errors'] as e:
+            item_result['msg'] = watchdog and watchdog.message or str(e)
+        except Exception:
+            logging.exception('Batch query failed')
+            item_result['msg'] = 'Internal error'
+        finally:
+            cancelled.set()
+        return item_result
+
+    if not stream:
+        results = await asyncio.gather(*(run_item(index, item) for index, item in enumerate(items)))
+        # rows are converted by fetch_result, so response model validation is skipped
+        return Response(encode_json(results), media_type='application/json')
+
+    async def stream_results():
+        tasks = [asyncio.ensure_future(run_item(index, item)) for index, item in enumerate(items)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield encode_ndjson_line(await task)
+        finally:
+            # queries already running are cancelled by their watchdogs
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type='application/x-ndjson')
@@ -70,6 +70,27 @@ def update_user_me(
     return user
 
 
+@router.put("/{user_id}", response_model=schemas.User)
+def update_user(
+    *,
+    db: Session = Depends(deps.get_db),
+    user_id: int,
+    user_in: schemas.UserAdminUpdate,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Update a user, including query result budgets. Only for superusers.
+    """
+    user = crud.user.get(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="The user with this id does not exist in the system",
+        )
+    user = crud.user.update(db, db_obj=user, obj_in=user_in)
+    return user
+
+
 @router.get("/me", response_model=schemas.User)
 def read_user_me(
     current_user: models.User = Depends(deps.get_current_active_user),
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from api.endpoints import auth, users, datasources, engines, sshtunnels
+from api.endpoints import auth, users, datasources, engines, sshtunnels, jobs, queries
 
 
 api_router = APIRouter()
@@ -9,3 +9,5 @@ api_router.include_router(users.router, prefix='/users', tags=['users'])
 api_router.include_router(engines.router, prefix='/engines', tags=['engines'])
 api_router.include_router(datasources.router, prefix='/data-sources', tags=['data-sources'])
 api_router.include_router(sshtunnels.router, prefix='/ssh-tunnels', tags=['ssh-tunnels'])
+api_router.include_router(jobs.router, prefix='/jobs', tags=['jobs'])
+api_router.include_router(queries.router, prefix='/query', tags=['query'])
@@ -0,0 +1,196 @@
+import asyncio
+import collections
+import threading
+import time
+from typing import Callable, Deque, Dict, Optional
+
+from core.config import settings
+
+
+# lanes in order of priority, interactive queries are admitted before queued jobs and exports
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+LANES = (INTERACTIVE, BACKGROUND)
+
+
+class AdmissionRejectedError(Exception):
+
+    def __init__(self, msg: str, retry_after: int):
+        super().__init__(msg)
+        self.retry_after = retry_after
+
+
+class Admission(object):
+    """
+    Slot of a running data source query, released when the query connection is returned.
+    """
+
+    def __init__(self, controller: 'AdmissionController', datasource_id: int, user_id: Optional[int], lane: str):
+        self._controller = controller
+        self.datasource_id = datasource_id
+        self.user_id = user_id
+        self.lane = lane
+        self.released = False
+
+    def release(self):
+        self._controller.release(self)
+
+
+class _Waiter(object):
+
+    def __init__(self, datasource_id: int, user_id: Optional[int], lane: str, notify: Callable[[], None]):
+        self.datasource_id = datasource_id
+        self.user_id = user_id
+        self.lane = lane
+        self.notify = notify
+        self.admission: Optional[Admission] = None
+
+
+class AdmissionController(object):
+    """
+    Limits data source queries running at once globally, per data source, per user and in background lane.
+
+    Queries over the limits wait in per lane FIFO queues, freed slots go to interactive queries first.
+    Interactive waiters are bounded by ADMISSION_QUEUE_SIZE and ADMISSION_QUEUE_TIMEOUT, rejected ones
+    are expected to be retried after ADMISSION_RETRY_AFTER seconds. Background waiters are bounded
+    by jobs workers and wait until admitted or cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = 0
+        self._by_lane: Dict[str, int] = collections.Counter()
+        self._by_datasource: Dict[int, int] = collections.Counter()
+        self._by_user: Dict[int, int] = collections.Counter()
+        self._queues: Dict[str, Deque[_Waiter]] = {lane: collections.deque() for lane in LANES}
+
+    def acquire(
+        self,
+        datasource_id: int,
+        user_id: Optional[int] = None,
+        lane: str = INTERACTIVE,
+        is_cancelled: Callable[[], bool] = lambda: False,
+    ) -> Admission:
+        """
+        Wait for a query slot blocking the calling thread, cancelled waits raise AdmissionRejectedError.
+        """
+        event = threading.Event()
+        waiter = self._enqueue(datasource_id, user_id, lane, event.set)
+        deadline = self._get_deadline(lane)
+        while waiter.admission is None:
+            timeout = 1 if deadline is None else min(deadline - time.monotonic(), 1)
+            if timeout <= 0 or is_cancelled():
+                self._dequeue(waiter)
+                break
+            event.wait(timeout)
+        return self._get_admission(waiter)
+
+    async def acquire_async(self, datasource_id: int, user_id: Optional[int] = None, lane: str = INTERACTIVE):
+        """
+        Wait for a query slot without holding a thread.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(datasource_id, user_id, lane, notify)
+        deadline = self._get_deadline(lane)
+        try:
+            if waiter.admission is None:
+                await asyncio.wait_for(future, None if deadline is None else max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            self._dequeue(waiter)
+        except BaseException:
+            # slot granted while the waiting task was cancelled is given back
+            self._dequeue(waiter)
+            if waiter.admission is not None:
+                waiter.admission.release()
+            raise
+        return self._get_admission(waiter)
+
+    def try_acquire(
+        self, datasource_id: int, user_id: Optional[int] = None, lane: str = INTERACTIVE
+    ) -> Optional[Admission]:
+        """
+        Take a query slot without waiting, None when there is no free one or queries wait for it.
+        """
+        waiter = _Waiter(datasource_id, user_id, lane, lambda: None)
+        with self._lock:
+            if any(self._queues.values()) or not self._can_run(waiter):
+                return None
+            self._grant(waiter)
+        return waiter.admission
+
+    def release(self, admission: Admission):
+        with self._lock:
+            if admission.released:
+                return
+            admission.released = True
+            self._running -= 1
+            self._by_lane[admission.lane] -= 1
+            self._by_datasource[admission.datasource_id] -= 1
+            if admission.user_id is not None:
+                self._by_user[admission.user_id] -= 1
+            self._dispatch()
+
+    def _enqueue(self, datasource_id: int, user_id: Optional[int], lane: str, notify: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(datasource_id, user_id, lane, notify)
+        with self._lock:
+            if self._can_run(waiter):
+                self._grant(waiter)
+                return waiter
+            if lane == INTERACTIVE and len(self._queues[INTERACTIVE]) >= settings.ADMISSION_QUEUE_SIZE:
+                raise AdmissionRejectedError('Too many queries are waiting to run', settings.ADMISSION_RETRY_AFTER)
+            self._queues[lane].append(waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.admission is None:
+                self._queues[waiter.lane].remove(waiter)
+
+    def _get_admission(self, waiter: _Waiter) -> Admission:
+        if waiter.admission is None:
+            raise AdmissionRejectedError('Timed out waiting for a query slot', settings.ADMISSION_RETRY_AFTER)
+        return waiter.admission
+
+    def _get_deadline(self, lane: str) -> Optional[float]:
+        if lane != INTERACTIVE:
+            return None
+        return time.monotonic() + settings.ADMISSION_QUEUE_TIMEOUT
+
+    def _can_run(self, waiter: _Waiter) -> bool:
+        by_user = self._by_user[waiter.user_id] if waiter.user_id is not None else 0
+        by_lane = self._by_lane[BACKGROUND] if waiter.lane == BACKGROUND else 0
+        for running, limit in (
+            (self._running, settings.ADMISSION_MAX_QUERIES),
+            (self._by_datasource[waiter.datasource_id], settings.ADMISSION_MAX_QUERIES_PER_DATASOURCE),
+            (by_user, settings.ADMISSION_MAX_QUERIES_PER_USER),
+            (by_lane, settings.ADMISSION_MAX_BACKGROUND_QUERIES),
+        ):
+            if limit is not None and running >= limit:
+                return False
+        return True
+
+    def _grant(self, waiter: _Waiter):
+        self._running += 1
+        self._by_lane[waiter.lane] += 1
+        self._by_datasource[waiter.datasource_id] += 1
+        if waiter.user_id is not None:
+            self._by_user[waiter.user_id] += 1
+        waiter.admission = Admission(self, waiter.datasource_id, waiter.user_id, waiter.lane)
+
+    def _dispatch(self):
+        # waiters blocked by their data source or user limits are skipped, so they do not hold up the others
+        for lane in LANES:
+            queue = self._queues[lane]
+            for waiter in list(queue):
+                if self._can_run(waiter):
+                    queue.remove(waiter)
+                    self._grant(waiter)
+                    waiter.notify()
+
+
+admissions = AdmissionController()
@@ -0,0 +1,259 @@
+import io
+import itertools
+import json
+import logging
+import math
+from typing import Callable, Iterator, List, Optional, Tuple, Type
+
+import pyarrow as pa
+from pydantic.json import pydantic_encoder
+
+from core.datasources.base import Connection, Cursor, types
+from core.results import ResultBudget, ResultLimits, get_result_totals, iter_batches
+
+
+ARROW_STREAM_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+ARROW_TYPES = {
+    types.BOOLEAN: pa.bool_(),
+    types.INTEGER: pa.int64(),
+    types.FLOAT: pa.float64(),
+    types.STRING: pa.string(),
+    types.BINARY: pa.binary(),
+    types.DATE: pa.date32(),
+    types.TIME: pa.time64('us'),
+    types.DATETIME: pa.timestamp('us'),
+    types.INTERVAL: pa.duration('us'),
+    types.UUID: pa.string(),
+    types.JSON: pa.string(),
+}
+
+CONVERTERS = {
+    types.UUID: str,
+    types.JSON: lambda value: json.dumps(value, default=pydantic_encoder),
+}
+
+
+def accepts_arrow(accept: str) -> bool:
+    return ARROW_STREAM_MEDIA_TYPE in accept
+
+
+def get_decimal_type(column) -> Optional[pa.DataType]:
+    precision, scale = column[4], column[5]
+    if isinstance(precision, int) and isinstance(scale, int) and 0 < precision <= 38 and 0 <= scale <= precision:
+        return pa.decimal128(precision, scale)
+
+
+def to_str(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode(errors='replace')
+    return json.dumps(value, default=pydantic_encoder) if isinstance(value, (dict, list)) else str(value)
+
+
+def to_float(value):
+    return None if value is None else float(value)
+
+
+def get_wider_types(arrow_type: Optional[pa.DataType]) -> tuple:
+    """
+    Types tried in order for values not fitting column type, strings are the last resort.
+    """
+    if arrow_type is None or pa.types.is_integer(arrow_type):
+        return pa.decimal128(38, 0), pa.float64()
+    # ints beyond 53 bits are not converted to floats implicitly
+    if pa.types.is_decimal(arrow_type) or pa.types.is_floating(arrow_type):
+        return (pa.float64(), )
+    return ()
+
+
+# values are converted by them to types columns are widened to
+WIDENING_CONVERTERS = {
+    pa.float64(): to_float,
+    pa.string(): to_str,
+}
+
+CONVERSION_ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError, TypeError, ValueError)
+
+
+class ArrowBatchBuilder(object):
+    """
+    Builds record batches from cursor row batches or column blocks of columnar cursors.
+
+    Column types come from the cursor description, unknown ones are inferred from the first batch.
+    Decimals without known precision are sent as float64, as in JSON results.
+    Values that could not be inferred are sent as strings.
+
+    Stream schema is fixed by the first batch, columns whose values do not fit their type are widened
+    till then, values of later batches are converted to the sent type.
+    """
+
+    def __init__(self, cursor: Cursor):
+        self.names = [c[0] for c in cursor.description]
+        self.types: List[Optional[pa.DataType]] = []
+        self.converters: List[Optional[Callable]] = []
+        for column, column_type in zip(cursor.description, cursor.get_column_types()):
+            arrow_type, converter = ARROW_TYPES.get(column_type), CONVERTERS.get(column_type)
+            if column_type == types.DECIMAL:
+                arrow_type = get_decimal_type(column)
+                if arrow_type is None:
+                    arrow_type, converter = pa.float64(), to_float
+            self.types.append(arrow_type)
+            self.converters.append(converter)
+        self.schema: Optional[pa.Schema] = None
+
+    def build(self, rows: list) -> pa.RecordBatch:
+        return self.build_columns([[row[i] for row in rows] for i in range(len(self.names))])
+
+    def build_columns(self, columns: list) -> pa.RecordBatch:
+        # numpy arrays of numeric columns are converted without going through Python objects
+        arrays = [self._build_array(i, values) for i, values in enumerate(columns)]
+        if self.schema is None:
+            self.schema = pa.schema([pa.field(name, array.type) for name, array in zip(self.names, arrays)])
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def build_empty(self) -> pa.RecordBatch:
+        return self.build([])
+
+    def _build_array(self, i: int, values) -> pa.Array:
+        try:
+            array = self._convert(values, self.types[i], self.converters[i])
+        except CONVERSION_ERRORS:
+            return self._widen(i, values)
+        # type of unknown column is fixed by the first batch
+        if self.types[i] is None:
+            if pa.types.is_null(array.type):
+                self.types[i], self.converters[i] = pa.string(), to_str
+                return self._convert(values, pa.string(), to_str)
+            self.types[i] = array.type
+        return array
+
+    def _widen(self, i: int, values) -> pa.Array:
+        if self.schema is not None:
+            candidates = [self.schema.field(i).type]
+        else:
+            candidates = [*get_wider_types(self.types[i]), pa.string()]
+        for arrow_type in candidates:
+            converter = WIDENING_CONVERTERS.get(arrow_type, self.converters[i])
+            try:
+                array = self._convert(values, arrow_type, converter)
+            except CONVERSION_ERRORS:
+                continue
+            self.types[i], self.converters[i] = arrow_type, converter
+            return array
+        raise pa.ArrowInvalid(
+            'Values of column %s do not fit its %s type sent with the first batch' % (self.names[i], candidates[0])
+        )
+
+    @staticmethod
+    def _convert(values, arrow_type: Optional[pa.DataType], converter: Optional[Callable]) -> pa.Array:
+        if converter is not None:
+            values = [value if value is None else converter(value) for value in values]
+        return pa.array(values, type=arrow_type)
+
+
+def iter_record_batches(cursor: Cursor, builder: ArrowBatchBuilder, batch_size: int) -> Iterator[pa.RecordBatch]:
+    if cursor.columnar:
+        while (columns := cursor.fetchcolumns()) is not None:
+            yield builder.build_columns(columns)
+        return
+    for rows in iter_batches(cursor, batch_size):
+        yield builder.build(rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    File-like object collecting IPC stream bytes written since the last take.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def collect_limited_batches(
+    cursor: Cursor, builder: ArrowBatchBuilder, batch_size: int, budget: ResultBudget
+) -> Tuple[List[pa.RecordBatch], bool]:
+    """
+    Read record batches within budget, bytes are counted as record batches buffers size.
+    Return batches and truncated flag.
+    """
+    batches = []
+    for batch in iter_record_batches(cursor, builder, batch_size):
+        count = batch.num_rows
+        if count:
+            count = budget.take(count, itertools.repeat(math.ceil(batch.nbytes / count)))
+        batches.append(batch if count == batch.num_rows else batch.slice(0, count))
+        if count < batch.num_rows:
+            cursor.cancel_unread()
+            return batches, True
+    return batches, False
+
+
+def stream_arrow(
+    conn: Connection,
+    cursor: Cursor,
+    *,
+    batch_size: int,
+    errors: Tuple[Type[Exception], ...] = (),
+    limits: Optional[ResultLimits] = None,
+    estimate_total: Optional[Callable[[int], Optional[int]]] = None,
+) -> Iterator[bytes]:
+    """
+    Stream executed cursor result as Arrow IPC stream, one record batch per rows batch or columnar block.
+    Limited results are read within budgets before being sent, so schema metadata carries JSON encoded
+    truncated, rows_returned and estimated_total fields of JSON results.
+    Commits when the stream is exhausted, the connection is released by the caller.
+    """
+    budget = ResultBudget(limits) if limits else None
+    sink = _ChunkSink()
+    try:
+        with cursor:
+            if cursor.description is None:
+                batch = pa.RecordBatch.from_arrays([pa.array([cursor.statusmessage], type=pa.string())], ['status'])
+                with pa.ipc.new_stream(sink, batch.schema) as writer:
+                    writer.write_batch(batch)
+                yield sink.take()
+                conn.commit()
+                return
+            builder = ArrowBatchBuilder(cursor)
+            if budget is not None:
+                batches, truncated = collect_limited_batches(cursor, builder, batch_size, budget)
+            else:
+                writer = None
+                for batch in iter_record_batches(cursor, builder, batch_size):
+                    if writer is None:
+                        writer = pa.ipc.new_stream(sink, batch.schema)
+                    writer.write_batch(batch)
+                    yield sink.take()
+                if writer is None:
+                    writer = pa.ipc.new_stream(sink, builder.build_empty().schema)
+                writer.close()
+                yield sink.take()
+        # total is estimated once the cursor is closed, as unread results block the connection on some engines
+        if budget is not None:
+            totals = get_result_totals(truncated, sum(batch.num_rows for batch in batches), estimate_total)
+            schema = (batches[0] if batches else builder.build_empty()).schema
+            schema = schema.with_metadata({key: json.dumps(value) for key, value in totals.items()})
+            with pa.ipc.new_stream(sink, schema) as writer:
+                for batch in batches:
+                    writer.write_batch(pa.RecordBatch.from_arrays(batch.columns, schema=schema))
+                    yield sink.take()
+            yield sink.take()
+        conn.commit()
+    # response status is already sent, the stream is left without end-of-stream marker so client fails to read it
+    except errors:
+        return
+    except pa.ArrowInvalid:
+        logging.warning('Arrow result stream is cut', exc_info=True)
@@ -0,0 +1,69 @@
+import asyncio
+import contextlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ContextManager, Dict, Optional
+
+from core.admission import admissions
+from core.config import settings
+from core.datasources.base import Connection
+from core.results import ResultLimits, fetch_result
+from core.utils import acquire_datasource_conn, get_engine_operations_cls
+
+
+def execute_batch_item(
+    datasource_id: int,
+    params: dict,
+    query: str,
+    limits: ResultLimits,
+    timeout: Optional[float] = None,
+    user_id: Optional[int] = None,
+    is_cancelled: Callable[[], bool] = lambda: False,
+    watch: Optional[Callable[[Connection], ContextManager]] = None,
+) -> dict:
+    """
+    Run batch query on executor worker. Query slot is taken by the worker, so items waiting for
+    data source concurrency do not hold slots, and it is released with the connection.
+    Query runs within watch context of the connection when it is passed, the connection is released after it.
+    """
+    admission = admissions.acquire(datasource_id, user_id, is_cancelled=is_cancelled)
+    conn = acquire_datasource_conn(datasource_id, params, timeout, admission)
+    try:
+        with watch(conn) if watch is not None else contextlib.nullcontext():
+            operations = get_engine_operations_cls(params['engine'])(conn)
+            return fetch_result(conn, query, limits=limits, operations=operations)
+    finally:
+        conn.close()
+
+
+class BatchExecutor(object):
+    """
+    Runs batch queries on a bounded thread pool shared by all requests.
+    At most QUERY_BATCH_DATASOURCE_CONCURRENCY queries of a data source run at once,
+    the rest of them wait without holding a worker.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    async def run(self, datasource_id: int, func: Callable, *args, **kwargs):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=settings.QUERY_BATCH_MAX_WORKERS, thread_name_prefix='query-batch'
+            )
+        if (semaphore := self._semaphores.get(datasource_id)) is None:
+            semaphore = self._semaphores[datasource_id] = asyncio.Semaphore(
+                settings.QUERY_BATCH_DATASOURCE_CONCURRENCY
+            )
+        async with semaphore:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+batches = BatchExecutor()
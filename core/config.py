@@ -55,6 +55,66 @@ class Settings(BaseSettings):
     SMTP_USER: str
     SMTP_PASSWORD: str
 
+    # rows fetched from data source cursor per streamed chunk
+    QUERY_STREAM_BATCH_SIZE: int = 1000
+    # default statement timeout in seconds, applied by data sources and by cancelling queries after it
+    QUERY_TIMEOUT: Optional[float] = None
+    # opt-in query results cache
+    QUERY_CACHE_TTL: int = 3600
+    QUERY_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    # default /query result budgets, data source and user ones are applied on top of them
+    QUERY_MAX_ROWS: Optional[int] = None
+    QUERY_MAX_BYTES: Optional[int] = None
+    # max rows of table preview sample
+    QUERY_PREVIEW_MAX_ROWS: int = 1000
+    # /query/batch executor
+    QUERY_BATCH_MAX_ITEMS: int = 50
+    QUERY_BATCH_MAX_WORKERS: int = 16
+    QUERY_BATCH_DATASOURCE_CONCURRENCY: int = 4
+    # max size of LOB values fetched inline by wire format cursors, larger values fail the fetch
+    WIRE_LOB_MAX_BYTES: int = 1024 * 1024
+
+    # admission control of data source queries, None disables a limit
+    # per data source limit defaults to pool max size, so queries wait in admission queue instead of pool checkout
+    ADMISSION_MAX_QUERIES: Optional[int] = 100
+    ADMISSION_MAX_QUERIES_PER_DATASOURCE: Optional[int] = 10
+    ADMISSION_MAX_QUERIES_PER_USER: Optional[int] = 10
+    # limit of jobs and exports, keeps slots for interactive queries
+    ADMISSION_MAX_BACKGROUND_QUERIES: Optional[int] = None
+    # interactive queries over the limits wait up to ADMISSION_QUEUE_TIMEOUT seconds, then 429 is returned
+    ADMISSION_QUEUE_SIZE: int = 100
+    ADMISSION_QUEUE_TIMEOUT: float = 10
+    ADMISSION_RETRY_AFTER: int = 5
+
+    # data source connection pools, timeouts are in seconds
+    DATASOURCE_POOL_MIN_SIZE: int = 0
+    DATASOURCE_POOL_MAX_SIZE: int = 10
+    DATASOURCE_POOL_IDLE_TIMEOUT: int = 300
+    DATASOURCE_POOL_MAX_LIFETIME: int = 3600
+    DATASOURCE_POOL_CHECKOUT_TIMEOUT: int = 30
+
+    # catalog queries of data source introspection run concurrently on up to this many pooled connections
+    INTROSPECTION_CONCURRENCY: int = 4
+
+    # cached schemas older than soft TTL are served while refreshed in background, older than hard TTL are
+    # refreshed before being served, None keeps serving them, seconds
+    SCHEMA_CACHE_SOFT_TTL: int = 300
+    SCHEMA_CACHE_HARD_TTL: Optional[int] = 24 * 3600
+    # refresh stale schemas of all data sources in background on startup
+    SCHEMA_CACHE_PREWARM: bool = False
+
+    # background query jobs, results are spooled to JOBS_SPOOL_DIR and kept for JOBS_RESULT_TTL seconds
+    JOBS_MAX_WORKERS: int = 4
+    JOBS_MAX_PENDING: int = 100
+    JOBS_SPOOL_DIR: str = 'spool/jobs'
+    JOBS_RESULT_TTL: int = 3600
+    # statement timeout of jobs and exports, data source statement timeout applies when not set
+    JOBS_TIMEOUT: Optional[float] = None
+
+    # shared SSH tunnels, seconds
+    SSH_TUNNEL_KEEPALIVE: float = 30
+    SSH_TUNNEL_IDLE_TIMEOUT: int = 600
+
     class Config:
         env_file = '.env'
         case_sensitive = True
@@ -1,7 +1,12 @@
-from .connection import Connection, Error
-from .cursor import Cursor
+from .connection import Connection, AsyncConnection, Error
+from .cursor import Cursor, AsyncCursor
+from .explain import Explain
 from .introspection import Introspection
+from .operations import Operations
 from .schema import ConnectionParams
 
 
-__all__ = ['Connection', 'Cursor', 'Introspection', 'ConnectionParams', 'Error']
\ No newline at end of file
+__all__ = [
+    'Connection', 'AsyncConnection', 'Cursor', 'AsyncCursor', 'Explain', 'Introspection', 'Operations',
+    'ConnectionParams', 'Error',
+]
\ No newline at end of file
@@ -1,7 +1,9 @@
-from core.datasources.base.cursor import Cursor as BaseCursor
+from typing import Optional
 
+from core.datasources.base.cursor import Cursor as BaseCursor, AsyncCursor as BaseAsyncCursor
 
-__all__ = ['Connection', 'Error']
+
+__all__ = ['Connection', 'AsyncConnection', 'Error']
 
 
 class Error(Exception):
@@ -11,24 +13,207 @@ class Error(Exception):
 class Connection(object):
 
     _conn = None
+    cursor_cls = BaseCursor
+    # rows transferred from server per round trip by server-side cursors
+    itersize = 2000
+    ping_query = 'SELECT 1'
+    # pool the connection was checked out from
+    pool = None
+    # admission control slot held while the connection is checked out
+    admission = None
+    # data source side statements deadline in seconds, requests override the default one till connection release
+    default_statement_timeout = None
+    statement_timeout = None
+    # engine has columnar cursors, see columnar_cursor
+    supports_columnar = False
+    # engine cursors have wire format mode, see Cursor.set_wire_format
+    supports_wire_format = False
 
     def close(self, *args, **kwargs):
+        self.release_admission()
+        # pooled connections are returned to the pool instead of closing
+        if self.pool is not None:
+            return self.pool.release(self)
+        return self.terminate(*args, **kwargs)
+
+    def terminate(self, *args, **kwargs):
         return self._conn.close(*args, **kwargs)
 
+    def release_admission(self):
+        admission, self.admission = self.admission, None
+        if admission is not None:
+            admission.release()
+
+    def ping(self) -> bool:
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(self.ping_query)
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    def init_statement_timeout(self, timeout: Optional[float]):
+        """
+        Called by engine connections on connect.
+        """
+        self.default_statement_timeout = timeout
+        if timeout is not None:
+            self.set_statement_timeout(timeout)
+
+    def set_statement_timeout(self, timeout: Optional[float]):
+        """
+        Limit statements execution time with engine native mechanism, None disables the limit.
+        """
+        self.statement_timeout = timeout
+
+    def reset_statement_timeout(self):
+        if self.statement_timeout != self.default_statement_timeout:
+            self.set_statement_timeout(self.default_statement_timeout)
+
     def commit(self, *args, **kwargs):
         return self._conn.commit(*args, **kwargs)
 
     def rollback(self, *args, **kwargs):
         return self._conn.rollback(*args, **kwargs)
 
-    def cursor(self, *args, **kwargs):
-        return BaseCursor(self._conn.cursor(*args, **kwargs))
+    def cursor(
+        self,
+        *args,
+        server_side: bool = False,
+        itersize: int = None,
+        columnar: bool = False,
+        wire_format: bool = False,
+        **kwargs,
+    ):
+        """
+        Server-side cursor keeps result on database server and transfers it by itersize batches
+        while fetching, instead of materializing the whole result in the driver on execute.
+        Columnar cursor streams result blocks as column arrays, engines without them return row cursors.
+        Wire format cursor fetches values of some types as strings, engines without it return regular cursors.
+        """
+        if columnar and self.supports_columnar:
+            return self.columnar_cursor()
+        if server_side:
+            cursor = self.server_side_cursor(itersize or self.itersize)
+        else:
+            cursor = self.wrap_cursor(self._conn.cursor(*args, **kwargs))
+        if wire_format and self.supports_wire_format:
+            cursor.set_wire_format()
+        return cursor
+
+    def server_side_cursor(self, itersize: int):
+        # engines without server-side cursors support fall back to client-side ones
+        return self.wrap_cursor(self._conn.cursor())
+
+    def wrap_cursor(self, cursor):
+        return self.cursor_cls(cursor)
+
+    def columnar_cursor(self):
+        raise NotImplementedError()
+
+    def cancel(self):
+        """
+        Cancel statement running on the connection. Called from a thread other than the one running it.
+        """
+        raise NotImplementedError()
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is None:
-            self.commit()
-        else:
-            self.rollback()
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.release_admission()
+            if self.pool is not None:
+                self.pool.release(self)
+
+
+class AsyncConnection(object):
+    """
+    Connection of asyncio drivers, mirrors Connection with coroutine methods.
+    Running statements do not hold threadpool threads, so engines having such drivers serve queries with them.
+    """
+
+    _conn = None
+    cursor_cls = BaseAsyncCursor
+    ping_query = 'SELECT 1'
+    # pool the connection was checked out from
+    pool = None
+    # admission control slot held while the connection is checked out
+    admission = None
+    default_statement_timeout = None
+    statement_timeout = None
+
+    @classmethod
+    async def connect(cls, *args, statement_timeout: Optional[float] = None, **kwargs) -> 'AsyncConnection':
+        raise NotImplementedError()
+
+    async def close(self):
+        self.release_admission()
+        # pooled connections are returned to the pool instead of closing
+        if self.pool is not None:
+            return await self.pool.release(self)
+        return await self.terminate()
+
+    async def terminate(self):
+        return await self._conn.close()
+
+    def release_admission(self):
+        admission, self.admission = self.admission, None
+        if admission is not None:
+            admission.release()
+
+    async def ping(self) -> bool:
+        try:
+            async with self.cursor() as cursor:
+                await cursor.execute(self.ping_query)
+                await cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    async def commit(self):
+        return await self._conn.commit()
+
+    async def rollback(self):
+        return await self._conn.rollback()
+
+    def cursor(self):
+        return self.cursor_cls(self._conn.cursor())
+
+    async def cancel(self):
+        """
+        Cancel statement running on the connection. Called from a task other than the one running it.
+        """
+        raise NotImplementedError()
+
+    async def init_statement_timeout(self, timeout: Optional[float]):
+        self.default_statement_timeout = timeout
+        if timeout is not None:
+            await self.set_statement_timeout(timeout)
+
+    async def set_statement_timeout(self, timeout: Optional[float]):
+        self.statement_timeout = timeout
+
+    async def reset_statement_timeout(self):
+        if self.statement_timeout != self.default_statement_timeout:
+            await self.set_statement_timeout(self.default_statement_timeout)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                await self.commit()
+            else:
+                await self.rollback()
+        finally:
+            self.release_admission()
+            if self.pool is not None:
+                await self.pool.release(self)
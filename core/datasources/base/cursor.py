@@ -1,5 +1,18 @@
+from typing import List, Optional
+
+from core.datasources.base import types
+
+
 class Cursor(object):
 
+    # description type codes to column types from core.datasources.base.types
+    type_map = {}
+    # columnar cursors fetch result blocks as column arrays instead of rows
+    columnar = False
+    # column types fetched as strings in data source text format by wire format cursors, see set_wire_format
+    wire_types = frozenset()
+    wire_format = False
+
     def __init__(self, cursor):
         self._cursor = cursor
 
@@ -12,10 +25,44 @@ class Cursor(object):
     def fetchall(self, *args, **kwargs):
         return self._cursor.fetchall(*args, **kwargs)
 
+    def set_wire_format(self):
+        """
+        Register driver casters returning values of wire_types as received from data source,
+        so Python objects are not constructed for values serialized to text right after.
+        """
+        raise NotImplementedError()
+
+    def cancel_unread(self):
+        """
+        Stop the query whose result is left unread before the cursor is closed, engines reading
+        the rest of result on close override it. Others drop unread rows on close.
+        """
+
+    def fetchcolumns(self) -> Optional[list]:
+        """
+        Fetch the next result block as a list of column arrays, None when the result is exhausted.
+        """
+        raise NotImplementedError()
+
     @property
     def description(self):
         return self._cursor.description
 
+    def get_column_types(self) -> List[Optional[str]]:
+        return [self.get_column_type(column) for column in self.description]
+
+    def get_column_type(self, column) -> Optional[str]:
+        column_type = self.type_map.get(column[1])
+        if self.wire_format and column_type in self.wire_types:
+            return types.STRING
+        return column_type
+
+    @property
+    def rowcount(self) -> Optional[int]:
+        # drivers report -1 when the count is not known
+        rowcount = self._cursor.rowcount
+        return rowcount if rowcount is not None and rowcount >= 0 else None
+
     @property
     def statusmessage(self):
         return self._cursor.statusmessage
@@ -28,3 +75,47 @@ class Cursor(object):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
+
+
+class AsyncCursor(object):
+    """
+    Cursor of asyncio drivers, mirrors Cursor with coroutine methods.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    async def execute(self, *args, **kwargs):
+        return await self._cursor.execute(*args, **kwargs)
+
+    async def fetchmany(self, *args, **kwargs):
+        return await self._cursor.fetchmany(*args, **kwargs)
+
+    async def fetchall(self, *args, **kwargs):
+        return await self._cursor.fetchall(*args, **kwargs)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def get_column_types(self) -> List[Optional[str]]:
+        # asyncio drivers describe columns by their own type objects, so column types are not known
+        return [None] * len(self.description)
+
+    @property
+    def rowcount(self) -> Optional[int]:
+        rowcount = self._cursor.rowcount
+        return rowcount if rowcount is not None and rowcount >= 0 else None
+
+    @property
+    def statusmessage(self) -> Optional[str]:
+        return None
+
+    async def close(self, *args, **kwargs):
+        return await self._cursor.close(*args, **kwargs)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
@@ -0,0 +1,64 @@
+import abc
+from typing import Any, List, Optional, Tuple
+
+from core.datasources.base.connection import Connection
+from core.datasources.base.cursor import Cursor
+from core.sql import normalize_query
+
+
+def to_number(value) -> Optional[float]:
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def make_node(
+    operation: str,
+    *,
+    object_name: Optional[str] = None,
+    estimated_rows=None,
+    cost=None,
+    actual_rows=None,
+    actual_time=None,
+    details: Optional[dict] = None,
+    children: Optional[List[dict]] = None,
+) -> dict:
+    """
+    Normalized plan node, cost is in engine units and actual time is in milliseconds.
+    """
+    return {
+        'operation': operation,
+        'object': object_name,
+        'estimated_rows': to_number(estimated_rows),
+        'cost': to_number(cost),
+        'actual_rows': to_number(actual_rows),
+        'actual_time': to_number(actual_time),
+        'details': {key: value for key, value in (details or {}).items() if value is not None},
+        'children': children or [],
+    }
+
+
+class Explain(abc.ABC):
+    """
+    Runs engine plan facility for a query and normalizes the plan to a tree of nodes.
+    """
+
+    # engine could execute the query to report actual rows and time of plan nodes
+    supports_analyze = False
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    @abc.abstractmethod
+    def get_plan(self, cursor: Cursor, query: str, analyze: bool = False) -> Tuple[Any, dict]:
+        """
+        Return native plan and its root node.
+        """
+
+    def explain(self, query: str, analyze: bool = False) -> dict:
+        if analyze and not self.supports_analyze:
+            raise NotImplementedError('Engine does not support plan analyze')
+        with self.connection.cursor() as cursor:
+            raw, plan = self.get_plan(cursor, normalize_query(query), analyze)
+        return {'plan': plan, 'raw': raw}
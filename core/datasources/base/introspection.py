@@ -1,32 +1,151 @@
 import abc
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 from core.datasources.base.connection import Connection
 from core.datasources.base.cursor import Cursor
 
 
 class Introspection(abc.ABC):
+    """
+    Reads data source structure from engine catalog. Catalog queries of tables, columns and constraint parts
+    are independent, with connect factory they run concurrently on up to concurrency connections.
+    The factory returns None when no connection could be made without waiting.
+    """
 
-    def __init__(self, connection: Connection):
+    # changed tables are re-read by filtered queries up to this count, the whole structure is re-read over it
+    max_filtered_tables = 500
+    # methods reading constraints by separate catalog queries, their results are merged by merge_constraints
+    constraint_parts: Tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        connection: Connection,
+        connect: Optional[Callable[[], Optional[Connection]]] = None,
+        concurrency: int = 1,
+    ):
         self.connection = connection
+        self.connect = connect
+        self.concurrency = concurrency
 
     @abc.abstractmethod
-    def get_tables(self, cursor: Cursor):
+    def get_tables(self, cursor: Cursor, tables: Optional[List[str]] = None):
         pass
 
     @abc.abstractmethod
-    def get_columns(self, cursor: Cursor):
+    def get_columns(self, cursor: Cursor, tables: Optional[List[str]] = None):
         pass
 
-    @abc.abstractmethod
-    def get_constraints(self, cursor: Cursor):
-        pass
+    def get_constraints(self, cursor: Cursor, tables: Optional[List[str]] = None) -> Dict[str, List[dict]]:
+        return self.merge_constraints([getattr(self, part)(cursor, tables) for part in self.constraint_parts])
+
+    def merge_constraints(self, parts: List[Dict[str, Dict[str, dict]]]) -> Dict[str, List[dict]]:
+        """
+        Merge constraints by table and name read by constraint parts, the first part reading a name wins.
+        """
+        constraints = {}
+        for part in parts:
+            for table, entries in part.items():
+                for name, entry in entries.items():
+                    constraints.setdefault(table, {}).setdefault(name, entry)
+        return {table: [{'name': k, **v} for k, v in entries.items()] for table, entries in constraints.items()}
+
+    def get_tables_filter(self, column: str, tables: Optional[List[str]]) -> Tuple[str, Optional[tuple]]:
+        """
+        SQL condition limiting column to table names and its parameters, None parameters are not passed to driver.
+        """
+        if tables is None:
+            return '1 = 1', None
+        if not tables:
+            return '1 = 0', None
+        return '%s IN (%s)' % (column, ', '.join(['%s'] * len(tables))), tuple(tables)
+
+    def get_change_markers(self, cursor: Cursor) -> Optional[Dict[str, str]]:
+        """
+        Cheap catalog values of every table changed by DDL on it, None when engine has no such values.
+        """
+        return None
+
+    def get_table_statistics(self, cursor: Cursor, table: str) -> dict:
+        """
+        Table statistics used to plan sampled reads, rows and pages are estimates kept by the engine or None.
+        """
+        return {'rows': None}
+
+    def get_structure(self, tables: Optional[List[str]] = None) -> list:
+        with self.connection.cursor() as cursor:
+            return self._get_structure(cursor, tables)
+
+    def get_table(self, table: str) -> Optional[dict]:
+        """
+        Table with its columns and constraints read by table filtered queries, None when it does not exist.
+        """
+        with self.connection.cursor() as cursor:
+            structure = self._get_structure(cursor, [table])
+        return structure[0] if structure else None
+
+    def _get_structure(self, cursor: Cursor, tables: Optional[List[str]] = None) -> list:
+        readers = [self.get_tables, self.get_columns] + [getattr(self, part) for part in self.constraint_parts]
+        entities, columns, *parts = self.read_catalog(cursor, readers, tables)
+        constraints = self.merge_constraints(parts)
+        return [
+            {**table, 'children': columns.get(table['name'], []) + constraints.get(table['name'], [])}
+            for table in entities
+        ]
+
+    def read_catalog(self, cursor: Cursor, readers: List[Callable], tables: Optional[List[str]]) -> list:
+        """
+        Run catalog readers, the first one on cursor and the rest of them at once on extra connections
+        made by connect factory, so reading takes as long as the slowest catalog query instead of all of them.
+        Extra connections are taken only when free at once, readers run one by one on cursor without them.
+        Connections are separate transactions, so DDL running meanwhile could be seen by some readers only.
+        """
+        connections = []
+        try:
+            while self.connect is not None and len(connections) < min(self.concurrency, len(readers)) - 1:
+                if (conn := self.connect()) is None:
+                    break
+                connections.append(conn)
+            if not connections:
+                return [reader(cursor, tables) for reader in readers]
+            free = queue.SimpleQueue()
+            for conn in connections:
+                free.put(conn)
+            with ThreadPoolExecutor(max_workers=len(connections), thread_name_prefix='introspection') as executor:
+                futures = [executor.submit(self._read_on_connection, free, reader, tables) for reader in readers[1:]]
+                return [readers[0](cursor, tables)] + [future.result() for future in futures]
+        finally:
+            for conn in connections:
+                conn.close()
+
+    def _read_on_connection(self, free: queue.SimpleQueue, reader: Callable, tables: Optional[List[str]]):
+        conn = free.get()
+        try:
+            with conn.cursor() as cursor:
+                return reader(cursor, tables)
+        finally:
+            free.put(conn)
 
-    def get_structure(self):
+    def refresh_structure(
+        self, structure: Optional[list], markers: Optional[Dict[str, str]]
+    ) -> Tuple[list, Optional[Dict[str, str]]]:
+        """
+        Refresh structure read before along with change markers, only tables whose markers changed are re-read
+        and merged into it. The whole structure is read when there is no previous one or engine has no markers.
+        """
         with self.connection.cursor() as cursor:
-            tables = self.get_tables(cursor)
-            columns = self.get_columns(cursor)
-            constraints = self.get_constraints(cursor)
-            return [
-                {**table, 'children': columns.get(table['name'], []) + constraints.get(table['name'], [])}
-                for table in tables
-            ]
+            current = self.get_change_markers(cursor)
+            if current is None or structure is None or markers is None:
+                return self._get_structure(cursor), current
+            changed = [table for table, marker in current.items() if markers.get(table) != marker]
+            if len(changed) > self.max_filtered_tables:
+                return self._get_structure(cursor), current
+            fresh = self._get_structure(cursor, changed) if changed else []
+        # markers are read first, so tables changed while reading the structure are re-read by the next refresh,
+        # tables dropped since the previous read have no markers
+        tables = {table['name']: table for table in structure if table['name'] in current}
+        for table in changed:
+            tables.pop(table, None)
+        tables.update((table['name'], table) for table in fresh)
+        return [tables[name] for name in sorted(tables)], current
@@ -0,0 +1,65 @@
+from typing import List, Optional
+
+from core.datasources.base.connection import Connection
+from core.datasources.base.cursor import Cursor
+from core.sql import normalize_query, split_statements
+
+
+class Operations(object):
+    """
+    Engine specific SQL generation and query planner access.
+    """
+
+    supports_savepoints = True
+    identifier_quote = '"'
+    # sampled reads take more rows than needed, so short samples are rare; smaller tables are read as is
+    sample_oversampling = 4
+    sample_min_rows_ratio = 10
+    # block sampling takes whole pages, too few of them make sample size unpredictable
+    sample_min_pages = 16
+
+    def __init__(self, connection: Connection):
+        self.connection = connection
+
+    def limit_query(self, query: str, limit: int) -> Optional[str]:
+        """
+        Wrap read query to return at most limit rows, None is returned when it could not be done.
+        """
+        return 'SELECT * FROM (%s) crossbase_limited LIMIT %d' % (normalize_query(query), limit)
+
+    def quote_name(self, name: str) -> str:
+        quote = self.identifier_quote
+        return '%s%s%s' % (quote, name.replace(quote, quote * 2), quote)
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        """
+        Read of about limit rows sampled across the table, None when table should be read as is.
+        """
+        return None
+
+    def get_sample_percent(self, limit: int, statistics: dict) -> Optional[float]:
+        rows = statistics.get('rows')
+        if not rows or rows <= limit * self.sample_min_rows_ratio:
+            return None
+        percent = 100.0 * limit * self.sample_oversampling / rows
+        if pages := statistics.get('pages'):
+            percent = max(percent, 100.0 * self.sample_min_pages / pages)
+        return min(100.0, percent)
+
+    def split_statements(self, script: str) -> List[str]:
+        return split_statements(script)
+
+    def savepoint(self, cursor: Cursor, name: str):
+        cursor.execute('SAVEPOINT %s' % name)
+
+    def rollback_to_savepoint(self, cursor: Cursor, name: str):
+        cursor.execute('ROLLBACK TO SAVEPOINT %s' % name)
+
+    def release_savepoint(self, cursor: Cursor, name: str):
+        cursor.execute('RELEASE SAVEPOINT %s' % name)
+
+    def estimate_rows(self, cursor: Cursor, query: str) -> Optional[int]:
+        """
+        Planner estimate of read query result rows, None when it is not available.
+        """
+        return None
@@ -0,0 +1,14 @@
+# Column types engine cursors report for result columns, None is reported for unknown ones.
+
+BOOLEAN = 'boolean'
+INTEGER = 'integer'
+FLOAT = 'float'
+DECIMAL = 'decimal'
+STRING = 'string'
+BINARY = 'binary'
+DATE = 'date'
+TIME = 'time'
+DATETIME = 'datetime'
+INTERVAL = 'interval'
+UUID = 'uuid'
+JSON = 'json'
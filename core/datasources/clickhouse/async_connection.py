@@ -0,0 +1,77 @@
+import math
+import uuid
+
+import asynch
+from asynch.errors import ClickHouseException
+
+from core.datasources.base.connection import AsyncConnection as BaseAsyncConnection
+from core.datasources.base.cursor import AsyncCursor as BaseAsyncCursor
+from core.sql import get_status_message
+
+
+__all__ = ['AsyncConnection', 'AsyncCursor', 'Error']
+
+
+Error = (ClickHouseException, OSError)
+
+
+class AsyncCursor(BaseAsyncCursor):
+
+    def __init__(self, cursor, connection: 'AsyncConnection'):
+        super().__init__(cursor)
+        self._connection = connection
+        self._query = None
+
+    async def execute(self, query, *args, **kwargs):
+        # query id is known in advance to kill the query on cancel
+        query_id = str(uuid.uuid4())
+        self._cursor.set_query_id(query_id)
+        self._connection.query_id = query_id
+        self._query = query
+        return await super().execute(query, *args, **kwargs)
+
+    @property
+    def statusmessage(self):
+        # driver reports affected rows only
+        return None if self._query is None else get_status_message(self._query, self.rowcount)
+
+
+class AsyncConnection(BaseAsyncConnection):
+
+    def __init__(self, conn, connect_kwargs: dict):
+        self._conn = conn
+        self._connect_kwargs = connect_kwargs
+        # id of the last query executed by connection cursors
+        self.query_id = None
+
+    @classmethod
+    async def connect(cls, *args, statement_timeout=None, **kwargs):
+        conn = cls(await asynch.connect(*args, **kwargs), kwargs)
+        await conn.init_statement_timeout(statement_timeout)
+        return conn
+
+    def cursor(self):
+        cursor = self._conn.cursor()
+        # settings are sent with every query, so statement timeout is applied per cursor
+        if self.statement_timeout:
+            cursor.set_settings({'max_execution_time': math.ceil(self.statement_timeout)})
+        return AsyncCursor(cursor, self)
+
+    async def commit(self):
+        # there are no transactions
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def cancel(self):
+        if self.query_id is None:
+            return
+        conn = await asynch.connect(**self._connect_kwargs)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute(
+                    'KILL QUERY WHERE query_id = %(query_id)s ASYNC', {'query_id': self.query_id}
+                )
+        finally:
+            await conn.close()
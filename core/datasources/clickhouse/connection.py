@@ -1,6 +1,9 @@
+import math
+
 import clickhouse_driver
 
 from core.datasources.base.connection import Connection as BaseConnection
+from core.datasources.clickhouse.cursor import Cursor, ColumnarCursor
 
 
 __all__ = ['Connection', 'Error']
@@ -11,5 +14,54 @@ Error = clickhouse_driver.dbapi.Error
 
 class Connection(BaseConnection):
 
-    def __init__(self, *args, **kwargs):
+    cursor_cls = Cursor
+    supports_columnar = True
+    # native client of columnar cursors, connected on the first query
+    _columnar_client = None
+
+    def __init__(self, *args, statement_timeout=None, **kwargs):
         self._conn = clickhouse_driver.dbapi.connect(*args, **kwargs)
+        self._connect_args = (args, kwargs)
+        # id of the last query executed by connection cursors
+        self.query_id = None
+        self.init_statement_timeout(statement_timeout)
+
+    def server_side_cursor(self, itersize):
+        # result blocks are received by Client.execute_iter while fetching
+        cursor = self._conn.cursor()
+        cursor.set_stream_results(True, itersize)
+        return self.wrap_cursor(cursor)
+
+    def wrap_cursor(self, cursor):
+        # settings are sent with every query, so statement timeout is applied per cursor
+        if self.statement_timeout:
+            cursor.set_settings(self.get_query_settings())
+        return self.cursor_cls(cursor, self)
+
+    def columnar_cursor(self):
+        if self._columnar_client is None:
+            args, kwargs = self._connect_args
+            self._columnar_client = clickhouse_driver.Client(*args, **kwargs, settings={'use_numpy': True})
+        return ColumnarCursor(self._columnar_client, self, self.get_query_settings())
+
+    def get_query_settings(self) -> dict:
+        if not self.statement_timeout:
+            return {}
+        return {'max_execution_time': math.ceil(self.statement_timeout)}
+
+    def terminate(self, *args, **kwargs):
+        if self._columnar_client is not None:
+            self._columnar_client.disconnect()
+        return super().terminate(*args, **kwargs)
+
+    def cancel(self):
+        if self.query_id is None:
+            return
+        args, kwargs = self._connect_args
+        conn = clickhouse_driver.dbapi.connect(*args, **kwargs)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('KILL QUERY WHERE query_id = %(query_id)s ASYNC', {'query_id': self.query_id})
+            cursor.close()
+        finally:
+            conn.close()
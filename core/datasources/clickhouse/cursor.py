@@ -1,5 +1,171 @@
+import itertools
+import re
+import uuid
+from typing import Optional
+
+from clickhouse_driver.client import QueryInfo
+from clickhouse_driver.dbapi.errors import OperationalError
+from clickhouse_driver.errors import Error as DriverError
+from clickhouse_driver.protocol import ServerPacketTypes
+
+from core.datasources.base import types
 from core.datasources.base.cursor import Cursor as BaseCursor
 
 
 class Cursor(BaseCursor):
-    pass
+
+    # description type codes are type names, wrappers are stripped before lookup
+    type_map = {
+        'Bool': types.BOOLEAN,
+        'Int8': types.INTEGER,
+        'Int16': types.INTEGER,
+        'Int32': types.INTEGER,
+        'Int64': types.INTEGER,
+        'UInt8': types.INTEGER,
+        'UInt16': types.INTEGER,
+        'UInt32': types.INTEGER,
+        'Float32': types.FLOAT,
+        'Float64': types.FLOAT,
+        'Decimal': types.DECIMAL,
+        'String': types.STRING,
+        'FixedString': types.STRING,
+        'Enum8': types.STRING,
+        'Enum16': types.STRING,
+        'Date': types.DATE,
+        'Date32': types.DATE,
+        'DateTime': types.DATETIME,
+        'DateTime64': types.DATETIME,
+        'UUID': types.UUID,
+    }
+    wrapper_re = re.compile(r'^(?:Nullable|LowCardinality)\((.*)\)$')
+
+    def __init__(self, cursor, connection):
+        super().__init__(cursor)
+        self._connection = connection
+
+    def execute(self, *args, **kwargs):
+        # query id is known in advance to kill the query on cancel
+        query_id = str(uuid.uuid4())
+        self._cursor.set_query_id(query_id)
+        self._connection.query_id = query_id
+        return super().execute(*args, **kwargs)
+
+    def get_column_type(self, column):
+        type_ = column[1]
+        while match := self.wrapper_re.match(type_):
+            type_ = match.group(1)
+        # parametrized types like Decimal(10, 2) or DateTime('UTC')
+        return self.type_map.get(type_.split('(', 1)[0])
+
+
+class ColumnarCursor(Cursor):
+    """
+    Reads result blocks of native client with use_numpy setting as numpy columns, without building row tuples.
+    Rows are fetched by transposing blocks, for consumers of plain cursors.
+
+    Client.execute_iter of clickhouse-driver transposes every block into rows and has no columnar mode,
+    so the query is sent the way execute_iter does it and data packets are read one by one.
+    Client internals used here are those of clickhouse-driver version pinned in requirements.
+    """
+
+    columnar = True
+
+    def __init__(self, client, connection, settings: Optional[dict] = None):
+        super().__init__(None, connection)
+        self._client = client
+        self._settings = settings
+        self._packets = None
+        self._pending = None
+        # rows of the last block read by fetchmany and not fetched yet
+        self._rows = iter(())
+        self._description = None
+        self._rowcount = None
+
+    def execute(self, query):
+        self.close()
+        query_id = str(uuid.uuid4())
+        self._connection.query_id = query_id
+        self._description, self._pending, self._rowcount = None, None, 0
+        self._rows = iter(())
+        client = self._client
+        try:
+            client.make_query_settings(self._settings)
+            client.connection.force_connect()
+            client.last_query = QueryInfo()
+            client.connection.send_query(query, query_id=query_id)
+            client.connection.send_external_tables(None)
+            self._packets = client.packet_generator()
+            # the first data block is a header with column names and types only
+            block = self._next_block()
+        except DriverError as e:
+            raise OperationalError(e)
+        if block is not None:
+            self._description = [
+                (name, type_, None, None, None, None, True) for name, type_ in block.columns_with_types
+            ]
+            self._pending = block if block.num_rows else None
+
+    def fetchcolumns(self) -> Optional[list]:
+        block, self._pending = self._pending, None
+        try:
+            while block is None or not block.num_rows:
+                if (block := self._next_block()) is None:
+                    return None
+        except DriverError as e:
+            raise OperationalError(e)
+        self._rowcount += block.num_rows
+        return block.get_columns()
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows = list(itertools.islice(self._rows, size))
+        while len(rows) < size and (columns := self.fetchcolumns()) is not None:
+            self._rows = iter(zip(*map(get_column_values, columns)))
+            rows.extend(itertools.islice(self._rows, size - len(rows)))
+        return rows
+
+    def fetchall(self) -> list:
+        rows = list(self._rows)
+        while (columns := self.fetchcolumns()) is not None:
+            rows.extend(zip(*map(get_column_values, columns)))
+        return rows
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def rowcount(self) -> Optional[int]:
+        return self._rowcount
+
+    @property
+    def statusmessage(self):
+        return None
+
+    def close(self, *args, **kwargs):
+        # unread result is dropped with the connection, server cancels the query
+        if self._packets is not None:
+            self._packets = None
+            self._client.disconnect()
+
+    def _next_block(self):
+        if self._packets is None:
+            return None
+        for packet in self._packets:
+            # totals and extremes blocks are not a part of the result
+            if packet.type == ServerPacketTypes.DATA:
+                return packet.block
+        self._packets = None
+        return None
+
+
+def get_column_values(column) -> list:
+    """
+    Python values of numpy or pandas column of a result block.
+    """
+    # pandas datetimes with time zone
+    if hasattr(column, 'to_pydatetime'):
+        return list(column.to_pydatetime())
+    # tolist turns nanosecond datetimes into ints, microsecond ones into datetimes
+    if getattr(column, 'dtype', None) is not None and column.dtype.kind == 'M':
+        column = column.astype('datetime64[us]')
+    return column.tolist() if hasattr(column, 'tolist') else list(column)
@@ -0,0 +1,30 @@
+import json
+
+from core.datasources.base.explain import Explain as BaseExplain, make_node
+
+
+class Explain(BaseExplain):
+
+    def get_plan(self, cursor, query, analyze=False):
+        # json output of EXPLAIN PLAN needs ClickHouse 21.6 or later
+        cursor.execute('EXPLAIN PLAN json = 1, indexes = 1 %s' % query)
+        raw = json.loads('\n'.join(row[0] for row in cursor.fetchall()))
+        root = self.make_node(raw[0]['Plan'])
+        # plan has no costs, rows to be read from tables are estimated by parts and granules selected by indexes
+        cursor.execute('EXPLAIN ESTIMATE %s' % query)
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if rows:
+            root['estimated_rows'] = float(sum(int(row['rows']) for row in rows))
+            root['details']['estimate'] = rows
+        return raw, root
+
+    def make_node(self, plan: dict) -> dict:
+        # description of reading steps is the table name
+        is_read = plan['Node Type'].startswith('ReadFrom')
+        return make_node(
+            plan['Node Type'],
+            object_name=plan.get('Description') if is_read else None,
+            details={key: value for key, value in plan.items() if key not in ('Node Type', 'Plans')},
+            children=[self.make_node(child) for child in plan.get('Plans', [])],
+        )
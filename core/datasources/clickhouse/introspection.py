@@ -3,12 +3,16 @@ from core.datasources.base.introspection import Introspection as BaseIntrospecti
 
 class Introspection(BaseIntrospection):
 
-    def get_tables(self, cursor):
-        cursor.execute('SELECT name FROM system.tables WHERE database = currentDatabase() ORDER BY name')
+    def get_tables(self, cursor, tables=None):
+        condition, params = self.get_tables_filter('name', tables)
+        cursor.execute(
+            'SELECT name FROM system.tables WHERE database = currentDatabase() AND %s ORDER BY name' % condition, params
+        )
         return [{'name': table[0], 'entity': 'table'} for table in cursor.fetchall()]
 
-    def get_columns(self, cursor):
+    def get_columns(self, cursor, tables=None):
         columns = {}
+        condition, params = self.get_tables_filter('table', tables)
         cursor.execute(
             """
             SELECT
@@ -21,11 +25,12 @@ class Introspection(BaseIntrospection):
                     ELSE
                         default_expression
                 END AS column_default,
-                type LIKE 'Nullable(%%)' AS is_nullable
+                startsWith(type, 'Nullable(') AS is_nullable
             FROM system.columns
-            WHERE database = currentDatabase()
+            WHERE database = currentDatabase() AND %s
             FORMAT JSON
-        """
+        """ % condition,
+            params,
         )
         for table, column, type_, column_default, column_is_nullable in cursor.fetchall():
             columns.setdefault(table, []).append(
@@ -39,5 +44,25 @@ class Introspection(BaseIntrospection):
             )
         return columns
 
-    def get_constraints(self, cursor):
-        return {}
+    def get_tables_filter(self, column, tables):
+        # clickhouse_driver takes named parameters only, tuples are substituted as lists of values
+        if not tables:
+            return super().get_tables_filter(column, tables)
+        return '%s IN %%(tables)s' % column, {'tables': tuple(tables)}
+
+    def get_change_markers(self, cursor):
+        cursor.execute(
+            'SELECT name, toString(metadata_modification_time) FROM system.tables WHERE database = currentDatabase()'
+        )
+        return dict(cursor.fetchall())
+
+    def get_table_statistics(self, cursor, table):
+        cursor.execute(
+            'SELECT total_rows, sampling_key FROM system.tables WHERE database = currentDatabase() AND name = %(name)s',
+            {'name': table},
+        )
+        rows = cursor.fetchall()
+        if not rows:
+            return {'rows': None}
+        # SAMPLE clause is allowed for tables with sampling key only
+        return {'rows': rows[0][0], 'sampling': bool(rows[0][1])}
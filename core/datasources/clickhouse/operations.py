@@ -0,0 +1,24 @@
+from typing import Optional
+
+from core.datasources.base.operations import Operations as BaseOperations
+
+
+class Operations(BaseOperations):
+
+    # there are no transactions
+    supports_savepoints = False
+
+    def estimate_rows(self, cursor, query: str) -> Optional[int]:
+        # rows to be read from tables, the upper bound of plain reads result
+        cursor.execute('EXPLAIN ESTIMATE %s' % query)
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return sum(int(row['rows']) for row in rows) if rows else None
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        # LIMIT alone reads the first granules only, so tables without sampling key are fast to read as is
+        if not statistics.get('sampling') or self.get_sample_percent(limit, statistics) is None:
+            return None
+        return 'SELECT * FROM %s SAMPLE %d ORDER BY rand() LIMIT %d' % (
+            self.quote_name(table), limit * self.sample_oversampling, limit
+        )
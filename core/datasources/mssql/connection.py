@@ -1,6 +1,9 @@
+import math
+
 import pymssql
 
 from core.datasources.base.connection import Connection as BaseConnection
+from core.datasources.mssql.cursor import Cursor
 
 
 __all__ = ['Connection', 'Error']
@@ -11,5 +14,41 @@ Error = pymssql.Error
 
 class Connection(BaseConnection):
 
-    def __init__(self, *args, **kwargs):
+    cursor_cls = Cursor
+
+    def __init__(self, *args, statement_timeout=None, **kwargs):
         self._conn = pymssql.connect(*args, **kwargs)
+        self._connect_args = (args, kwargs)
+        cursor = self._conn.cursor()
+        cursor.execute('SELECT @@SPID')
+        self._spid = cursor.fetchone()[0]
+        cursor.close()
+        self.init_statement_timeout(statement_timeout)
+
+    def set_statement_timeout(self, timeout):
+        # server has no statement deadline, lock waits are bounded there and the query timeout of the client
+        # cancels the statement on server
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute('SET LOCK_TIMEOUT %d' % (int(timeout * 1000) if timeout else -1))
+        finally:
+            cursor.close()
+        self._conn._conn.query_timeout = math.ceil(timeout) if timeout else 0
+        super().set_statement_timeout(timeout)
+
+    def server_side_cursor(self, itersize):
+        # tuple rows are read from TDS stream one by one while fetching
+        cursor = self._conn.cursor(as_dict=False)
+        cursor.arraysize = itersize
+        return self.wrap_cursor(cursor)
+
+    def cancel(self):
+        # the session is killed from a separate connection, pool health check drops it afterwards
+        args, kwargs = self._connect_args
+        conn = pymssql.connect(*args, **kwargs)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('KILL %d' % self._spid)
+            cursor.close()
+        finally:
+            conn.close()
@@ -1,5 +1,14 @@
+import pymssql
+
+from core.datasources.base import types
 from core.datasources.base.cursor import Cursor as BaseCursor
 
 
 class Cursor(BaseCursor):
-    pass
+
+    # NUMBER and DATETIME type codes are shared by integer/float and date/datetime columns
+    type_map = {
+        pymssql.STRING.value: types.STRING,
+        pymssql.BINARY.value: types.BINARY,
+        pymssql.DECIMAL.value: types.DECIMAL,
+    }
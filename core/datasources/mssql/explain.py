@@ -0,0 +1,64 @@
+from xml.etree import ElementTree
+
+from core.datasources.base.explain import Explain as BaseExplain, make_node
+
+
+SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+
+
+class Explain(BaseExplain):
+
+    def get_plan(self, cursor, query, analyze=False):
+        # statements are compiled but not executed while SHOWPLAN_XML is on
+        cursor.execute('SET SHOWPLAN_XML ON')
+        try:
+            cursor.execute(query)
+            raw = cursor.fetchall()[0][0]
+        finally:
+            cursor.execute('SET SHOWPLAN_XML OFF')
+        statements = [
+            self.make_statement_node(statement)
+            for statement in ElementTree.fromstring(raw).iter()
+            if statement.tag in (SHOWPLAN_NS + 'StmtSimple', SHOWPLAN_NS + 'StmtCond')
+        ]
+        return raw, statements[0] if len(statements) == 1 else make_node('Batch', children=statements)
+
+    def make_statement_node(self, statement) -> dict:
+        return make_node(
+            statement.get('StatementType', 'Statement'),
+            estimated_rows=statement.get('StatementEstRows'),
+            cost=statement.get('StatementSubTreeCost'),
+            details={'statement': statement.get('StatementText')},
+            children=[self.make_node(rel_op) for rel_op in self.iter_nested(statement, 'RelOp')],
+        )
+
+    def make_node(self, rel_op) -> dict:
+        obj = next(self.iter_nested(rel_op, 'Object'), None)
+        object_name = None
+        if obj is not None:
+            object_name = '.'.join(
+                obj.get(key).strip('[]') for key in ('Schema', 'Table', 'Index') if obj.get(key) is not None
+            )
+        return make_node(
+            rel_op.get('PhysicalOp'),
+            object_name=object_name,
+            estimated_rows=rel_op.get('EstimateRows'),
+            cost=rel_op.get('EstimatedTotalSubtreeCost'),
+            details={
+                'logical_op': rel_op.get('LogicalOp'),
+                'estimate_io': rel_op.get('EstimateIO'),
+                'estimate_cpu': rel_op.get('EstimateCPU'),
+                'parallel': rel_op.get('Parallel'),
+            },
+            children=[self.make_node(child) for child in self.iter_nested(rel_op, 'RelOp')],
+        )
+
+    def iter_nested(self, element, tag: str):
+        """
+        Iterate the closest descendants with tag, not looking into nested operators.
+        """
+        for child in element:
+            if child.tag == SHOWPLAN_NS + tag:
+                yield child
+            elif child.tag != SHOWPLAN_NS + 'RelOp':
+                yield from self.iter_nested(child, tag)
@@ -3,20 +3,25 @@ from core.datasources.base.introspection import Introspection as BaseIntrospecti
 
 class Introspection(BaseIntrospection):
 
-    def get_tables(self, cursor):
+    constraint_parts = ('get_key_constraints', 'get_checks', 'get_indexes')
+
+    def get_tables(self, cursor, tables=None):
+        condition, params = self.get_tables_filter('TABLE_NAME', tables)
         cursor.execute(
             """
             SELECT
                 TABLE_NAME
             FROM INFORMATION_SCHEMA.TABLES
-            WHERE TABLE_SCHEMA = SCHEMA_NAME()
+            WHERE TABLE_SCHEMA = SCHEMA_NAME() AND %s
             ORDER BY TABLE_NAME
-        """
+        """ % condition,
+            params,
         )
         return [{'name': table[0], 'entity': 'table'} for table in cursor.fetchall()]
 
-    def get_columns(self, cursor):
+    def get_columns(self, cursor, tables=None):
         columns = {}
+        condition, params = self.get_tables_filter('table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -30,8 +35,9 @@ class Introspection(BaseIntrospection):
                 column_default,
                 IIF(is_nullable = 'NO', 0, 1)
             FROM information_schema.columns
-            WHERE table_schema = schema_name();
-        """
+            WHERE table_schema = schema_name() AND %s;
+        """ % condition,
+            params,
         )
         for table, column, type_, column_default, column_is_nullable in cursor.fetchall():
             columns.setdefault(table, []).append(
@@ -45,8 +51,9 @@ class Introspection(BaseIntrospection):
             )
         return columns
 
-    def get_constraints(self, cursor):
+    def get_key_constraints(self, cursor, tables=None):
         constraints = {}
+        condition, params = self.get_tables_filter('kc.table_name', tables)
         # get PKs, FKs, and uniques, but not CHECK
         cursor.execute(
             """
@@ -97,11 +104,13 @@ class Introspection(BaseIntrospection):
                 kc.table_name = fk.table_name AND
                 kc.column_name = fk.column_name
             WHERE
-                kc.table_schema = SCHEMA_NAME()
+                kc.table_schema = SCHEMA_NAME() AND
+                %s
             ORDER BY
                 kc.constraint_name,
                 kc.ordinal_position
-        """
+        """ % condition,
+            params,
         )
         for table, constraint, column, kind, ref_table, ref_column in cursor.fetchall():
             # If we're the first column, make the record
@@ -120,6 +129,11 @@ class Introspection(BaseIntrospection):
             )
             # Record the details
             constraints[table][constraint]['columns'].append(column)
+        return constraints
+
+    def get_checks(self, cursor, tables=None):
+        checks = {}
+        condition, params = self.get_tables_filter('kc.table_name', tables)
         # get CHECK constraint columns
         cursor.execute(
             """
@@ -135,12 +149,14 @@ class Introspection(BaseIntrospection):
                 kc.constraint_name = c.constraint_name
             WHERE
                 c.constraint_type = 'CHECK' AND
-                kc.table_schema = SCHEMA_NAME()
-        """
+                kc.table_schema = SCHEMA_NAME() AND
+                %s
+        """ % condition,
+            params,
         )
         for table, constraint, column in cursor.fetchall():
             # If we're the first column, make the record
-            constraints.setdefault(table, {}).setdefault(
+            checks.setdefault(table, {}).setdefault(
                 constraint,
                 {
                     'columns': [],
@@ -154,8 +170,13 @@ class Introspection(BaseIntrospection):
                 },
             )
             # record the details
-            constraints[table][constraint]['columns'].append(column)
+            checks[table][constraint]['columns'].append(column)
+        return checks
+
+    def get_indexes(self, cursor, tables=None):
+        indexes = {}
         # get indexes
+        condition, params = self.get_tables_filter('t.name', tables)
         cursor.execute(
             """
             SELECT
@@ -183,14 +204,16 @@ class Introspection(BaseIntrospection):
                 ic.object_id = c.object_id AND
                 ic.column_id = c.column_id
             WHERE
-                t.schema_id = SCHEMA_ID()
+                t.schema_id = SCHEMA_ID() AND
+                %s
             ORDER BY
                 i.index_id,
                 ic.index_column_id
-        """
+        """ % condition,
+            params,
         )
         for table, index, unique, primary, type_, desc, order, column in cursor.fetchall():
-            constraints.setdefault(table, {}).setdefault(
+            indexes.setdefault(table, {}).setdefault(
                 index,
                 {
                     'columns': [],
@@ -205,10 +228,46 @@ class Introspection(BaseIntrospection):
                 },
             )
             # record the details
-            constraints[table][index]['columns'].append(column)
-            constraints[table][index]['orders'].append('DESC' if order == 1 else 'ASC')
+            indexes[table][index]['columns'].append(column)
+            indexes[table][index]['orders'].append('DESC' if order == 1 else 'ASC')
+        return indexes
 
-        for table in constraints:
-            constraints[table] = [{'name': k, **v} for k, v in constraints[table].items()]
+    def merge_constraints(self, parts):
+        # columns of indexes backing key constraints are recorded on the constraints of the same name
+        constraints = {}
+        for part in parts:
+            for table, entries in part.items():
+                for name, entry in entries.items():
+                    constraint = constraints.setdefault(table, {}).setdefault(name, entry)
+                    if constraint is not entry:
+                        constraint['columns'] += entry['columns']
+                        constraint['orders'] += entry['orders']
+        return super().merge_constraints([constraints])
 
-        return constraints
+    def get_change_markers(self, cursor):
+        # modify date of tables follows ALTER statements and index changes
+        cursor.execute(
+            """
+            SELECT
+                name,
+                CONVERT(varchar(27), modify_date, 121)
+            FROM sys.tables
+            WHERE schema_id = SCHEMA_ID()
+        """
+        )
+        return dict(cursor.fetchall())
+
+    def get_table_statistics(self, cursor, table):
+        cursor.execute(
+            """
+            SELECT
+                SUM(CASE WHEN units.type = 1 THEN partitions.rows END),
+                SUM(units.data_pages)
+            FROM sys.partitions partitions
+            JOIN sys.allocation_units units ON units.container_id = partitions.partition_id
+            WHERE partitions.object_id = OBJECT_ID(QUOTENAME(%s)) AND partitions.index_id IN (0, 1)
+        """,
+            (table, ),
+        )
+        rows = cursor.fetchall()
+        return {'rows': rows[0][0], 'pages': rows[0][1]} if rows else {'rows': None}
@@ -0,0 +1,56 @@
+import re
+from typing import List, Optional
+
+from core.datasources.base.operations import Operations as BaseOperations
+from core.sql import normalize_query
+
+
+class Operations(BaseOperations):
+
+    select_re = re.compile(r'^select(\s+(?:all|distinct))?\s+', re.I)
+    top_re = re.compile(r'^top\b', re.I)
+    est_rows_re = re.compile(r'StatementEstRows="([^"]+)"')
+    # batches separator of sqlcmd and management studio, semicolons are optional in T-SQL
+    go_re = re.compile(r'^[ \t]*go[ \t]*(?:--[^\n]*)?$', re.I | re.M)
+
+    def split_statements(self, script: str) -> List[str]:
+        return [batch.strip() for batch in self.go_re.split(script) if normalize_query(batch)]
+
+    def savepoint(self, cursor, name: str):
+        cursor.execute('SAVE TRANSACTION %s' % name)
+
+    def rollback_to_savepoint(self, cursor, name: str):
+        cursor.execute('ROLLBACK TRANSACTION %s' % name)
+
+    def release_savepoint(self, cursor, name: str):
+        # savepoints are released with the transaction
+        pass
+
+    def quote_name(self, name: str) -> str:
+        return '[%s]' % name.replace(']', ']]')
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        # TABLESAMPLE reads random pages, rows are shuffled so TOP does not prefer the first ones
+        if (percent := self.get_sample_percent(limit, statistics)) is None:
+            return None
+        return 'SELECT TOP (%d) * FROM %s TABLESAMPLE (%f PERCENT) ORDER BY NEWID()' % (
+            limit, self.quote_name(table), percent
+        )
+
+    def limit_query(self, query: str, limit: int) -> Optional[str]:
+        # ORDER BY and CTE are not allowed in derived tables, so TOP is injected into the query itself
+        query = normalize_query(query)
+        match = self.select_re.match(query)
+        if not match or self.top_re.match(query[match.end():]):
+            return None
+        return '%sTOP (%d) %s' % (query[:match.end()], limit, query[match.end():])
+
+    def estimate_rows(self, cursor, query: str) -> Optional[int]:
+        cursor.execute('SET SHOWPLAN_XML ON')
+        try:
+            cursor.execute(query)
+            plan = cursor.fetchall()[0][0]
+        finally:
+            cursor.execute('SET SHOWPLAN_XML OFF')
+        match = self.est_rows_re.search(plan)
+        return int(float(match.group(1))) if match else None
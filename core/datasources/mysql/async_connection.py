@@ -0,0 +1,80 @@
+import aiomysql
+import pymysql
+
+from core.datasources.base.connection import AsyncConnection as BaseAsyncConnection
+from core.datasources.base.cursor import AsyncCursor
+from core.sql import get_status_message
+
+
+__all__ = ['AsyncConnection', 'AsyncCursor', 'Error']
+
+
+Error = pymysql.MySQLError
+
+
+class AsyncConnection(BaseAsyncConnection):
+
+    def __init__(self, conn: aiomysql.Connection, connect_kwargs: dict):
+        self._conn = conn
+        self._connect_kwargs = connect_kwargs
+
+    @classmethod
+    async def connect(cls, *args, statement_timeout=None, database=None, **kwargs):
+        kwargs['db'] = database
+        conn = cls(await aiomysql.connect(*args, **kwargs), kwargs)
+        await conn.init_statement_timeout(statement_timeout)
+        return conn
+
+    def cursor(self):
+        return AsyncCursorContext(self._conn)
+
+    async def ping(self):
+        try:
+            await self._conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    async def terminate(self):
+        await self._conn.ensure_closed()
+
+    async def cancel(self):
+        # running statement blocks the connection, so it is killed from a separate one
+        conn = await aiomysql.connect(**self._connect_kwargs)
+        try:
+            async with conn.cursor() as cursor:
+                await cursor.execute('KILL QUERY %d' % self._conn.thread_id())
+        finally:
+            conn.close()
+
+    async def set_statement_timeout(self, timeout):
+        # applies to read only SELECT statements
+        async with self.cursor() as cursor:
+            await cursor.execute('SET SESSION max_execution_time = %s', (int(timeout * 1000) if timeout else 0, ))
+        await super().set_statement_timeout(timeout)
+
+
+class AsyncCursorContext(AsyncCursor):
+    """
+    aiomysql cursors are created by coroutine, so the cursor is created on the first call.
+    """
+
+    def __init__(self, conn: aiomysql.Connection):
+        super().__init__(None)
+        self._conn = conn
+        self._query = None
+
+    async def execute(self, query, *args, **kwargs):
+        if self._cursor is None:
+            self._cursor = await self._conn.cursor()
+        self._query = query
+        return await super().execute(query, *args, **kwargs)
+
+    @property
+    def statusmessage(self):
+        # driver reports affected rows only
+        return None if self._query is None else get_status_message(self._query, self.rowcount)
+
+    async def close(self):
+        if self._cursor is not None:
+            await self._cursor.close()
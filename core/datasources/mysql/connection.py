@@ -1,6 +1,7 @@
 import mysql.connector
 
 from core.datasources.base.connection import Connection as BaseConnection
+from core.datasources.mysql.cursor import Cursor, ServerSideCursor
 
 
 __all__ = ['Connection', 'Error']
@@ -11,5 +12,39 @@ Error = mysql.connector.Error
 
 class Connection(BaseConnection):
 
-    def __init__(self, *args, **kwargs):
+    cursor_cls = Cursor
+
+    def __init__(self, *args, statement_timeout=None, **kwargs):
         self._conn = mysql.connector.connect(*args, **kwargs)
+        self._connect_args = (args, kwargs)
+        self.init_statement_timeout(statement_timeout)
+
+    def set_statement_timeout(self, timeout):
+        # applies to read only SELECT statements
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute('SET SESSION max_execution_time = %s', (int(timeout * 1000) if timeout else 0, ))
+        finally:
+            cursor.close()
+        super().set_statement_timeout(timeout)
+
+    def server_side_cursor(self, itersize):
+        return ServerSideCursor(self._conn.cursor(buffered=False), self._conn, self.cancel)
+
+    def cancel(self):
+        # running statement blocks the connection, so it is killed from a separate one
+        args, kwargs = self._connect_args
+        conn = mysql.connector.connect(*args, **kwargs)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('KILL QUERY %d' % self._conn.connection_id)
+            cursor.close()
+        finally:
+            conn.close()
+
+    def ping(self):
+        try:
+            self._conn.ping()
+            return True
+        except Error:
+            return False
@@ -1,5 +1,60 @@
+from typing import Callable
+
+from mysql.connector import Error, FieldType
+
+from core.datasources.base import types
 from core.datasources.base.cursor import Cursor as BaseCursor
 
 
 class Cursor(BaseCursor):
-    pass
+
+    # string and blob field types are shared by text and binary columns, so they are left unknown
+    type_map = {
+        FieldType.TINY: types.INTEGER,
+        FieldType.SHORT: types.INTEGER,
+        FieldType.INT24: types.INTEGER,
+        FieldType.LONG: types.INTEGER,
+        FieldType.LONGLONG: types.INTEGER,
+        FieldType.YEAR: types.INTEGER,
+        FieldType.BIT: types.INTEGER,
+        FieldType.FLOAT: types.FLOAT,
+        FieldType.DOUBLE: types.FLOAT,
+        FieldType.DECIMAL: types.DECIMAL,
+        FieldType.NEWDECIMAL: types.DECIMAL,
+        FieldType.DATE: types.DATE,
+        FieldType.NEWDATE: types.DATE,
+        FieldType.DATETIME: types.DATETIME,
+        FieldType.TIMESTAMP: types.DATETIME,
+        # TIME values are timedelta
+        FieldType.TIME: types.INTERVAL,
+        FieldType.ENUM: types.STRING,
+        FieldType.SET: types.STRING,
+        FieldType.JSON: types.STRING,
+    }
+
+
+class ServerSideCursor(Cursor):
+    """
+    Unbuffered cursor, rows are read from server while fetching.
+    """
+
+    def __init__(self, cursor, connection, cancel: Callable):
+        super().__init__(cursor)
+        self._connection = connection
+        self._cancel = cancel
+
+    def cancel_unread(self):
+        # rows left unread would be transferred to be consumed, so the query is killed first
+        if self._connection.unread_result:
+            self._cancel()
+            try:
+                self._connection.consume_results()
+            # killed query ends with interruption error
+            except Error:
+                pass
+
+    def close(self, *args, **kwargs):
+        # rows left unread must be consumed before the connection could run next statement
+        if self._connection.unread_result:
+            self._connection.consume_results()
+        return super().close(*args, **kwargs)
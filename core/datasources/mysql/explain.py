@@ -0,0 +1,65 @@
+import json
+from typing import Optional
+
+from core.datasources.base.explain import Explain as BaseExplain, make_node
+
+
+class Explain(BaseExplain):
+
+    def get_plan(self, cursor, query, analyze=False):
+        cursor.execute('EXPLAIN FORMAT=JSON %s' % query)
+        raw = json.loads(cursor.fetchall()[0][0])
+        plan = self.make_node('query_block', raw['query_block'])
+        # query blocks have no rows estimate of their own
+        plan['estimated_rows'] = self.get_result_rows(plan)
+        return raw, plan
+
+    def get_result_rows(self, node: dict) -> Optional[float]:
+        """
+        Rows produced by node: its own estimate, or the one of the last joined table of its children.
+        Unions produce rows of all their query blocks, subquery blocks of other nodes are skipped.
+        """
+        if node['estimated_rows'] is not None:
+            return node['estimated_rows']
+        union = node['operation'] == 'union_result'
+        estimates = [
+            estimate
+            for child in node['children']
+            if union or child['operation'] != 'query_block'
+            if (estimate := self.get_result_rows(child)) is not None
+        ]
+        if not estimates:
+            return None
+        return sum(estimates) if union else estimates[-1]
+
+    def make_node(self, key: str, data: dict) -> dict:
+        """
+        Plan object values are nodes (query_block, table, ordering_operation, etc.), lists of objects
+        (nested_loop, query_specifications, attached_subqueries) contain wrappers of nodes.
+        """
+        details, children = {}, []
+        for name, value in data.items():
+            if isinstance(value, dict) and name != 'cost_info':
+                children.append(self.make_node(name, value))
+            elif isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+                nodes = [
+                    self.make_node(item_key, item_value)
+                    for item in value
+                    for item_key, item_value in item.items()
+                    if isinstance(item_value, dict)
+                ]
+                if nodes:
+                    children += nodes
+                else:
+                    details[name] = value
+            elif name not in ('cost_info', 'table_name', 'access_type', 'rows_produced_per_join'):
+                details[name] = value
+        cost_info = data.get('cost_info', {})
+        return make_node(
+            data.get('access_type', key) if key == 'table' else key,
+            object_name=data.get('table_name'),
+            estimated_rows=data.get('rows_produced_per_join'),
+            cost=cost_info.get('query_cost') or cost_info.get('prefix_cost') or cost_info.get('sort_cost'),
+            details=details,
+            children=children,
+        )
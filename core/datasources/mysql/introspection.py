@@ -3,13 +3,21 @@ from core.datasources.base.introspection import Introspection as BaseIntrospecti
 
 class Introspection(BaseIntrospection):
 
-    def get_tables(self, cursor):
-        cursor.execute('SHOW TABLES')
+    integer_types = ('tinyint', 'smallint', 'mediumint', 'int', 'bigint')
+    constraint_parts = ('get_key_constraints', 'get_indexes')
+
+    def get_tables(self, cursor, tables=None):
+        condition, params = self.get_tables_filter('table_name', tables)
+        cursor.execute(
+            'SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE() AND %s' % condition,
+            params,
+        )
         return [{'name': column[0], 'entity': 'table'} for column in sorted(cursor.fetchall())]
 
-    def get_columns(self, cursor):
+    def get_columns(self, cursor, tables=None):
         columns = {}
 
+        condition, params = self.get_tables_filter('table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -19,8 +27,9 @@ class Introspection(BaseIntrospection):
                 column_default,
                 is_nullable
             FROM information_schema.columns
-            WHERE table_schema = DATABASE()
-        """
+            WHERE table_schema = DATABASE() AND %s
+        """ % condition,
+            params,
         )
 
         for table, column, column_type, column_default, column_is_nullable in cursor.fetchall():
@@ -35,10 +44,11 @@ class Introspection(BaseIntrospection):
             )
         return columns
 
-    def get_constraints(self, cursor):
+    def get_key_constraints(self, cursor, tables=None):
 
         constraints = {}
 
+        condition, params = self.get_tables_filter('kc.table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -50,11 +60,12 @@ class Introspection(BaseIntrospection):
                 tc.constraint_type
             FROM information_schema.key_column_usage AS kc
             JOIN information_schema.table_constraints tc on tc.table_name = kc.table_name
-            WHERE kc.table_schema = DATABASE()
+            WHERE kc.table_schema = DATABASE() AND %s
             GROUP BY
                 table_name, kc.constraint_name,
                 kc.referenced_table_name, kc.referenced_column_name, tc.constraint_type;
-        """
+        """ % condition,
+            params,
         )
 
         for table, constraint, columns, ref_table, ref_column, type_ in cursor.fetchall():
@@ -70,7 +81,13 @@ class Introspection(BaseIntrospection):
                     'entity': type_.lower().replace(' ', '_'),
                 },
             )
+        return constraints
+
+    def get_indexes(self, cursor, tables=None):
 
+        indexes = {}
+
+        condition, params = self.get_tables_filter('table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -80,29 +97,70 @@ class Introspection(BaseIntrospection):
                 non_unique,
                 index_type
             FROM INFORMATION_SCHEMA.STATISTICS
-            WHERE TABLE_SCHEMA = DATABASE()
+            WHERE TABLE_SCHEMA = DATABASE() AND %s
             GROUP BY table_name, index_name, non_unique, index_type
-        """
+        """ % condition,
+            params,
         )
 
         for table, index, columns, non_unique, type_ in cursor.fetchall():
-            columns = columns.split(',')
-            constraints.setdefault(table, {}).setdefault(
-                index,
-                {
-                    'columns': columns,
-                    'is_primary_key': False,
-                    'is_unique': False,
-                    'is_check': False,
-                    'foreign_key': None,
-                    'entity': 'index',
-                },
-            )
-            constraints[table][index]['is_index'] = True
-            constraints[table][index]['type'] = 'idx' if type_ == 'BTREE' else type_.lower()
-            constraints[table][index]['columns'] = columns
+            indexes.setdefault(table, {})[index] = {
+                'columns': columns.split(','),
+                'is_primary_key': False,
+                'is_unique': False,
+                'is_check': False,
+                'foreign_key': None,
+                'entity': 'index',
+                'is_index': True,
+                'type': 'idx' if type_ == 'BTREE' else type_.lower(),
+            }
+        return indexes
 
-        for table in constraints:
-            constraints[table] = [{'name': k, **v} for k, v in constraints[table].items()]
+    def merge_constraints(self, parts):
+        # key constraints are backed by indexes of the same name, which set their index fields
+        constraints, indexes = parts
+        for table, entries in indexes.items():
+            for name, index in entries.items():
+                constraint = constraints.setdefault(table, {}).setdefault(name, index)
+                constraint.update(is_index=True, type=index['type'], columns=index['columns'])
+        return super().merge_constraints([constraints])
 
-        return constraints
+    def get_change_markers(self, cursor):
+        # ALTER TABLE rebuilding the table renews its create time, update time follows writes as well
+        cursor.execute(
+            """
+            SELECT
+                table_name,
+                CONCAT_WS(':', create_time, update_time)
+            FROM information_schema.tables
+            WHERE table_schema = DATABASE()
+        """
+        )
+        return dict(cursor.fetchall())
+
+    def get_table_statistics(self, cursor, table):
+        cursor.execute(
+            'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+            (table, ),
+        )
+        rows = cursor.fetchall()
+        statistics = {'rows': rows[0][0] if rows else None}
+        cursor.execute(
+            """
+            SELECT
+                column_name,
+                data_type
+            FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_key = 'PRI'
+        """,
+            (table, ),
+        )
+        primary_key = cursor.fetchall()
+        # range of single integer primary key, min and max are read from the index ends
+        if len(primary_key) == 1 and primary_key[0][1] in self.integer_types:
+            column = primary_key[0][0]
+            quoted_column, quoted_table = ('`%s`' % name.replace('`', '``') for name in (column, table))
+            cursor.execute('SELECT MIN(%s), MAX(%s) FROM %s' % (quoted_column, quoted_column, quoted_table))
+            statistics['primary_key'] = column
+            statistics['min'], statistics['max'] = cursor.fetchall()[0]
+        return statistics
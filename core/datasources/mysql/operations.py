@@ -0,0 +1,55 @@
+import math
+import random
+import re
+from typing import List, Optional
+
+from core.datasources.base.operations import Operations as BaseOperations
+from core.sql import split_statements
+
+
+class Operations(BaseOperations):
+
+    identifier_quote = '`'
+    # primary key ranges read by sampled reads
+    sample_chunks = 10
+    # backslash escapes are allowed in literals
+    quote_patterns = (r"'(?:[^'\\]|\\.|'')*'", r'"(?:[^"\\]|\\.|"")*"', r'`[^`]*`')
+    # mysql client command changing statements delimiter, used for routines bodies
+    delimiter_re = re.compile(r'^[ \t]*delimiter[ \t]+(\S+)[ \t]*$', re.I | re.M)
+
+    def split_statements(self, script: str) -> List[str]:
+        statements, delimiter, start = [], ';', 0
+        for match in self.delimiter_re.finditer(script):
+            statements += split_statements(script[start:match.start()], delimiter, self.quote_patterns)
+            delimiter, start = match.group(1), match.end()
+        return statements + split_statements(script[start:], delimiter, self.quote_patterns)
+
+    def estimate_rows(self, cursor, query: str) -> Optional[int]:
+        cursor.execute('EXPLAIN %s' % query)
+        columns = [c[0] for c in cursor.description]
+        estimate = None
+        # joined tables estimates are multiplied as the optimizer does
+        for row in cursor.fetchall():
+            row = dict(zip(columns, row))
+            if row.get('rows') is None:
+                continue
+            estimate = (estimate or 1) * int(row['rows']) * float(row.get('filtered') or 100) / 100
+        return None if estimate is None else int(estimate)
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        """
+        Read short primary key ranges starting at random keys, every range is an index range scan.
+        Ranges could overlap on sparse keys, so some rows might be repeated.
+        """
+        if statistics.get('primary_key') is None or statistics.get('min') is None:
+            return None
+        if self.get_sample_percent(limit, statistics) is None:
+            return None
+        chunks = min(self.sample_chunks, limit)
+        chunk_size = math.ceil(limit / chunks)
+        table, key = self.quote_name(table), self.quote_name(statistics['primary_key'])
+        starts = sorted(random.randint(statistics['min'], statistics['max']) for _ in range(chunks))
+        return ' UNION ALL '.join(
+            '(SELECT * FROM %s WHERE %s >= %d ORDER BY %s LIMIT %d)' % (table, key, start, key, chunk_size)
+            for start in starts
+        )
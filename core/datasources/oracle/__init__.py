@@ -1,7 +1,9 @@
 from .connection import Connection, Error
 from .cursor import Cursor
+from .explain import Explain
 from .introspection import Introspection
+from .operations import Operations
 from .schema import ConnectionParams
 
 
-__all__ = ['Connection', 'Cursor', 'Introspection', 'ConnectionParams', 'Error']
\ No newline at end of file
+__all__ = ['Connection', 'Cursor', 'Introspection', 'Explain', 'Operations', 'ConnectionParams', 'Error']
\ No newline at end of file
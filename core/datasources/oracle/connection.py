@@ -1,6 +1,7 @@
 import cx_Oracle
 
 from core.datasources.base.connection import Connection as BaseConnection
+from core.datasources.oracle.cursor import Cursor
 
 
 __all__ = ['Connection', 'Error']
@@ -11,6 +12,31 @@ Error = cx_Oracle.Error
 
 class Connection(BaseConnection):
 
-    def __init__(self, *args, **kwargs):
+    cursor_cls = Cursor
+    supports_wire_format = True
+
+    def __init__(self, *args, statement_timeout=None, **kwargs):
         dsn = cx_Oracle.makedsn(kwargs.pop('host'), int(kwargs.pop('port')), kwargs.pop('database'))
         self._conn = cx_Oracle.connect(*args, **kwargs, dsn=dsn)
+        self.init_statement_timeout(statement_timeout)
+
+    def set_statement_timeout(self, timeout):
+        # round trip deadline, the call is interrupted on server when it passes
+        self._conn.callTimeout = int(timeout * 1000) if timeout else 0
+        super().set_statement_timeout(timeout)
+
+    def server_side_cursor(self, itersize):
+        cursor = self._conn.cursor()
+        cursor.arraysize = itersize
+        cursor.prefetchrows = itersize
+        return self.wrap_cursor(cursor)
+
+    def cancel(self):
+        self._conn.cancel()
+
+    def ping(self):
+        try:
+            self._conn.ping()
+            return True
+        except Error:
+            return False
@@ -1,5 +1,61 @@
+import cx_Oracle
+
+from core.config import settings
+from core.datasources.base import types
 from core.datasources.base.cursor import Cursor as BaseCursor
 
 
 class Cursor(BaseCursor):
-    pass
+
+    # NUMBER values are int or float depending on precision and scale, they are typed by get_column_type
+    type_map = {
+        cx_Oracle.DB_TYPE_BOOLEAN: types.BOOLEAN,
+        cx_Oracle.DB_TYPE_BINARY_INTEGER: types.INTEGER,
+        cx_Oracle.DB_TYPE_BINARY_FLOAT: types.FLOAT,
+        cx_Oracle.DB_TYPE_BINARY_DOUBLE: types.FLOAT,
+        cx_Oracle.DB_TYPE_CHAR: types.STRING,
+        cx_Oracle.DB_TYPE_NCHAR: types.STRING,
+        cx_Oracle.DB_TYPE_VARCHAR: types.STRING,
+        cx_Oracle.DB_TYPE_NVARCHAR: types.STRING,
+        cx_Oracle.DB_TYPE_LONG: types.STRING,
+        cx_Oracle.DB_TYPE_ROWID: types.STRING,
+        cx_Oracle.DB_TYPE_RAW: types.BINARY,
+        cx_Oracle.DB_TYPE_LONG_RAW: types.BINARY,
+        cx_Oracle.DB_TYPE_DATE: types.DATETIME,
+        cx_Oracle.DB_TYPE_TIMESTAMP: types.DATETIME,
+        cx_Oracle.DB_TYPE_TIMESTAMP_TZ: types.DATETIME,
+        cx_Oracle.DB_TYPE_TIMESTAMP_LTZ: types.DATETIME,
+        cx_Oracle.DB_TYPE_INTERVAL_DS: types.INTERVAL,
+    }
+
+    def get_column_type(self, column):
+        if column[1] != cx_Oracle.DB_TYPE_NUMBER:
+            return super().get_column_type(column)
+        precision, scale = column[4] or 0, column[5]
+        if scale == 0 and 0 < precision <= 18:
+            return types.INTEGER
+        # output type handler of wire format fetches the other ones as strings
+        if self.wire_format:
+            return types.STRING
+        # wider integers are left unknown, the rest are floats, or floats and ints without declared precision
+        return None if scale == 0 and precision > 18 else types.FLOAT
+
+    def set_wire_format(self):
+        self._cursor.outputtypehandler = wire_output_type_handler
+        self.wire_format = True
+
+
+def wire_output_type_handler(cursor, name, default_type, size, precision, scale):
+    """
+    Fetch NUMBER values other than integers fitting in 64 bits as strings, LOBs inline instead of locators
+    read by a round trip each. Inline LOBs are capped by WIRE_LOB_MAX_BYTES, a larger value fails the fetch
+    instead of being buffered whole. DATE and TIMESTAMP values are left as datetimes,
+    their text depends on NLS formats of the session shared with user queries.
+    """
+    if default_type == cx_Oracle.DB_TYPE_NUMBER and not (scale == 0 and 0 < precision <= 18):
+        return cursor.var(str, 255, arraysize=cursor.arraysize)
+    if default_type in (cx_Oracle.DB_TYPE_CLOB, cx_Oracle.DB_TYPE_NCLOB):
+        return cursor.var(cx_Oracle.DB_TYPE_LONG, settings.WIRE_LOB_MAX_BYTES, arraysize=cursor.arraysize)
+    if default_type == cx_Oracle.DB_TYPE_BLOB:
+        return cursor.var(cx_Oracle.DB_TYPE_LONG_RAW, settings.WIRE_LOB_MAX_BYTES, arraysize=cursor.arraysize)
+    return None
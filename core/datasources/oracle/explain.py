@@ -0,0 +1,56 @@
+import uuid
+
+from core.datasources.base.explain import Explain as BaseExplain, make_node
+
+
+class Explain(BaseExplain):
+
+    def get_plan(self, cursor, query, analyze=False):
+        statement_id = uuid.uuid4().hex[:30]
+        cursor.execute("EXPLAIN PLAN SET STATEMENT_ID = '%s' FOR %s" % (statement_id, query))
+        try:
+            cursor.execute(
+                """
+                SELECT
+                    id,
+                    parent_id,
+                    operation,
+                    options,
+                    object_owner,
+                    object_name,
+                    cardinality,
+                    cost,
+                    bytes,
+                    access_predicates,
+                    filter_predicates
+                FROM plan_table
+                WHERE statement_id = :id
+                ORDER BY id
+            """,
+                id=statement_id,
+            )
+            columns = [c[0].lower() for c in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            # formatted plan as shown by SQL*Plus
+            cursor.execute(
+                "SELECT plan_table_output FROM TABLE(DBMS_XPLAN.DISPLAY('PLAN_TABLE', :id))", id=statement_id
+            )
+            raw = '\n'.join(row[0] or '' for row in cursor.fetchall())
+        finally:
+            cursor.execute('DELETE FROM plan_table WHERE statement_id = :id', id=statement_id)
+        nodes = {}
+        for row in rows:
+            nodes[row['id']] = make_node(
+                ' '.join(value for value in (row['operation'], row['options']) if value),
+                object_name='.'.join(value for value in (row['object_owner'], row['object_name']) if value) or None,
+                estimated_rows=row['cardinality'],
+                cost=row['cost'],
+                details={
+                    'bytes': row['bytes'],
+                    'access_predicates': row['access_predicates'],
+                    'filter_predicates': row['filter_predicates'],
+                },
+            )
+            if row['parent_id'] is not None:
+                nodes[row['parent_id']]['children'].append(nodes[row['id']])
+        return raw, nodes[0]
@@ -3,12 +3,16 @@ from core.datasources.base.introspection import Introspection as BaseIntrospecti
 
 class Introspection(BaseIntrospection):
 
-    def get_tables(self, cursor):
-        cursor.execute('SELECT table_name FROM user_tables ORDER BY table_name')
+    constraint_parts = ('get_key_constraints', 'get_foreign_keys', 'get_indexes')
+
+    def get_tables(self, cursor, tables=None):
+        condition, params = self.get_tables_filter('table_name', tables)
+        cursor.execute('SELECT table_name FROM user_tables WHERE %s ORDER BY table_name' % condition, params)
         return [{'name': table[0], 'entity': 'table'} for table in cursor.fetchall()]
 
-    def get_columns(self, cursor):
+    def get_columns(self, cursor, tables=None):
         columns = {}
+        condition, params = self.get_tables_filter('table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -18,7 +22,9 @@ class Introspection(BaseIntrospection):
                 CASE WHEN nullable = 'Y' THEN 1 ELSE 0 END,
                 data_default
             FROM user_tab_columns
-        """
+            WHERE %s
+        """ % condition,
+            params,
         )
         for table, column, type_, column_is_nullable, column_default in cursor.fetchall():
             columns.setdefault(table, []).append(
@@ -32,8 +38,9 @@ class Introspection(BaseIntrospection):
             )
         return columns
 
-    def get_constraints(self, cursor):
+    def get_key_constraints(self, cursor, tables=None):
         constraints = {}
+        condition, params = self.get_tables_filter('cons.table_name', tables)
         # Loop over the constraints, getting PKs and uniques
         cursor.execute(
             """
@@ -52,9 +59,10 @@ class Introspection(BaseIntrospection):
             LEFT OUTER JOIN
                 user_cons_columns cols ON cons.constraint_name = cols.constraint_name
             WHERE
-                cons.constraint_type = ANY('P', 'U')
+                cons.constraint_type = ANY('P', 'U') AND %s
             GROUP BY cons.table_name, cons.constraint_name, cons.constraint_type
-        """
+        """ % condition,
+            params,
         )
         for table, constraint, columns, pk, unique in cursor.fetchall():
             constraints.setdefault(table, {}).setdefault(
@@ -68,6 +76,11 @@ class Introspection(BaseIntrospection):
                     'entity': 'primary_key' if pk else 'unique',
                 },
             )
+        return constraints
+
+    def get_foreign_keys(self, cursor, tables=None):
+        foreign_keys = {}
+        condition, params = self.get_tables_filter('cons.table_name', tables)
         # Foreign key constraints
         cursor.execute(
             """
@@ -87,12 +100,13 @@ class Introspection(BaseIntrospection):
             LEFT OUTER JOIN
                 user_cons_columns cols ON cons.constraint_name = cols.constraint_name
             WHERE
-                cons.constraint_type = 'R'
+                cons.constraint_type = 'R' AND %s
             GROUP BY cons.table_name, cons.constraint_name, rcols.table_name, rcols.column_name
-        """
+        """ % condition,
+            params,
         )
         for table, constraint, columns, other_table, other_column in cursor.fetchall():
-            constraints.setdefault(table, {})[constraint] = {
+            foreign_keys.setdefault(table, {})[constraint] = {
                 'is_primary_key': False,
                 'is_unique': False,
                 'foreign_key': (other_table, other_column),
@@ -100,7 +114,12 @@ class Introspection(BaseIntrospection):
                 'columns': columns.split(','),
                 'entity': 'foreign_key',
             }
+        return foreign_keys
+
+    def get_indexes(self, cursor, tables=None):
+        indexes = {}
         # Now get indexes
+        condition, params = self.get_tables_filter('cols.table_name', tables)
         cursor.execute(
             """
             SELECT
@@ -118,12 +137,13 @@ class Introspection(BaseIntrospection):
                     SELECT 1
                     FROM user_constraints cons
                     WHERE ind.index_name = cons.index_name
-                ) AND cols.index_name = ind.index_name
+                ) AND cols.index_name = ind.index_name AND %s
             GROUP BY cols.table_name, ind.index_name, ind.index_type
-        """
+        """ % condition,
+            params,
         )
         for table, constraint, type_, columns, orders in cursor.fetchall():
-            constraints.setdefault(table, {})[constraint] = {
+            indexes.setdefault(table, {})[constraint] = {
                 'is_primary_key': False,
                 'is_unique': False,
                 'foreign_key': None,
@@ -133,8 +153,36 @@ class Introspection(BaseIntrospection):
                 'orders': orders.split(','),
                 'entity': 'index',
             }
+        return indexes
 
-        for table in constraints:
-            constraints[table] = [{'name': k, **v} for k, v in constraints[table].items()]
+    def merge_constraints(self, parts):
+        # later parts replace constraints of the same name
+        constraints = {}
+        for part in parts:
+            for table, entries in part.items():
+                constraints.setdefault(table, {}).update(entries)
+        return super().merge_constraints([constraints])
 
-        return constraints
+    def get_tables_filter(self, column, tables):
+        # cx_Oracle binds positional parameters by number
+        if not tables:
+            return super().get_tables_filter(column, tables)
+        return '%s IN (%s)' % (column, ', '.join(':%d' % i for i in range(1, len(tables) + 1))), tuple(tables)
+
+    def get_change_markers(self, cursor):
+        cursor.execute(
+            """
+            SELECT
+                object_name,
+                TO_CHAR(last_ddl_time, 'YYYY-MM-DD HH24:MI:SS')
+            FROM user_objects
+            WHERE object_type = 'TABLE'
+        """
+        )
+        return dict(cursor.fetchall())
+
+    def get_table_statistics(self, cursor, table):
+        # num_rows is kept by optimizer statistics gathering
+        cursor.execute('SELECT num_rows, blocks FROM user_tables WHERE table_name = :name', name=table)
+        rows = cursor.fetchall()
+        return {'rows': rows[0][0], 'pages': rows[0][1]} if rows else {'rows': None}
@@ -0,0 +1,60 @@
+import re
+import uuid
+from typing import List, Optional
+
+from core.datasources.base.operations import Operations as BaseOperations
+from core.sql import iter_statements, normalize_query
+
+
+class Operations(BaseOperations):
+
+    # PL/SQL blocks contain semicolons, so they are terminated by slash line as in SQL*Plus
+    block_re = re.compile(
+        r'(?:\s|--[^\n]*|/\*.*?\*/)*(?:declare|begin|create\s+(?:or\s+replace\s+)?'
+        r'(?:(?:editionable|noneditionable)\s+)?(?:procedure|function|package|trigger|type))\b',
+        re.I | re.S,
+    )
+    slash_re = re.compile(r'^[ \t]*/[ \t]*$', re.M)
+
+    def split_statements(self, script: str) -> List[str]:
+        statements, position = [], 0
+        while position < len(script):
+            if self.block_re.match(script, position):
+                match = self.slash_re.search(script, position)
+                end = match.start() if match else len(script)
+                statements.append(script[position:end].strip())
+                position = match.end() if match else len(script)
+                continue
+            statement, offset = next(iter_statements(script[position:]), (None, None))
+            if statement is None:
+                break
+            statements.append(statement)
+            position += offset
+        return [statement for statement in statements if normalize_query(statement)]
+
+    def release_savepoint(self, cursor, name: str):
+        # savepoints are released with the transaction
+        pass
+
+    def limit_query(self, query: str, limit: int) -> Optional[str]:
+        # ROWNUM is used instead of FETCH FIRST to support Oracle versions before 12c
+        return 'SELECT * FROM (%s) WHERE ROWNUM <= %d' % (normalize_query(query), limit)
+
+    def estimate_rows(self, cursor, query: str) -> Optional[int]:
+        statement_id = uuid.uuid4().hex[:30]
+        cursor.execute("EXPLAIN PLAN SET STATEMENT_ID = '%s' FOR %s" % (statement_id, query))
+        try:
+            cursor.execute('SELECT cardinality FROM plan_table WHERE statement_id = :id AND id = 0', id=statement_id)
+            rows = cursor.fetchall()
+        finally:
+            cursor.execute('DELETE FROM plan_table WHERE statement_id = :id', id=statement_id)
+        return int(rows[0][0]) if rows and rows[0][0] is not None else None
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        # block sampling reads the sampled blocks only, sample percent must be below 100
+        percent = self.get_sample_percent(limit, statistics)
+        if percent is None or percent >= 100:
+            return None
+        return 'SELECT * FROM (SELECT * FROM %s SAMPLE BLOCK (%f) ORDER BY dbms_random.value) WHERE ROWNUM <= %d' % (
+            self.quote_name(table), percent, limit
+        )
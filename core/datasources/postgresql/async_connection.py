@@ -0,0 +1,113 @@
+import asyncpg
+
+from core.datasources.base.connection import AsyncConnection as BaseAsyncConnection
+from core.datasources.base.cursor import AsyncCursor as BaseAsyncCursor
+
+
+__all__ = ['AsyncConnection', 'AsyncCursor', 'Error']
+
+
+# connection failures are not wrapped by asyncpg
+Error = (asyncpg.PostgresError, asyncpg.InterfaceError, OSError)
+
+
+class AsyncCursor(BaseAsyncCursor):
+    """
+    asyncpg has no cursors, statement rows are fetched on execute and read by fetch methods.
+    """
+
+    def __init__(self, connection: 'AsyncConnection'):
+        super().__init__(None)
+        self._connection = connection
+        self._description = None
+        self._rows = []
+        self._status = None
+
+    async def execute(self, query, *args):
+        await self._connection.begin()
+        statement = await self._connection._conn.prepare(query)
+        rows = await statement.fetch(*args)
+        attributes = statement.get_attributes()
+        self._description = [(a.name, a.type.oid, None, None, None, None, None) for a in attributes] or None
+        self._rows = [tuple(row) for row in rows]
+        self._status = statement.get_statusmsg()
+
+    async def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    async def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    @property
+    def description(self):
+        return self._description
+
+    @property
+    def rowcount(self):
+        # status message ends with affected rows count, e.g. INSERT 0 1
+        count = (self._status or '').rsplit(' ', 1)[-1]
+        return int(count) if count.isdigit() else None
+
+    @property
+    def statusmessage(self):
+        return self._status
+
+    async def close(self):
+        self._rows = []
+
+
+class AsyncConnection(BaseAsyncConnection):
+
+    def __init__(self, conn: asyncpg.Connection, connect_kwargs: dict):
+        self._conn = conn
+        self._connect_kwargs = connect_kwargs
+        # asyncpg runs in autocommit mode, so transaction is started explicitly as DB-API drivers do
+        self._transaction = None
+
+    @classmethod
+    async def connect(cls, *args, statement_timeout=None, **kwargs):
+        conn = cls(await asyncpg.connect(*args, **kwargs), kwargs)
+        await conn.init_statement_timeout(statement_timeout)
+        return conn
+
+    async def begin(self):
+        if self._transaction is None:
+            self._transaction = self._conn.transaction()
+            await self._transaction.start()
+
+    async def commit(self):
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            await transaction.commit()
+
+    async def rollback(self):
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            await transaction.rollback()
+
+    def cursor(self):
+        return AsyncCursor(self)
+
+    async def ping(self):
+        try:
+            await self._conn.fetchval(self.ping_query)
+            return True
+        except Exception:
+            return False
+
+    async def terminate(self):
+        await self._conn.close()
+
+    async def cancel(self):
+        conn = await asyncpg.connect(**self._connect_kwargs)
+        try:
+            await conn.execute('SELECT pg_cancel_backend($1)', self._conn.get_server_pid())
+        finally:
+            await conn.close()
+
+    async def set_statement_timeout(self, timeout):
+        # run outside of transaction, so rollback on release keeps the setting
+        await self._conn.execute('SET statement_timeout = %d' % (int(timeout * 1000) if timeout else 0))
+        await super().set_statement_timeout(timeout)
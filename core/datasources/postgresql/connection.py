@@ -1,6 +1,9 @@
+import uuid
+
 import psycopg2
 
 from core.datasources.base.connection import Connection as BaseConnection
+from core.datasources.postgresql.cursor import Cursor, ServerSideCursor
 
 
 __all__ = ['Connection', 'Error']
@@ -11,6 +14,24 @@ Error = psycopg2.Error
 
 class Connection(BaseConnection):
 
-    def __init__(self, *args, **kwargs):
-        self._conn = psycopg2.connect(*args, **kwargs)
+    cursor_cls = Cursor
+    supports_wire_format = True
 
+    def __init__(self, *args, statement_timeout=None, **kwargs):
+        self._conn = psycopg2.connect(*args, **kwargs)
+        self.init_statement_timeout(statement_timeout)
+
+    def set_statement_timeout(self, timeout):
+        # committed, so rollback on release keeps the setting
+        with self._conn.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', (int(timeout * 1000) if timeout else 0, ))
+        self._conn.commit()
+        super().set_statement_timeout(timeout)
+
+    def server_side_cursor(self, itersize):
+        cursor = self._conn.cursor(name='crossbase_%s' % uuid.uuid4().hex)
+        cursor.itersize = itersize
+        return ServerSideCursor(cursor)
+
+    def cancel(self):
+        self._conn.cancel()
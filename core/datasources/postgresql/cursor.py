@@ -1,5 +1,78 @@
+import psycopg2
+import psycopg2.extensions
+
+from core.datasources.base import types
 from core.datasources.base.cursor import Cursor as BaseCursor
 
 
 class Cursor(BaseCursor):
-    pass
+
+    # type oids
+    type_map = {
+        16: types.BOOLEAN,
+        20: types.INTEGER,
+        21: types.INTEGER,
+        23: types.INTEGER,
+        26: types.INTEGER,
+        700: types.FLOAT,
+        701: types.FLOAT,
+        1700: types.DECIMAL,
+        18: types.STRING,
+        19: types.STRING,
+        25: types.STRING,
+        1042: types.STRING,
+        1043: types.STRING,
+        17: types.BINARY,
+        1082: types.DATE,
+        1083: types.TIME,
+        1266: types.TIME,
+        1114: types.DATETIME,
+        1184: types.DATETIME,
+        1186: types.INTERVAL,
+        2950: types.UUID,
+        114: types.JSON,
+        3802: types.JSON,
+    }
+    wire_types = frozenset((types.DECIMAL, types.DATE, types.TIME, types.DATETIME, types.INTERVAL, types.UUID))
+
+    def set_wire_format(self):
+        # scoped to the cursor, so other cursors of pooled connection keep default casters
+        psycopg2.extensions.register_type(WIRE_CASTER, self._cursor)
+        self.wire_format = True
+
+
+class ServerSideCursor(Cursor):
+    """
+    Named cursor. Description of a named cursor is known only after the first fetch,
+    so the first batch is prefetched on execute.
+    """
+
+    def __init__(self, cursor):
+        super().__init__(cursor)
+        self._prefetched = []
+
+    def execute(self, *args, **kwargs):
+        ret = self._cursor.execute(*args, **kwargs)
+        self._prefetched = self._cursor.fetchmany(self._cursor.itersize)
+        return ret
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self._cursor.arraysize
+        rows = self._prefetched[:size]
+        del self._prefetched[:size]
+        if len(rows) < size:
+            rows += self._cursor.fetchmany(size - len(rows))
+        return rows
+
+    def fetchall(self):
+        rows, self._prefetched = self._prefetched, []
+        return rows + self._cursor.fetchall()
+
+
+# text of wire types values is passed through by the builtin string caster
+WIRE_CASTER = psycopg2.extensions.new_type(
+    tuple(oid for oid, column_type in Cursor.type_map.items() if column_type in Cursor.wire_types),
+    'CROSSBASE_WIRE',
+    psycopg2.STRING,
+)
@@ -0,0 +1,35 @@
+from core.datasources.base.explain import Explain as BaseExplain, make_node
+
+
+class Explain(BaseExplain):
+
+    supports_analyze = True
+    # keys moved to node fields, the rest of them are node details
+    node_keys = (
+        'Node Type', 'Relation Name', 'CTE Name', 'Function Name', 'Plan Rows', 'Total Cost',
+        'Actual Rows', 'Actual Loops', 'Actual Total Time', 'Plans',
+    )
+
+    def get_plan(self, cursor, query, analyze=False):
+        cursor.execute('EXPLAIN (FORMAT JSON%s) %s' % (', ANALYZE' if analyze else '', query))
+        raw = cursor.fetchall()[0][0]
+        return raw, self.make_node(raw[0]['Plan'])
+
+    def make_node(self, plan: dict) -> dict:
+        loops = plan.get('Actual Loops')
+        actual_rows = plan.get('Actual Rows')
+        actual_time = plan.get('Actual Total Time')
+        # actual values are per loop
+        if loops is not None:
+            actual_rows = actual_rows * loops if actual_rows is not None else None
+            actual_time = actual_time * loops if actual_time is not None else None
+        return make_node(
+            plan['Node Type'],
+            object_name=plan.get('Relation Name') or plan.get('CTE Name') or plan.get('Function Name'),
+            estimated_rows=plan.get('Plan Rows'),
+            cost=plan.get('Total Cost'),
+            actual_rows=actual_rows,
+            actual_time=actual_time,
+            details={key: value for key, value in plan.items() if key not in self.node_keys},
+            children=[self.make_node(child) for child in plan.get('Plans', [])],
+        )
@@ -3,20 +3,25 @@ from core.datasources.base.introspection import Introspection as BaseIntrospecti
 
 class Introspection(BaseIntrospection):
 
-    def get_tables(self, cursor):
+    constraint_parts = ('get_key_constraints', 'get_indexes')
+
+    def get_tables(self, cursor, tables=None):
+        condition, params = self.get_tables_filter('tablename', tables)
         cursor.execute(
             """
             SELECT
                 tablename
             FROM pg_catalog.pg_tables
-            WHERE schemaname = 'public'
+            WHERE schemaname = 'public' AND %s
             ORDER BY tablename
-        """
+        """ % condition,
+            params,
         )
         return [{'name': table[0], 'entity': 'table'} for table in cursor.fetchall()]
 
-    def get_columns(self, cursor):
+    def get_columns(self, cursor, tables=None):
         columns = {}
+        condition, params = self.get_tables_filter('tables.tablename', tables)
         cursor.execute(
             """
             SELECT
@@ -37,7 +42,9 @@ class Introspection(BaseIntrospection):
             FROM pg_catalog.pg_tables tables
             JOIN information_schema.columns columns
                 ON tables.tablename = columns.table_name AND tables.schemaname = 'public'
-        """
+            WHERE %s
+        """ % condition,
+            params,
         )
         for table, column, column_type, column_default, column_is_nullable in cursor.fetchall():
             columns.setdefault(table, []).append(
@@ -51,8 +58,9 @@ class Introspection(BaseIntrospection):
             )
         return columns
 
-    def get_constraints(self, cursor):
+    def get_key_constraints(self, cursor, tables=None):
         constraints = {}
+        condition, params = self.get_tables_filter('cl.relname', tables)
 
         cursor.execute(
             """
@@ -77,7 +85,9 @@ class Introspection(BaseIntrospection):
             FROM pg_constraint AS c
             JOIN pg_class AS cl ON c.conrelid = cl.oid
             JOIN pg_namespace AS ns ON cl.relnamespace = ns.oid AND ns.nspname = 'public'
-        """
+            WHERE %s
+        """ % condition,
+            params,
         )
 
         for table, constraint, columns, kind, foreign_key in cursor.fetchall():
@@ -93,10 +103,14 @@ class Introspection(BaseIntrospection):
                     'entity': {'p': 'primary_key', 'f': 'foreign_key', 'c': 'check', 'u': 'unique'}.get(kind, 'index'),
                 },
             )
-        # Now get indexes
+        return constraints
+
+    def get_indexes(self, cursor, tables=None):
+        indexes = {}
         # The row_number() function for ordering the index fields can be
         # replaced by WITH ORDINALITY in the unnest() functions when support
         # for PostgreSQL 9.3 is dropped.
+        condition, params = self.get_tables_filter('tablename', tables)
         cursor.execute(
             """
             SELECT
@@ -128,11 +142,13 @@ class Introspection(BaseIntrospection):
                 LEFT JOIN pg_attribute attr ON attr.attrelid = c.oid AND attr.attnum = idx.key
             ) s2
             JOIN pg_namespace AS ns ON s2.relnamespace = ns.oid AND ns.nspname = 'public'
+            WHERE %s
             GROUP BY tablename, indexname, indisunique, indisprimary, amname, exprdef, attoptions;
-        """
+        """ % condition,
+            params,
         )
         for table, index, columns, unique, primary, orders, type_ in cursor.fetchall():
-            constraints.setdefault(table, {}).setdefault(
+            indexes.setdefault(table, {}).setdefault(
                 index,
                 {
                     'columns': columns if columns != [None] else [],
@@ -145,8 +161,35 @@ class Introspection(BaseIntrospection):
                     'entity': 'index',
                 },
             )
+        return indexes
 
-        for table in constraints:
-            constraints[table] = [{'name': k, **v} for k, v in constraints[table].items()]
+    def get_change_markers(self, cursor):
+        # DDL rewrites catalog rows of the table, its columns, constraints and indexes, which changes their xmin,
+        # counts catch dropped rows
+        cursor.execute(
+            """
+            SELECT
+                cl.relname,
+                concat_ws(
+                    ':',
+                    cl.xmin,
+                    (SELECT count(*) || '-' || max(xmin::text::bigint) FROM pg_attribute WHERE attrelid = cl.oid),
+                    (SELECT count(*) || '-' || max(xmin::text::bigint) FROM pg_constraint WHERE conrelid = cl.oid),
+                    (SELECT count(*) || '-' || max(xmin::text::bigint) FROM pg_index WHERE indrelid = cl.oid)
+                )
+            FROM pg_class cl
+            JOIN pg_namespace ns ON cl.relnamespace = ns.oid AND ns.nspname = 'public'
+            WHERE cl.relkind IN ('r', 'p')
+        """
+        )
+        return dict(cursor.fetchall())
 
-        return constraints
+    def get_table_statistics(self, cursor, table):
+        # reltuples is updated by VACUUM and ANALYZE, it is negative or zero for tables never analyzed
+        cursor.execute(
+            'SELECT reltuples::bigint, relpages FROM pg_class WHERE oid = to_regclass(quote_ident(%s))', (table, )
+        )
+        rows = cursor.fetchall()
+        if not rows or rows[0][0] <= 0:
+            return {'rows': None}
+        return {'rows': rows[0][0], 'pages': rows[0][1]}
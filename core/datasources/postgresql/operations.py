@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from core.datasources.base.operations import Operations as BaseOperations
+from core.sql import QUOTE_PATTERNS, split_statements
+
+
+class Operations(BaseOperations):
+
+    # function bodies are usually dollar quoted
+    quote_patterns = (r'\$(?P<tag>[A-Za-z_][A-Za-z_0-9]*|)\$.*?\$(?P=tag)\$', ) + QUOTE_PATTERNS
+
+    def split_statements(self, script: str) -> List[str]:
+        return split_statements(script, quote_patterns=self.quote_patterns)
+
+    def estimate_rows(self, cursor, query: str) -> Optional[int]:
+        cursor.execute('EXPLAIN (FORMAT JSON) %s' % query)
+        plan = cursor.fetchall()[0][0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    def sample_query(self, table: str, limit: int, statistics: dict) -> Optional[str]:
+        # SYSTEM method reads random pages, rows are shuffled so the limit does not prefer the first ones
+        if (percent := self.get_sample_percent(limit, statistics)) is None:
+            return None
+        return 'SELECT * FROM %s TABLESAMPLE SYSTEM (%f) ORDER BY random() LIMIT %d' % (
+            self.quote_name(table), percent, limit
+        )
@@ -0,0 +1,102 @@
+import hashlib
+import os
+import re
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+_range_re = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse single byte range header to inclusive (start, end) offsets.
+    Raise ValueError for unsatisfiable ranges, return None for ignored ones (e.g. multiple ranges).
+    """
+    match = _range_re.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # suffix range, the last bytes of file
+        length = int(end)
+        if not length:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """
+    File response supporting single byte range requests, so interrupted downloads could be resumed.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        range_header: Optional[str] = None,
+        if_range: Optional[str] = None,
+        filename: Optional[str] = None,
+        media_type: Optional[str] = None,
+    ):
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = '"%s"' % hashlib.md5(('%s-%s' % (stat.st_mtime, size)).encode()).hexdigest()
+        headers = {
+            'accept-ranges': 'bytes',
+            'etag': etag,
+            'last-modified': formatdate(stat.st_mtime, usegmt=True),
+        }
+        if filename:
+            headers['content-disposition'] = 'attachment; filename="%s"' % filename
+        self.path = path
+        self.start, self.end = 0, size - 1
+        status_code = 200
+        # range of a changed file is ignored
+        if range_header and (not if_range or if_range == etag or if_range == headers['last-modified']):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                byte_range = None
+                status_code = 416
+                headers['content-range'] = 'bytes */%s' % size
+                self.start, self.end = 0, -1
+            if byte_range is not None:
+                status_code = 206
+                self.start, self.end = byte_range
+                headers['content-range'] = 'bytes %s-%s/%s' % (self.start, self.end, size)
+        headers['content-length'] = str(self.end - self.start + 1)
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        remaining = self.end - self.start + 1
+        if scope['method'] == 'HEAD' or remaining <= 0:
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+        file = await run_in_threadpool(open, self.path, 'rb')
+        try:
+            await run_in_threadpool(file.seek, self.start)
+            while remaining > 0:
+                chunk = await run_in_threadpool(file.read, min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            await run_in_threadpool(file.close)
@@ -0,0 +1,40 @@
+import logging
+from typing import Optional
+
+from core.admission import Admission
+from core.utils import acquire_datasource_conn, get_engine_explain_cls
+
+
+# cost guard actions for queries exceeding data source thresholds
+REJECT = 'reject'
+QUEUE = 'queue'
+CONFIRM = 'confirm'
+ACTIONS = (REJECT, QUEUE, CONFIRM)
+
+
+def check_query_cost(
+    datasource_id: int,
+    params: dict,
+    query: str,
+    max_rows: Optional[int],
+    max_cost: Optional[float],
+    admission: Optional[Admission] = None,
+) -> Optional[str]:
+    """
+    Compare planner estimate of query rows and cost to thresholds, return message when it exceeds them.
+    Queries that could not be explained pass the guard, invalid ones fail on execution with engine error.
+    Admission slot is held by the connection explaining the query and released with it.
+    """
+    try:
+        with acquire_datasource_conn(datasource_id, params, admission=admission) as conn:
+            plan = get_engine_explain_cls(params['engine'])(conn).explain(query)['plan']
+    except Exception:
+        logging.warning('Failed to explain query for cost guard', exc_info=True)
+        return None
+    exceeded = []
+    if max_rows is not None and plan['estimated_rows'] is not None and plan['estimated_rows'] > max_rows:
+        exceeded.append('%d estimated rows (limit %d)' % (plan['estimated_rows'], max_rows))
+    if max_cost is not None and plan['cost'] is not None and plan['cost'] > max_cost:
+        exceeded.append('cost %g (limit %g)' % (plan['cost'], max_cost))
+    if exceeded:
+        return 'Query exceeds data source cost guard: %s' % ', '.join(exceeded)
@@ -0,0 +1,371 @@
+import bisect
+import csv
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pydantic.json import pydantic_encoder
+
+from core.admission import admissions, AdmissionRejectedError, BACKGROUND
+from core.arrow import ArrowBatchBuilder, iter_record_batches
+from core.config import settings
+from core.datasources.base import Cursor
+from core.results import RowEncoder, encode_ndjson_line, iter_batches
+from core.sql import is_select_query
+from core.utils import (
+    acquire_datasource_conn,
+    get_engine_error_cls,
+    get_ssh_tunnel_error_cls,
+    get_pool_error_cls,
+)
+
+
+PENDING = 'pending'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class Job(object):
+    """
+    Query running in background. Result rows are spooled to a local NDJSON file, one row per line,
+    with byte offsets of every written batch kept to read result pages without scanning the file.
+    """
+
+    # result file format, None for results read by pages
+    format: Optional[str] = None
+    extension = 'ndjson'
+    # result is spooled from columnar cursor blocks when engine has them
+    columnar = False
+    # values are fetched by wire format cursor when engine has it
+    wire_format = False
+
+    def __init__(self, user_id: int, datasource_id: int, query: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.datasource_id = datasource_id
+        self.query = query
+        self.status = PENDING
+        self.created_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.rows_fetched = 0
+        self.columns: Optional[List[str]] = None
+        self.error: Optional[str] = None
+        self.spool_path = os.path.join(settings.JOBS_SPOOL_DIR, '%s.%s' % (self.id, self.extension))
+        self.future = None
+        # connection running job query
+        self.connection = None
+        self._connection_lock = threading.Lock()
+        self._cancel_requested = threading.Event()
+        self._lock = threading.Lock()
+        # (first row index, byte offset) of every spooled batch
+        self._batches = []
+        self._finished_monotonic = None
+
+    @property
+    def elapsed(self) -> Optional[float]:
+        if self.started_at is None:
+            return None
+        return ((self.finished_at or datetime.utcnow()) - self.started_at).total_seconds()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def cancel(self):
+        if self.is_finished:
+            return
+        self._cancel_requested.set()
+        if self.future is not None and self.future.cancel():
+            self.finish(CANCELLED)
+            return
+        # the lock keeps connection from being released to the pool while cancel is sent
+        with self._connection_lock:
+            if self.connection is None:
+                return
+            try:
+                self.connection.cancel()
+            except NotImplementedError:
+                pass
+            except Exception:
+                logging.exception('Failed to cancel job %s query', self.id)
+
+    def attach_connection(self, conn):
+        with self._connection_lock:
+            self.connection = conn
+
+    def detach_connection(self):
+        with self._connection_lock:
+            self.connection = None
+
+    def start(self):
+        self.status = RUNNING
+        self.started_at = datetime.utcnow()
+
+    def finish(self, status: str, error: str = None):
+        self.status = status
+        self.error = error
+        self.finished_at = datetime.utcnow()
+        self._finished_monotonic = time.monotonic()
+
+    def is_expired(self, ttl: float) -> bool:
+        return self._finished_monotonic is not None and time.monotonic() - self._finished_monotonic > ttl
+
+    def spool_result(self, cursor: Cursor):
+        with open(self.spool_path, 'wb') as spool:
+            if cursor.description is None:
+                self.columns = ['status']
+                self.write_rows(spool, [[cursor.statusmessage]])
+                return
+            self.columns = [c[0] for c in cursor.description]
+            encoder = RowEncoder(cursor)
+            for rows in self.iter_batches(cursor):
+                self.write_rows(spool, encoder.convert(rows))
+
+    def iter_batches(self, cursor: Cursor):
+        for rows in iter_batches(cursor, settings.QUERY_STREAM_BATCH_SIZE):
+            if self.cancel_requested:
+                raise JobCancelledError()
+            yield rows
+
+    def write_rows(self, spool, rows):
+        offset = spool.tell()
+        spool.write(b''.join(encode_ndjson_line(row) for row in rows))
+        spool.flush()
+        with self._lock:
+            self._batches.append((self.rows_fetched, offset))
+            self.rows_fetched += len(rows)
+
+    def read_rows(self, skip: int, limit: int) -> list:
+        with self._lock:
+            batches, total = list(self._batches), self.rows_fetched
+        if skip >= total or limit <= 0:
+            return []
+        index = bisect.bisect_right(batches, (skip, float('inf'))) - 1
+        first_row, offset = batches[index]
+        rows = []
+        with open(self.spool_path, 'rb') as spool:
+            spool.seek(offset)
+            for _ in range(skip - first_row):
+                spool.readline()
+            for _ in range(min(limit, total - skip)):
+                rows.append(orjson.loads(spool.readline()))
+        return rows
+
+    def remove_spool(self):
+        try:
+            os.remove(self.spool_path)
+        except FileNotFoundError:
+            pass
+
+
+def encode_csv_value(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=pydantic_encoder)
+    return value
+
+
+class ExportJob(Job):
+    """
+    Query exported in background to CSV, optionally gzipped, or Parquet file for download.
+    Rows are written by batches as they are fetched, so memory use does not depend on result size.
+    """
+
+    formats = ('csv', 'parquet')
+    media_types = {'csv': 'text/csv', 'csv.gz': 'application/gzip', 'parquet': 'application/vnd.apache.parquet'}
+
+    def __init__(self, user_id: int, datasource_id: int, query: str, format: str, compress: bool = False):
+        self.format = format
+        self.extension = 'csv.gz' if format == 'csv' and compress else format
+        self.columnar = format == 'parquet'
+        # CSV values are written as text anyway
+        self.wire_format = format == 'csv'
+        super().__init__(user_id, datasource_id, query)
+
+    @property
+    def filename(self) -> str:
+        return 'export-%s.%s' % (self.id, self.extension)
+
+    @property
+    def media_type(self) -> str:
+        return self.media_types[self.extension]
+
+    @property
+    def size(self) -> Optional[int]:
+        if self.status != SUCCEEDED:
+            return None
+        return os.path.getsize(self.spool_path)
+
+    def spool_result(self, cursor: Cursor):
+        if self.format == 'parquet':
+            self._write_parquet(cursor)
+        else:
+            self._write_csv(cursor)
+
+    def _write_csv(self, cursor: Cursor):
+        opener = gzip.open if self.extension == 'csv.gz' else open
+        with opener(self.spool_path, 'wt', newline='', encoding='utf-8') as spool:
+            writer = csv.writer(spool)
+            if cursor.description is None:
+                self.columns = ['status']
+                writer.writerows([self.columns, [cursor.statusmessage]])
+                self.rows_fetched = 1
+                return
+            self.columns = [c[0] for c in cursor.description]
+            writer.writerow(self.columns)
+            for rows in self.iter_batches(cursor):
+                writer.writerows([encode_csv_value(value) for value in row] for row in rows)
+                self.rows_fetched += len(rows)
+
+    def _write_parquet(self, cursor: Cursor):
+        if cursor.description is None:
+            self.columns = ['status']
+            pq.write_table(pa.table({'status': [cursor.statusmessage]}), self.spool_path)
+            self.rows_fetched = 1
+            return
+        self.columns = [c[0] for c in cursor.description]
+        builder = ArrowBatchBuilder(cursor)
+        writer = None
+        try:
+            for batch in iter_record_batches(cursor, builder, settings.QUERY_STREAM_BATCH_SIZE):
+                if self.cancel_requested:
+                    raise JobCancelledError()
+                if writer is None:
+                    writer = pq.ParquetWriter(self.spool_path, batch.schema)
+                writer.write_table(pa.Table.from_batches([batch]))
+                self.rows_fetched += batch.num_rows
+            if writer is None:
+                writer = pq.ParquetWriter(self.spool_path, builder.build_empty().schema)
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+class JobManager(object):
+    """
+    Runs jobs on a bounded thread pool, keeps finished jobs and their results for JOBS_RESULT_TTL seconds.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, job: Job, params: dict) -> Job:
+        self._purge_expired()
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status == PENDING)
+            if pending >= settings.JOBS_MAX_PENDING:
+                raise JobQueueFullError('Too many pending jobs, try again later')
+            if self._executor is None:
+                os.makedirs(settings.JOBS_SPOOL_DIR, exist_ok=True)
+                self._executor = ThreadPoolExecutor(max_workers=settings.JOBS_MAX_WORKERS, thread_name_prefix='job')
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, params)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    def remove(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.remove_spool()
+
+    def shutdown(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+            executor, self._executor = self._executor, None
+        for job in jobs:
+            job.cancel()
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def _purge_expired(self):
+        with self._lock:
+            expired = [job for job in self._jobs.values() if job.is_expired(settings.JOBS_RESULT_TTL)]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            job.remove_spool()
+
+    def _run(self, job: Job, params: dict):
+        if job.cancel_requested:
+            return job.finish(CANCELLED)
+        job.start()
+        client_errors = (get_engine_error_cls(params['engine']), get_ssh_tunnel_error_cls(), get_pool_error_cls())
+        timer = None
+        if settings.JOBS_TIMEOUT:
+            timer = threading.Timer(settings.JOBS_TIMEOUT, job.cancel)
+            timer.daemon = True
+            timer.start()
+        try:
+            # jobs wait for a slot in background lane, so interactive queries are admitted first
+            admission = admissions.acquire(
+                job.datasource_id, job.user_id, BACKGROUND, is_cancelled=lambda: job.cancel_requested
+            )
+            # jobs never inherit a request timeout of pooled connection, they run with data source timeout
+            # when jobs one is not set and unlimited (0) when neither is, pooled one is restored on release
+            statement_timeout = settings.JOBS_TIMEOUT or params.get('statement_timeout') or 0
+            with acquire_datasource_conn(job.datasource_id, params, statement_timeout, admission) as conn:
+                job.attach_connection(conn)
+                try:
+                    self._execute(job, conn)
+                finally:
+                    job.detach_connection()
+            job.finish(SUCCEEDED)
+        # background waits end only when job is cancelled
+        except (JobCancelledError, AdmissionRejectedError):
+            job.finish(CANCELLED)
+        # client exceptions should be returned to client
+        except client_errors as e:
+            job.finish(CANCELLED if job.cancel_requested else FAILED, str(e))
+        except Exception:
+            logging.exception('Job %s failed', job.id)
+            job.finish(FAILED, 'Internal error')
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _execute(self, job: Job, conn):
+        server_side = is_select_query(job.query)
+        cursor = conn.cursor(
+            server_side=server_side,
+            itersize=settings.QUERY_STREAM_BATCH_SIZE,
+            columnar=server_side and job.columnar,
+            wire_format=job.wire_format,
+        )
+        with cursor:
+            cursor.execute(job.query)
+            job.spool_result(cursor)
+
+
+jobs = JobManager()
@@ -0,0 +1,455 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from core.config import settings
+from core.datasources.base import Connection, AsyncConnection
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+class PoolClosedError(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of data source connections.
+
+    Connections are health checked on checkout, closed after idle timeout (keeping min_size of them open)
+    and replaced after max lifetime. Checkout waits up to checkout_timeout for a free connection
+    when max_size connections are in use.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Connection],
+        *,
+        min_size: int,
+        max_size: int,
+        idle_timeout: float,
+        max_lifetime: float,
+        checkout_timeout: float,
+    ):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self._cond = threading.Condition()
+        # idle connections, the most recently released are at the end
+        self._idle = []
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self.last_used_at = time.monotonic()
+
+    def acquire(self, timeout: Optional[float] = None) -> Connection:
+        """
+        Check out a connection waiting up to timeout seconds, checkout_timeout by default, 0 does not wait.
+        """
+        deadline = time.monotonic() + (self.checkout_timeout if timeout is None else timeout)
+        while True:
+            conn = self._checkout(deadline)
+            if conn is None:
+                return self._create()
+            if conn.ping():
+                return conn
+            self._discard(conn)
+
+    def release(self, conn: Connection):
+        with self._cond:
+            if conn not in self._in_use:
+                return
+            self._in_use.remove(conn)
+        try:
+            conn.rollback()
+            conn.reset_statement_timeout()
+        except Exception:
+            self._discard(conn)
+            return
+        with self._cond:
+            now = time.monotonic()
+            if not self._closed and now - conn.pool_created_at < self.max_lifetime:
+                conn.pool_released_at = self.last_used_at = now
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        self._discard(conn)
+
+    def prune(self):
+        """
+        Close idle connections past idle timeout or max lifetime.
+        """
+        expired = []
+        with self._cond:
+            now = time.monotonic()
+            keep = []
+            for conn in self._idle:
+                if now - conn.pool_created_at >= self.max_lifetime or (
+                    now - conn.pool_released_at >= self.idle_timeout and self._size - len(expired) > self.min_size
+                ):
+                    expired.append(conn)
+                else:
+                    keep.append(conn)
+            self._idle = keep
+        for conn in expired:
+            self._discard(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn in idle:
+            self._discard(conn)
+
+    @property
+    def is_idle(self) -> bool:
+        return not self._in_use
+
+    def _checkout(self, deadline: float) -> Optional[Connection]:
+        """
+        Take idle connection or reserve a slot for a new one (None is returned).
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError('Connection pool is closed')
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._in_use.add(conn)
+                    self.last_used_at = time.monotonic()
+                    return conn
+                if self._size < self.max_size:
+                    self._size += 1
+                    self.last_used_at = time.monotonic()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError('Timed out waiting for a free data source connection')
+                self._cond.wait(remaining)
+
+    def _create(self) -> Connection:
+        try:
+            conn = self._connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        conn.pool_created_at = conn.pool_released_at = time.monotonic()
+        conn.pool = self
+        with self._cond:
+            self._in_use.add(conn)
+        return conn
+
+    def _discard(self, conn: Connection):
+        with self._cond:
+            self._in_use.discard(conn)
+            self._size -= 1
+            self._cond.notify()
+        try:
+            conn.terminate()
+        except Exception:
+            pass
+
+
+class AsyncConnectionPool(object):
+    """
+    Asyncio counterpart of ConnectionPool for connections of asyncio drivers.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[AsyncConnection]],
+        *,
+        min_size: int,
+        max_size: int,
+        idle_timeout: float,
+        max_lifetime: float,
+        checkout_timeout: float,
+    ):
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.checkout_timeout = checkout_timeout
+        self._cond = asyncio.Condition()
+        # idle connections, the most recently released are at the end
+        self._idle = []
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self.last_used_at = time.monotonic()
+
+    async def acquire(self) -> AsyncConnection:
+        deadline = time.monotonic() + self.checkout_timeout
+        while True:
+            conn = await self._checkout(deadline)
+            if conn is None:
+                return await self._create()
+            if await conn.ping():
+                return conn
+            await self._discard(conn)
+
+    async def release(self, conn: AsyncConnection):
+        async with self._cond:
+            if conn not in self._in_use:
+                return
+            self._in_use.remove(conn)
+        try:
+            await conn.rollback()
+            await conn.reset_statement_timeout()
+        except Exception:
+            await self._discard(conn)
+            return
+        async with self._cond:
+            now = time.monotonic()
+            if not self._closed and now - conn.pool_created_at < self.max_lifetime:
+                conn.pool_released_at = self.last_used_at = now
+                self._idle.append(conn)
+                self._cond.notify()
+                return
+        await self._discard(conn)
+
+    async def prune(self):
+        """
+        Close idle connections past idle timeout or max lifetime.
+        """
+        expired = []
+        async with self._cond:
+            now = time.monotonic()
+            keep = []
+            for conn in self._idle:
+                if now - conn.pool_created_at >= self.max_lifetime or (
+                    now - conn.pool_released_at >= self.idle_timeout and self._size - len(expired) > self.min_size
+                ):
+                    expired.append(conn)
+                else:
+                    keep.append(conn)
+            self._idle = keep
+        for conn in expired:
+            await self._discard(conn)
+
+    async def close(self):
+        async with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn in idle:
+            await self._discard(conn)
+
+    @property
+    def is_idle(self) -> bool:
+        return not self._in_use
+
+    async def _checkout(self, deadline: float) -> Optional[AsyncConnection]:
+        """
+        Take idle connection or reserve a slot for a new one (None is returned).
+        """
+        async with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosedError('Connection pool is closed')
+                if self._idle:
+                    conn = self._idle.pop()
+                    self._in_use.add(conn)
+                    self.last_used_at = time.monotonic()
+                    return conn
+                if self._size < self.max_size:
+                    self._size += 1
+                    self.last_used_at = time.monotonic()
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeoutError('Timed out waiting for a free data source connection')
+                try:
+                    await asyncio.wait_for(self._cond.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _create(self) -> AsyncConnection:
+        try:
+            conn = await self._connect()
+        except BaseException:
+            async with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        conn.pool_created_at = conn.pool_released_at = time.monotonic()
+        conn.pool = self
+        async with self._cond:
+            self._in_use.add(conn)
+        return conn
+
+    async def _discard(self, conn: AsyncConnection):
+        async with self._cond:
+            self._in_use.discard(conn)
+            self._size -= 1
+            self._cond.notify()
+        try:
+            await conn.terminate()
+        except Exception:
+            pass
+
+
+class PoolManager(object):
+    """
+    Connection pools keyed by data source id and connection params hash.
+    """
+
+    # seconds between idle connections pruning
+    reap_interval = 30
+
+    def __init__(self):
+        self._pools: Dict[int, Tuple[str, ConnectionPool]] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def get(self, datasource_id: int, params: dict, connect: Callable[[], Connection]) -> ConnectionPool:
+        params_hash = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        stale = None
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name='datasource-pool-reaper', daemon=True)
+                self._reaper.start()
+            if datasource_id in self._pools:
+                pool_hash, pool = self._pools[datasource_id]
+                if pool_hash == params_hash:
+                    return pool
+                # data source or its SSH tunnel has been changed
+                stale = pool
+            pool = ConnectionPool(
+                connect,
+                min_size=settings.DATASOURCE_POOL_MIN_SIZE,
+                max_size=settings.DATASOURCE_POOL_MAX_SIZE,
+                idle_timeout=settings.DATASOURCE_POOL_IDLE_TIMEOUT,
+                max_lifetime=settings.DATASOURCE_POOL_MAX_LIFETIME,
+                checkout_timeout=settings.DATASOURCE_POOL_CHECKOUT_TIMEOUT,
+            )
+            self._pools[datasource_id] = (params_hash, pool)
+        if stale is not None:
+            stale.close()
+        return pool
+
+    def acquire(
+        self, datasource_id: int, params: dict, connect: Callable[[], Connection], timeout: Optional[float] = None
+    ) -> Connection:
+        while True:
+            try:
+                return self.get(datasource_id, params, connect).acquire(timeout)
+            # pool has been invalidated concurrently, the next one is taken
+            except PoolClosedError:
+                continue
+
+    def invalidate(self, datasource_id: int):
+        with self._lock:
+            _, pool = self._pools.pop(datasource_id, (None, None))
+        if pool is not None:
+            pool.close()
+
+    def close_all(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for _, pool in pools.values():
+            pool.close()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.reap_interval)
+            with self._lock:
+                pools = list(self._pools.items())
+            for datasource_id, (_, pool) in pools:
+                pool.prune()
+                # drop pools of data sources not used for a long time
+                if pool.is_idle and time.monotonic() - pool.last_used_at > settings.DATASOURCE_POOL_IDLE_TIMEOUT * 2:
+                    with self._lock:
+                        if self._pools.get(datasource_id, (None, None))[1] is pool:
+                            del self._pools[datasource_id]
+                    pool.close()
+
+
+class AsyncPoolManager(object):
+    """
+    Asyncio counterpart of PoolManager. Pools of changed data sources are replaced on the next use
+    as their params hash changes, or at once when they are invalidated.
+    """
+
+    # seconds between idle connections pruning
+    reap_interval = 30
+
+    def __init__(self):
+        self._pools: Dict[int, Tuple[str, AsyncConnectionPool]] = {}
+        self._reaper = None
+
+    async def get(
+        self, datasource_id: int, params: dict, connect: Callable[[], Awaitable[AsyncConnection]]
+    ) -> AsyncConnectionPool:
+        params_hash = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        if self._reaper is None:
+            self._reaper = asyncio.ensure_future(self._reap())
+        stale = None
+        if datasource_id in self._pools:
+            pool_hash, pool = self._pools[datasource_id]
+            if pool_hash == params_hash:
+                return pool
+            # data source or its SSH tunnel has been changed
+            stale = pool
+        pool = AsyncConnectionPool(
+            connect,
+            min_size=settings.DATASOURCE_POOL_MIN_SIZE,
+            max_size=settings.DATASOURCE_POOL_MAX_SIZE,
+            idle_timeout=settings.DATASOURCE_POOL_IDLE_TIMEOUT,
+            max_lifetime=settings.DATASOURCE_POOL_MAX_LIFETIME,
+            checkout_timeout=settings.DATASOURCE_POOL_CHECKOUT_TIMEOUT,
+        )
+        self._pools[datasource_id] = (params_hash, pool)
+        if stale is not None:
+            await stale.close()
+        return pool
+
+    async def acquire(
+        self, datasource_id: int, params: dict, connect: Callable[[], Awaitable[AsyncConnection]]
+    ) -> AsyncConnection:
+        while True:
+            try:
+                return await (await self.get(datasource_id, params, connect)).acquire()
+            # pool has been replaced concurrently, the next one is taken
+            except PoolClosedError:
+                continue
+
+    async def invalidate(self, datasource_id: int):
+        _, pool = self._pools.pop(datasource_id, (None, None))
+        if pool is not None:
+            await pool.close()
+
+    async def close_all(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        pools, self._pools = self._pools, {}
+        for _, pool in pools.values():
+            await pool.close()
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            for datasource_id, (_, pool) in list(self._pools.items()):
+                await pool.prune()
+                # drop pools of data sources not used for a long time
+                if pool.is_idle and time.monotonic() - pool.last_used_at > settings.DATASOURCE_POOL_IDLE_TIMEOUT * 2:
+                    if self._pools.get(datasource_id, (None, None))[1] is pool:
+                        del self._pools[datasource_id]
+                    await pool.close()
+
+
+pools = PoolManager()
+async_pools = AsyncPoolManager()
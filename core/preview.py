@@ -0,0 +1,30 @@
+from core.datasources.base import Connection
+from core.utils import get_engine_introspection_cls, get_engine_operations_cls
+
+
+class TableNotFoundError(Exception):
+    pass
+
+
+def preview_table(conn: Connection, engine: str, table: str, limit: int) -> dict:
+    """
+    Read about limit rows of the table. Large tables are sampled by engine, so the read does not depend
+    on table size, the rest of them are read as is. Table is looked up among introspected ones.
+    """
+    introspection = get_engine_introspection_cls(engine)(conn)
+    operations = get_engine_operations_cls(engine)(conn)
+    with conn.cursor() as cursor:
+        if not introspection.get_tables(cursor, [table]):
+            raise TableNotFoundError('Table %s not found' % table)
+        statistics = introspection.get_table_statistics(cursor, table)
+        query = operations.sample_query(table, limit, statistics)
+        sampled = query is not None
+        if query is None:
+            query = operations.limit_query('SELECT * FROM %s' % operations.quote_name(table), limit)
+        cursor.execute(query)
+        return {
+            'data': cursor.fetchmany(limit),
+            'columns': [c[0] for c in cursor.description],
+            'sampled': sampled,
+            'table_rows': statistics['rows'],
+        }
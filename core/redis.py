@@ -1,7 +1,15 @@
-from typing import Optional, Callable
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Callable, Tuple
 
+import orjson
 from aioredis import Redis, create_redis_pool
 
+from core.config import settings
+from core.results import encode_json
+from core.sql import get_query_fingerprint
+
 
 def make_cache_key(*args, **kwargs):
     args = '::'.join(map(str, args))
@@ -36,4 +44,143 @@ class RedisCache(object):
         await self.redis.wait_closed()
 
 
+class QueryResultCache(object):
+    """
+    Query results cache keyed by data source id and normalized query fingerprint.
+    Results are kept for QUERY_CACHE_TTL seconds, the least recently used are evicted
+    when their total size exceeds QUERY_CACHE_MAX_BYTES. Size accounting is not atomic
+    between workers, so the budget is approximate.
+    """
+
+    index_key = make_cache_key('queryresult', 'index')
+    sizes_key = make_cache_key('queryresult', 'sizes')
+    total_key = make_cache_key('queryresult', 'total')
+
+    def __init__(self, cache: RedisCache):
+        self.cache = cache
+
+    def make_generation_key(self, datasource_id: int):
+        return make_cache_key('queryresult', generation=datasource_id)
+
+    async def get_generation(self, datasource_id: int) -> int:
+        """
+        Generation of data source results, passed in variant so results cached before the data source
+        was changed are not served.
+        """
+        return int(await self.cache.redis.get(self.make_generation_key(datasource_id)) or 0)
+
+    async def invalidate(self, datasource_id: int):
+        """
+        Start new generation of data source results, entries of previous ones are left to expire or be evicted.
+        """
+        await self.cache.redis.incr(self.make_generation_key(datasource_id))
+
+    def make_key(self, datasource_id: int, query: str, **variant):
+        # variant distinguishes results of the same query fetched differently, e.g. within other limits
+        return make_cache_key(queryresult=datasource_id, fingerprint=get_query_fingerprint(query), **variant)
+
+    async def get(self, datasource_id: int, query: str, max_age: float, **variant) -> Optional[Tuple[dict, float]]:
+        """
+        Get cached result not older than max_age seconds and its age.
+        """
+        redis = self.cache.redis
+        key = self.make_key(datasource_id, query, **variant)
+        if (value := await redis.get(key)) is None:
+            return
+        entry = orjson.loads(value)
+        now = time.time()
+        age = max(now - entry['created_at'], 0)
+        if age > max_age:
+            return
+        await redis.zadd(self.index_key, now, key)
+        return entry['result'], age
+
+    async def set(self, datasource_id: int, query: str, result: dict, **variant):
+        redis = self.cache.redis
+        key = self.make_key(datasource_id, query, **variant)
+        now = time.time()
+        value = encode_json({'created_at': now, 'result': result})
+        size = len(value)
+        if size > settings.QUERY_CACHE_MAX_BYTES:
+            return
+        old_size = await redis.hget(self.sizes_key, key)
+        tr = redis.multi_exec()
+        tr.set(key, value, expire=settings.QUERY_CACHE_TTL)
+        tr.zadd(self.index_key, now, key)
+        tr.hset(self.sizes_key, key, size)
+        tr.incrby(self.total_key, size - int(old_size or 0))
+        await tr.execute()
+        await self._evict()
+
+    async def _evict(self):
+        redis = self.cache.redis
+        while int(await redis.get(self.total_key) or 0) > settings.QUERY_CACHE_MAX_BYTES:
+            keys = await redis.zrange(self.index_key, 0, 9)
+            if not keys:
+                await redis.delete(self.total_key)
+                break
+            sizes = await redis.hmget(self.sizes_key, *keys)
+            tr = redis.multi_exec()
+            tr.delete(*keys)
+            tr.zrem(self.index_key, *keys)
+            tr.hdel(self.sizes_key, *keys)
+            tr.decrby(self.total_key, sum(int(size or 0) for size in sizes))
+            await tr.execute()
+
+
+class SchemaCache(object):
+    """
+    Introspected data source structures along with catalog change markers of their tables,
+    used to refresh structures incrementally. Markers are kept with a hash of connection parameters,
+    so they are not applied to a structure of another database when data source settings change.
+    """
+
+    def __init__(self, cache: RedisCache):
+        self.cache = cache
+
+    def make_key(self, datasource_id: int):
+        return make_cache_key(datasourceschema=datasource_id)
+
+    def make_markers_key(self, datasource_id: int):
+        return make_cache_key(datasourceschemamarkers=datasource_id)
+
+    async def get(self, datasource_id: int) -> Optional[Tuple[list, float]]:
+        """
+        Get cached structure and its age in seconds.
+        """
+        if (value := await self.cache.redis.get(self.make_key(datasource_id))) is None:
+            return
+        entry = orjson.loads(value)
+        # structures cached before entries had creation time are treated as the oldest ones
+        if isinstance(entry, list):
+            return entry, float('inf')
+        return entry['structure'], max(time.time() - entry['created_at'], 0)
+
+    async def get_markers(self, datasource_id: int, params: dict) -> Optional[Dict[str, str]]:
+        if (value := await self.cache.redis.get(self.make_markers_key(datasource_id))) is None:
+            return
+        entry = orjson.loads(value)
+        if entry['params'] != self.hash_params(params):
+            return
+        return entry['markers']
+
+    async def set(self, datasource_id: int, params: dict, structure: list, markers: Optional[Dict[str, str]]):
+        tr = self.cache.redis.multi_exec()
+        tr.set(self.make_key(datasource_id), encode_json({'created_at': time.time(), 'structure': structure}))
+        if markers is not None:
+            entry = {'params': self.hash_params(params), 'markers': markers}
+            tr.set(self.make_markers_key(datasource_id), encode_json(entry))
+        else:
+            tr.delete(self.make_markers_key(datasource_id))
+        await tr.execute()
+
+    async def invalidate(self, datasource_id: int):
+        await self.cache.redis.delete(self.make_key(datasource_id), self.make_markers_key(datasource_id))
+
+    def hash_params(self, params: dict) -> str:
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
 cache = RedisCache()
+query_cache = QueryResultCache(cache)
+schema_cache = SchemaCache(cache)
@@ -0,0 +1,331 @@
+import json
+import logging
+from datetime import timedelta
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Type, Union
+
+import orjson
+from pydantic.json import pydantic_encoder
+
+from core.config import settings
+from core.datasources.base import Connection, AsyncConnection, Cursor, AsyncCursor, Operations, types
+from core.sql import is_select_query, normalize_query
+
+
+class ResultLimits(object):
+    """
+    Row and byte budgets of query result, None means unlimited.
+    Bytes are counted as the size of JSON encoded rows.
+    """
+
+    def __init__(self, max_rows: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def combine(cls, *limits: 'ResultLimits') -> 'ResultLimits':
+        """
+        The strictest of limits.
+        """
+        def strictest(values):
+            values = [v for v in values if v is not None]
+            return min(values) if values else None
+        return cls(strictest(l.max_rows for l in limits), strictest(l.max_bytes for l in limits))
+
+    def __bool__(self):
+        return self.max_rows is not None or self.max_bytes is not None
+
+
+def iter_batches(cursor: Cursor, batch_size: int) -> Iterator[list]:
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        yield rows
+
+
+def encode_json(obj) -> bytes:
+    """
+    Encode JSON with orjson, values it does not support natively are encoded as jsonable_encoder does.
+    """
+    try:
+        return orjson.dumps(obj, default=pydantic_encoder)
+    # integers over 64 bits, e.g. of ClickHouse Int128 columns
+    except orjson.JSONEncodeError:
+        return json.dumps(obj, default=pydantic_encoder).encode()
+
+
+def encode_ndjson_line(obj) -> bytes:
+    return encode_json(obj) + b'\n'
+
+
+def decode_binary(value) -> str:
+    return bytes(value).decode()
+
+
+class RowEncoder(object):
+    """
+    Converts cursor rows to values encoded by orjson natively, converters are picked once per column
+    by column types. Columns of other types are left as is, orjson encodes them (datetimes, UUIDs, etc.)
+    or falls back to pydantic encoder for them.
+    """
+
+    converters = {
+        types.DECIMAL: float,
+        types.INTERVAL: timedelta.total_seconds,
+        types.BINARY: decode_binary,
+    }
+
+    def __init__(self, cursor: Union[Cursor, AsyncCursor]):
+        self.columns = [
+            (i, self.converters[column_type])
+            for i, column_type in enumerate(cursor.get_column_types())
+            if column_type in self.converters
+        ]
+
+    def convert(self, rows: list) -> list:
+        if not self.columns:
+            return rows
+        converted = []
+        for row in rows:
+            row = list(row)
+            for i, converter in self.columns:
+                if row[i] is not None:
+                    row[i] = converter(row[i])
+            converted.append(row)
+        return converted
+
+
+class LimitedResult(object):
+    """
+    Rows fetched within limits.
+    """
+
+    def __init__(self, limits: ResultLimits):
+        self.limits = limits
+        self.data = []
+        self.size = 0
+
+    def get_batch_size(self, batch_size: int) -> int:
+        if self.limits.max_rows is None:
+            return batch_size
+        # one row over the budget tells the result is truncated
+        return min(batch_size, self.limits.max_rows + 1 - len(self.data))
+
+    def add(self, rows: list) -> bool:
+        """
+        Add fetched rows, True is returned when one of budgets is exceeded and the rows are cut.
+        """
+        if self.limits.max_bytes is not None:
+            for i, row in enumerate(rows):
+                self.size += len(encode_json(row))
+                if self.size > self.limits.max_bytes:
+                    self.data.extend(rows[:i])
+                    return True
+        self.data.extend(rows)
+        if self.limits.max_rows is not None and len(self.data) > self.limits.max_rows:
+            del self.data[self.limits.max_rows:]
+            return True
+        return False
+
+
+class ResultBudget(object):
+    """
+    Row and byte budgets left of streamed result, bytes are counted by stream encoder.
+    """
+
+    def __init__(self, limits: ResultLimits):
+        self.rows = limits.max_rows
+        self.bytes = limits.max_bytes
+
+    def take(self, count: int, sizes: Iterable[int]) -> int:
+        """
+        Take count rows of sizes, return the number of them within budgets, fewer than count when one is exceeded.
+        """
+        if self.rows is not None:
+            count = min(count, self.rows)
+            self.rows -= count
+        if self.bytes is not None:
+            for i, size in zip(range(count), sizes):
+                if size > self.bytes:
+                    return i
+                self.bytes -= size
+        return count
+
+
+def get_result_totals(
+    truncated: bool, rows_returned: int, estimate_total: Optional[Callable[[int], Optional[int]]] = None
+) -> dict:
+    """
+    Truncation fields of limited results, total of truncated ones is estimated by estimate_total when passed.
+    """
+    if not truncated:
+        estimated_total = rows_returned
+    else:
+        estimated_total = estimate_total(rows_returned) if estimate_total is not None else None
+    return {'truncated': truncated, 'rows_returned': rows_returned, 'estimated_total': estimated_total}
+
+
+def fetch_limited(cursor: Cursor, limits: ResultLimits, batch_size: int) -> Tuple[list, bool]:
+    """
+    Fetch rows until result is exhausted or one of budgets is exceeded, return rows and truncated flag.
+    """
+    result = LimitedResult(limits)
+    while rows := cursor.fetchmany(result.get_batch_size(batch_size)):
+        if result.add(rows):
+            return result.data, True
+    return result.data, False
+
+
+async def fetch_limited_async(cursor: AsyncCursor, limits: ResultLimits, batch_size: int) -> Tuple[list, bool]:
+    result = LimitedResult(limits)
+    while rows := await cursor.fetchmany(result.get_batch_size(batch_size)):
+        if result.add(rows):
+            return result.data, True
+    return result.data, False
+
+
+def fetch_result(
+    conn: Connection,
+    query: str,
+    *,
+    limits: Optional[ResultLimits] = None,
+    operations: Optional[Operations] = None,
+    wire_format: bool = False,
+) -> dict:
+    """
+    Execute query, fetch the result within limits and commit.
+
+    Row limit of read queries is pushed down to data source when engine operations are passed,
+    such queries are fetched through server-side cursor and left unread when a budget is exceeded.
+    Values are fetched by wire format cursor when wire_format is set and engine has it.
+    """
+    if not limits:
+        with conn.cursor(wire_format=wire_format) as cursor:
+            cursor.execute(query)
+            if cursor.description is None:
+                result = {'data': [(cursor.statusmessage, )], 'columns': ['status', ]}
+            else:
+                data = RowEncoder(cursor).convert(cursor.fetchall())
+                result = {
+                    'data': data,
+                    'columns': [c[0] for c in cursor.description],
+                    'rows_returned': len(data),
+                    'estimated_total': len(data),
+                }
+        conn.commit()
+        return result
+
+    select = is_select_query(query)
+    limited_query = query
+    if select and limits.max_rows is not None and operations is not None:
+        limited_query = operations.limit_query(query, limits.max_rows + 1) or query
+    cursor = conn.cursor(server_side=select, itersize=settings.QUERY_STREAM_BATCH_SIZE, wire_format=wire_format)
+    with cursor:
+        cursor.execute(limited_query)
+        if cursor.description is None:
+            result = {'data': [(cursor.statusmessage, )], 'columns': ['status', ]}
+        else:
+            data, truncated = fetch_limited(cursor, limits, settings.QUERY_STREAM_BATCH_SIZE)
+            if truncated:
+                cursor.cancel_unread()
+            data = RowEncoder(cursor).convert(data)
+            result = {
+                'data': data,
+                'columns': [c[0] for c in cursor.description],
+                'truncated': truncated,
+                'rows_returned': len(data),
+                'estimated_total': None if truncated else len(data),
+            }
+    if result.get('truncated') and select and operations is not None:
+        result['estimated_total'] = estimate_rows(operations, query, len(result['data']))
+    conn.commit()
+    return result
+
+
+async def fetch_result_async(
+    conn: AsyncConnection,
+    query: str,
+    *,
+    limits: Optional[ResultLimits] = None,
+    operations: Optional[Operations] = None,
+) -> dict:
+    """
+    Asyncio counterpart of fetch_result. Planner estimates are not available, as operations run on sync cursors.
+    """
+    limits = limits or ResultLimits()
+    if limits.max_rows is not None and operations is not None and is_select_query(query):
+        query = operations.limit_query(query, limits.max_rows + 1) or query
+    async with conn.cursor() as cursor:
+        await cursor.execute(query)
+        if cursor.description is None:
+            result = {'data': [(cursor.statusmessage, )], 'columns': ['status', ]}
+        else:
+            data, truncated = await fetch_limited_async(cursor, limits, settings.QUERY_STREAM_BATCH_SIZE)
+            data = RowEncoder(cursor).convert(data)
+            result = {
+                'data': data,
+                'columns': [c[0] for c in cursor.description],
+                'truncated': truncated,
+                'rows_returned': len(data),
+                'estimated_total': None if truncated else len(data),
+            }
+    await conn.commit()
+    return result
+
+
+def estimate_rows(operations: Operations, query: str, rows_returned: int) -> Optional[int]:
+    try:
+        with operations.connection.cursor() as cursor:
+            estimate = operations.estimate_rows(cursor, normalize_query(query))
+    except Exception:
+        logging.warning('Failed to estimate query result rows', exc_info=True)
+        return None
+    # planner estimates lower than rows already fetched are obviously wrong
+    return estimate if estimate is not None and estimate > rows_returned else None
+
+
+def stream_ndjson(
+    conn: Connection,
+    cursor: Cursor,
+    *,
+    batch_size: int,
+    errors: Tuple[Type[Exception], ...] = (),
+    limits: Optional[ResultLimits] = None,
+    estimate_total: Optional[Callable[[int], Optional[int]]] = None,
+) -> Iterator[bytes]:
+    """
+    Stream executed cursor result as NDJSON: columns header line first, then one line per rows batch.
+    Result is cut by limits, bytes are counted as the size of JSON encoded rows. The last line of limited
+    results has truncated, rows_returned and estimated_total fields of JSON results.
+    Commits when the stream is exhausted, the connection is released by the caller.
+    """
+    budget = ResultBudget(limits) if limits else None
+    try:
+        with cursor:
+            if cursor.description is None:
+                yield encode_ndjson_line({'columns': ['status']})
+                yield encode_ndjson_line({'data': [[cursor.statusmessage]]})
+                budget = None
+            else:
+                yield encode_ndjson_line({'columns': [c[0] for c in cursor.description]})
+                encoder = RowEncoder(cursor)
+                truncated, rows_returned = False, 0
+                for rows in iter_batches(cursor, batch_size):
+                    rows = encoder.convert(rows)
+                    count = len(rows)
+                    if budget is not None:
+                        count = budget.take(count, (len(encode_json(row)) for row in rows))
+                    if count:
+                        yield encode_ndjson_line({'data': rows[:count]})
+                        rows_returned += count
+                    if count < len(rows):
+                        cursor.cancel_unread()
+                        truncated = True
+                        break
+        # total is estimated once the cursor is closed, as unread results block the connection on some engines
+        if budget is not None:
+            yield encode_ndjson_line(get_result_totals(truncated, rows_returned, estimate_total))
+        conn.commit()
+    # response status is already sent, so client exceptions are reported in the stream
+    except errors as e:
+        yield encode_ndjson_line({'msg': str(e)})
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from core.admission import admissions
+from core.config import settings
+from core.redis import schema_cache
+from core.utils import refresh_datasource_structure
+
+
+class SchemaRefresher(object):
+    """
+    Serves cached data source schemas stale-while-revalidate. Schemas younger than SCHEMA_CACHE_SOFT_TTL
+    are served as is, older ones are served while a background refresh runs, schemas older than
+    SCHEMA_CACHE_HARD_TTL or not cached are refreshed before being served.
+    Concurrent refreshes of a data source share one introspection within the process,
+    it runs as interactive query of the data source user.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[int, asyncio.Future] = {}
+        self._prewarm: Optional[asyncio.Future] = None
+
+    async def get(self, datasource_id: int, params: dict, user_id: Optional[int] = None) -> list:
+        if (cached := await schema_cache.get(datasource_id)) is not None:
+            structure, age = cached
+            if age < settings.SCHEMA_CACHE_SOFT_TTL:
+                return structure
+            if settings.SCHEMA_CACHE_HARD_TTL is None or age < settings.SCHEMA_CACHE_HARD_TTL:
+                self.refresh_in_background(datasource_id, params, user_id)
+                return structure
+        return await self.refresh(datasource_id, params, user_id)
+
+    async def refresh(self, datasource_id: int, params: dict, user_id: Optional[int] = None) -> list:
+        # waiting requests do not cancel the refresh shared with others when they are cancelled
+        return await asyncio.shield(self._get_task(datasource_id, params, user_id))
+
+    def refresh_in_background(self, datasource_id: int, params: dict, user_id: Optional[int] = None):
+        if datasource_id not in self._tasks:
+            self._get_task(datasource_id, params, user_id).add_done_callback(self._log_failure)
+
+    def prewarm(self, data_sources: List[Tuple[int, dict, Optional[int]]]):
+        """
+        Refresh schemas of data sources missing in cache or stale one by one in background,
+        so startup does not wait for them and pools are not flooded by introspections.
+        """
+        self._prewarm = asyncio.ensure_future(self._prewarm_all(data_sources))
+
+    def shutdown(self):
+        for task in [self._prewarm, *self._tasks.values()]:
+            if task is not None:
+                task.cancel()
+        self._prewarm = None
+        self._tasks.clear()
+
+    def _get_task(self, datasource_id: int, params: dict, user_id: Optional[int]) -> asyncio.Future:
+        if (task := self._tasks.get(datasource_id)) is None:
+            task = self._tasks[datasource_id] = asyncio.ensure_future(self._refresh(datasource_id, params, user_id))
+            task.add_done_callback(lambda _: self._tasks.pop(datasource_id, None))
+        return task
+
+    async def _refresh(self, datasource_id: int, params: dict, user_id: Optional[int]) -> list:
+        cached = await schema_cache.get(datasource_id)
+        markers = await schema_cache.get_markers(datasource_id, params)
+        admission = await admissions.acquire_async(datasource_id, user_id)
+        # introspection runs on sync connections, so it is kept off the event loop
+        structure, markers = await run_in_threadpool(
+            refresh_datasource_structure, datasource_id, params, cached and cached[0], markers, admission
+        )
+        await schema_cache.set(datasource_id, params, structure, markers)
+        return structure
+
+    async def _prewarm_all(self, data_sources: List[Tuple[int, dict, Optional[int]]]):
+        for datasource_id, params, user_id in data_sources:
+            cached = await schema_cache.get(datasource_id)
+            if cached is not None and cached[1] < settings.SCHEMA_CACHE_SOFT_TTL:
+                continue
+            try:
+                await self.refresh(datasource_id, params, user_id)
+            except Exception:
+                logging.warning('Failed to pre-warm schema of data source %s', datasource_id, exc_info=True)
+
+    def _log_failure(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning('Background schema refresh failed', exc_info=task.exception())
+
+
+schema_refresher = SchemaRefresher()
@@ -0,0 +1,65 @@
+import time
+from typing import Callable, Tuple, Type
+
+from core.config import settings
+from core.datasources.base import Connection, Operations
+from core.results import iter_batches
+
+
+OK = 'ok'
+ERROR = 'error'
+SKIPPED = 'skipped'
+
+
+def execute_script(
+    conn: Connection,
+    operations: Operations,
+    script: str,
+    *,
+    stop_on_error: bool = True,
+    errors: Tuple[Type[Exception], ...] = (),
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> dict:
+    """
+    Execute script statements one by one in a single transaction.
+
+    The transaction is rolled back on the first failed statement when stop_on_error is set and the rest
+    are skipped. Otherwise every statement runs in its own savepoint, so failed ones are rolled back alone
+    and the transaction is committed at the end. Cancelled scripts are always rolled back.
+    """
+    results, failed, cancelled = [], False, False
+    with conn.cursor() as cursor:
+        for index, statement in enumerate(operations.split_statements(script)):
+            result = {'index': index, 'statement': statement, 'status': SKIPPED, 'rowcount': None, 'elapsed': None}
+            results.append(result)
+            cancelled = cancelled or is_cancelled()
+            if (failed and stop_on_error) or cancelled:
+                continue
+            savepoint = 'crossbase_%d' % index if not stop_on_error and operations.supports_savepoints else None
+            started = time.monotonic()
+            try:
+                if savepoint is not None:
+                    operations.savepoint(cursor, savepoint)
+                cursor.execute(statement)
+                # rows of reading statements are discarded, so the next statement could be run
+                if cursor.description is not None:
+                    for _ in iter_batches(cursor, settings.QUERY_STREAM_BATCH_SIZE):
+                        pass
+                result['rowcount'] = cursor.rowcount
+                if savepoint is not None:
+                    operations.release_savepoint(cursor, savepoint)
+                result['status'] = OK
+            except errors as e:
+                failed = True
+                result.update(status=ERROR, msg=str(e))
+                if savepoint is not None:
+                    operations.rollback_to_savepoint(cursor, savepoint)
+            finally:
+                result['elapsed'] = time.monotonic() - started
+    cancelled = cancelled or is_cancelled()
+    committed = not cancelled and not (failed and stop_on_error)
+    if committed:
+        conn.commit()
+    else:
+        conn.rollback()
+    return {'statements': results, 'committed': committed}
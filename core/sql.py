@@ -0,0 +1,106 @@
+import hashlib
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+
+SELECT_STATEMENTS = ('select', 'with', 'values', 'table')
+WRITE_KEYWORDS = (
+    'insert', 'update', 'delete', 'merge', 'upsert', 'replace', 'into', 'create', 'alter', 'drop',
+    'truncate', 'rename', 'grant', 'revoke', 'lock', 'call', 'exec', 'execute', 'optimize', 'system',
+)
+
+_ignored_re = re.compile(
+    r"""
+    --[^\n]*                # line comment
+    | /\*.*?\*/             # block comment
+    | '(?:[^']|'')*'        # string literal
+    | "(?:[^"]|"")*"        # quoted identifier
+    | `[^`]*`               # mysql quoted identifier
+    | \[[^\]]*\]            # mssql quoted identifier
+    """,
+    re.S | re.X,
+)
+_word_re = re.compile(r'[a-z_]+')
+
+COMMENT_PATTERNS = (r'--[^\n]*', r'/\*.*?\*/')
+QUOTE_PATTERNS = (r"'(?:[^']|'')*'", r'"(?:[^"]|"")*"', r'`[^`]*`', r'\[[^\]]*\]')
+_normalize_re = re.compile(
+    r"""
+    (?P<literal>'(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])
+    | (?P<space>(?:\s|--[^\n]*|/\*.*?\*/)+)     # whitespaces and comments
+    """,
+    re.S | re.X,
+)
+
+
+def strip_query(query: str) -> str:
+    """
+    Replace comments, literals and quoted identifiers with spaces, lower case the rest.
+    """
+    return _ignored_re.sub(' ', query).lower()
+
+
+def get_keywords(query: str):
+    return _word_re.findall(strip_query(query))
+
+
+def get_status_message(query: str, rowcount: Optional[int]) -> str:
+    """
+    Status of executed statement in PostgreSQL command tag form, e.g. UPDATE 3, for drivers not reporting one.
+    """
+    keywords = get_keywords(query)
+    verb = keywords[0].upper() if keywords else ''
+    return verb if rowcount is None else '%s %d' % (verb, rowcount)
+
+
+def is_select_query(query: str) -> bool:
+    """
+    Check if query is a single statement that only reads data and could be used as a subquery.
+    """
+    stripped = strip_query(query).strip().rstrip(';')
+    if ';' in stripped:
+        return False
+    keywords = _word_re.findall(stripped)
+    if not keywords or keywords[0] not in SELECT_STATEMENTS:
+        return False
+    return not any(keyword in WRITE_KEYWORDS for keyword in keywords)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Remove comments and redundant whitespaces outside of literals and trailing semicolons.
+    """
+    def replace(match):
+        return match.group('literal') or ' '
+    return _normalize_re.sub(replace, query).strip().rstrip(';').strip()
+
+
+def get_query_fingerprint(query: str) -> str:
+    return hashlib.sha1(normalize_query(query).encode()).hexdigest()
+
+
+def iter_statements(
+    script: str, delimiter: str = ';', quote_patterns: Sequence[str] = QUOTE_PATTERNS
+) -> Iterator[Tuple[str, int]]:
+    """
+    Split script by delimiters outside of comments and quotes.
+    Yield stripped statements without delimiters and script offsets right after them, empty statements are skipped.
+    """
+    splitter = re.compile(
+        '(?:%s)|(?P<delimiter>%s)' % ('|'.join(COMMENT_PATTERNS + tuple(quote_patterns)), re.escape(delimiter)), re.S
+    )
+    start = 0
+    for match in splitter.finditer(script):
+        if match.group('delimiter') is None:
+            continue
+        statement = script[start:match.start()].strip()
+        start = match.end()
+        if normalize_query(statement):
+            yield statement, start
+    statement = script[start:].strip()
+    if normalize_query(statement):
+        yield statement, len(script)
+
+
+def split_statements(script: str, delimiter: str = ';', quote_patterns: Sequence[str] = QUOTE_PATTERNS) -> List[str]:
+    return [statement for statement, _ in iter_statements(script, delimiter, quote_patterns)]
@@ -0,0 +1,147 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+from sshtunnel import SSHTunnelForwarder
+
+from core.config import settings
+
+
+def get_credentials(ssh_tunnel: dict) -> tuple:
+    return ssh_tunnel['host'], int(ssh_tunnel['port']), ssh_tunnel['username'], ssh_tunnel['password']
+
+
+class SharedTunnel(object):
+    """
+    SSH tunnel forwarder shared by every connection to the same remote address.
+    """
+
+    def __init__(self, ssh_tunnel: dict, remote_host: str, remote_port: int):
+        self.credentials = get_credentials(ssh_tunnel)
+        self.forwarder = SSHTunnelForwarder(
+            ssh_address_or_host=(ssh_tunnel['host'], int(ssh_tunnel['port'])),
+            ssh_username=ssh_tunnel['username'],
+            ssh_password=ssh_tunnel['password'],
+            remote_bind_address=(remote_host, remote_port),
+            set_keepalive=settings.SSH_TUNNEL_KEEPALIVE,
+        )
+        self.leases = 0
+        self.released_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.started = False
+
+    def ensure_started(self):
+        """
+        Start forwarder on first use and restart it after SSH transport failure.
+        """
+        with self.lock:
+            if not self.started:
+                self.forwarder.start()
+                self.started = True
+            elif not self.forwarder.is_active:
+                self.forwarder.restart()
+
+    def stop(self):
+        with self.lock:
+            if self.started:
+                self.forwarder.stop()
+                self.started = False
+
+
+class TunnelLease(object):
+
+    def __init__(self, manager: 'TunnelManager', key: tuple, tunnel: SharedTunnel):
+        self._manager = manager
+        self._key = key
+        self._tunnel = tunnel
+        self._released = False
+
+    @property
+    def local_bind_host(self):
+        return self._tunnel.forwarder.local_bind_host
+
+    @property
+    def local_bind_port(self):
+        return self._tunnel.forwarder.local_bind_port
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._manager.release(self._key, self._tunnel)
+
+
+class TunnelManager(object):
+    """
+    Reference counted SSH tunnels keyed by SSH tunnel id and remote address.
+    Tunnels without leases are stopped by the reaper after idle timeout.
+    """
+
+    # seconds between idle tunnels reaping and transports checking
+    reap_interval = 30
+
+    def __init__(self):
+        self._tunnels: Dict[Tuple[int, str, int], SharedTunnel] = {}
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def lease(self, ssh_tunnel: dict, remote_host: str, remote_port: int) -> TunnelLease:
+        key = (ssh_tunnel['id'], remote_host, int(remote_port))
+        stale = None
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name='ssh-tunnel-reaper', daemon=True)
+                self._reaper.start()
+            tunnel = self._tunnels.get(key)
+            if tunnel is not None and tunnel.credentials != get_credentials(ssh_tunnel):
+                # SSH tunnel has been changed, the old one is stopped when its last lease is released
+                stale = tunnel if not tunnel.leases else None
+                tunnel = None
+            if tunnel is None:
+                tunnel = self._tunnels[key] = SharedTunnel(ssh_tunnel, remote_host, int(remote_port))
+            tunnel.leases += 1
+        if stale is not None:
+            stale.stop()
+        try:
+            tunnel.ensure_started()
+        except BaseException:
+            self.release(key, tunnel)
+            raise
+        return TunnelLease(self, key, tunnel)
+
+    def release(self, key: tuple, tunnel: SharedTunnel):
+        with self._lock:
+            tunnel.leases -= 1
+            tunnel.released_at = time.monotonic()
+            stop = not tunnel.leases and self._tunnels.get(key) is not tunnel
+        if stop:
+            tunnel.stop()
+
+    def close_all(self):
+        with self._lock:
+            tunnels, self._tunnels = self._tunnels, {}
+        for tunnel in tunnels.values():
+            tunnel.stop()
+
+    def _reap(self):
+        while True:
+            time.sleep(self.reap_interval)
+            idle, active = [], []
+            with self._lock:
+                now = time.monotonic()
+                for key, tunnel in list(self._tunnels.items()):
+                    if not tunnel.leases and now - tunnel.released_at > settings.SSH_TUNNEL_IDLE_TIMEOUT:
+                        del self._tunnels[key]
+                        idle.append(tunnel)
+                    elif tunnel.leases:
+                        active.append(tunnel)
+            for tunnel in idle:
+                tunnel.stop()
+            for tunnel in active:
+                try:
+                    tunnel.ensure_started()
+                except Exception:
+                    # retried on the next lease or reaping
+                    pass
+
+
+tunnels = TunnelManager()
@@ -1,10 +1,17 @@
 import json
 import importlib
 import functools
+from typing import Optional, Tuple
 
-from sshtunnel import SSHTunnelForwarder, BaseSSHTunnelForwarderError
+from sshtunnel import BaseSSHTunnelForwarderError
+from starlette.concurrency import run_in_threadpool
 
 import models
+from core.admission import Admission, AdmissionRejectedError, admissions
+from core.config import settings
+from core.pool import pools, async_pools, PoolTimeoutError
+from core.results import ResultLimits
+from core.tunnels import tunnels
 
 
 def class_to_import_string(cls):
@@ -27,11 +34,33 @@ def get_engine_conn_cls(engine: str):
     return import_from_string(path)
 
 
+def get_engine_async_conn_cls(engine: str):
+    # engines without asyncio driver or with the driver not installed are served by sync connections
+    path = f'core.datasources.{engine}.async_connection.AsyncConnection'
+    return import_from_string(path, default=None)
+
+
+def get_engine_async_errors(engine: str) -> tuple:
+    path = f'core.datasources.{engine}.async_connection.Error'
+    errors = import_from_string(path)
+    return errors if isinstance(errors, tuple) else (errors, )
+
+
 def get_engine_introspection_cls(engine: str):
     path = f'core.datasources.{engine}.Introspection'
     return import_from_string(path)
 
 
+def get_engine_explain_cls(engine: str):
+    path = f'core.datasources.{engine}.Explain'
+    return import_from_string(path)
+
+
+def get_engine_operations_cls(engine: str):
+    path = f'core.datasources.{engine}.Operations'
+    return import_from_string(path)
+
+
 def get_engine_conn_params_schema_cls(engine: str):
     path = f'core.datasources.{engine}.ConnectionParams'
     return import_from_string(path)
@@ -46,39 +75,229 @@ def get_ssh_tunnel_error_cls():
     return BaseSSHTunnelForwarderError
 
 
-def stop_ssh_tunnel_decorator(func, tunnel):
+def get_pool_error_cls():
+    return PoolTimeoutError
+
+
+def get_admission_error_cls():
+    return AdmissionRejectedError
+
+
+def release_ssh_tunnel_decorator(func, tunnel):
     @functools.wraps(func)
     def inner(*args, **kwargs):
         try:
             ret = func(*args, **kwargs)
         finally:
             if tunnel:
-                tunnel.stop()
+                tunnel.release()
         return ret
     return inner
 
 
-def get_datasource_conn(datasource: models.DataSource):
-    engine = datasource.engine.title
-    conn_cls = get_engine_conn_cls(engine)
-    settings = json.loads(datasource.settings)
-    tunnel = get_ssh_tunnel(datasource)
+def release_ssh_tunnel_async_decorator(func, tunnel):
+    @functools.wraps(func)
+    async def inner(*args, **kwargs):
+        try:
+            ret = await func(*args, **kwargs)
+        finally:
+            if tunnel:
+                tunnel.release()
+        return ret
+    return inner
+
+
+def get_result_limits(datasource: models.DataSource, user: models.User) -> ResultLimits:
+    return ResultLimits.combine(
+        ResultLimits(settings.QUERY_MAX_ROWS, settings.QUERY_MAX_BYTES),
+        ResultLimits(datasource.max_rows, datasource.max_bytes),
+        ResultLimits(user.max_rows, user.max_bytes),
+    )
+
+
+def get_statement_timeout(datasource: models.DataSource, timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Request statement timeout falling back to data source and global defaults.
+    """
+    return timeout or datasource.statement_timeout or settings.QUERY_TIMEOUT
+
+
+def get_datasource_params(datasource: models.DataSource) -> dict:
+    """
+    Plain data source connection params, usable after data source db session is closed.
+    """
+    ssh_tunnel = datasource.ssh_tunnel if datasource.ssh_tunnel_id is not None else None
+    return {
+        'engine': datasource.engine.title,
+        'settings': json.loads(datasource.settings),
+        'statement_timeout': get_statement_timeout(datasource),
+        'ssh_tunnel': {
+            'id': ssh_tunnel.id,
+            'host': ssh_tunnel.host,
+            'port': ssh_tunnel.port,
+            'username': ssh_tunnel.username,
+            'password': ssh_tunnel.password,
+        } if ssh_tunnel is not None else None,
+    }
+
+
+def connect_datasource(params: dict):
+    conn_cls = get_engine_conn_cls(params['engine'])
+    settings = dict(params['settings'])
+    tunnel = get_ssh_tunnel(params)
     if tunnel is not None:
-        tunnel.start()
         settings.update({'host': tunnel.local_bind_host, 'port': tunnel.local_bind_port})
-    conn = conn_cls(**settings)
-    conn.close = stop_ssh_tunnel_decorator(conn.close, tunnel)
+    try:
+        conn = conn_cls(**settings, statement_timeout=params.get('statement_timeout'))
+    except BaseException:
+        if tunnel is not None:
+            tunnel.release()
+        raise
+    # tunnel lease is held for the whole connection lifetime
+    conn.terminate = release_ssh_tunnel_decorator(conn.terminate, tunnel)
     return conn
 
 
-def get_ssh_tunnel(datasource: models.DataSource):
-    if datasource.ssh_tunnel_id is None:
-        return
-    settings = json.loads(datasource.settings)
-    ssh_tunnel = datasource.ssh_tunnel
-    return SSHTunnelForwarder(
-        ssh_address_or_host=(ssh_tunnel.host, int(ssh_tunnel.port)),
-        ssh_username=ssh_tunnel.username,
-        ssh_password=ssh_tunnel.password,
-        remote_bind_address=(settings['host'], int(settings['port'])),
+async def connect_datasource_async(params: dict):
+    conn_cls = get_engine_async_conn_cls(params['engine'])
+    settings = dict(params['settings'])
+    tunnel = await run_in_threadpool(get_ssh_tunnel, params)
+    if tunnel is not None:
+        settings.update({'host': tunnel.local_bind_host, 'port': tunnel.local_bind_port})
+    try:
+        conn = await conn_cls.connect(**settings, statement_timeout=params.get('statement_timeout'))
+    except BaseException:
+        if tunnel is not None:
+            tunnel.release()
+        raise
+    # tunnel lease is held for the whole connection lifetime
+    conn.terminate = release_ssh_tunnel_async_decorator(conn.terminate, tunnel)
+    return conn
+
+
+async def get_datasource_conn_async(
+    datasource: models.DataSource, statement_timeout: Optional[float] = None, admission: Optional[Admission] = None
+):
+    return await acquire_datasource_conn_async(
+        datasource.id, get_datasource_params(datasource), statement_timeout, admission
     )
+
+
+async def acquire_datasource_conn_async(
+    datasource_id: int, params: dict, statement_timeout: Optional[float] = None, admission: Optional[Admission] = None
+):
+    try:
+        conn = await async_pools.acquire(datasource_id, params, functools.partial(connect_datasource_async, params))
+    except BaseException:
+        if admission is not None:
+            admission.release()
+        raise
+    conn.admission = admission
+    if statement_timeout is not None and statement_timeout != conn.statement_timeout:
+        try:
+            await conn.set_statement_timeout(statement_timeout)
+        except BaseException:
+            await conn.close()
+            raise
+    return conn
+
+
+def get_datasource_conn(
+    datasource: models.DataSource, statement_timeout: Optional[float] = None, admission: Optional[Admission] = None
+):
+    return acquire_datasource_conn(datasource.id, get_datasource_params(datasource), statement_timeout, admission)
+
+
+def acquire_datasource_conn(
+    datasource_id: int,
+    params: dict,
+    statement_timeout: Optional[float] = None,
+    admission: Optional[Admission] = None,
+    checkout_timeout: Optional[float] = None,
+):
+    """
+    Check out pooled data source connection, statement timeout overrides the data source one till it is released,
+    0 removes it.
+    Admission slot is held by the connection and released with it.
+    Checkout waits up to checkout_timeout seconds, pool default one by default.
+    """
+    try:
+        conn = pools.acquire(datasource_id, params, functools.partial(connect_datasource, params), checkout_timeout)
+    except BaseException:
+        if admission is not None:
+            admission.release()
+        raise
+    conn.admission = admission
+    if statement_timeout is not None and statement_timeout != conn.statement_timeout:
+        try:
+            conn.set_statement_timeout(statement_timeout)
+        except BaseException:
+            conn.close()
+            raise
+    return conn
+
+
+def try_acquire_datasource_conn(datasource_id: int, params: dict, user_id: Optional[int] = None):
+    """
+    Check out pooled data source connection admitted as interactive query of the user without waiting,
+    None when there is no free query slot or the pool has no free connection.
+    """
+    if (admission := admissions.try_acquire(datasource_id, user_id)) is None:
+        return None
+    try:
+        return acquire_datasource_conn(datasource_id, params, admission=admission, checkout_timeout=0)
+    except PoolTimeoutError:
+        return None
+
+
+def get_datasource_introspection(datasource_id: int, params: dict, conn):
+    """
+    Engine introspection reading catalog concurrently on extra pooled connections of the data source
+    free at the moment, so introspections holding connections do not wait for each other.
+    Extra connections are admitted for the user of the connection passed.
+    """
+    user_id = conn.admission.user_id if conn.admission is not None else None
+    connect = functools.partial(try_acquire_datasource_conn, datasource_id, params, user_id)
+    return get_engine_introspection_cls(params['engine'])(conn, connect, settings.INTROSPECTION_CONCURRENCY)
+
+
+def get_datasource_structure(datasource_id: int, params: dict, admission: Optional[Admission] = None) -> list:
+    with acquire_datasource_conn(datasource_id, params, admission=admission) as conn:
+        return get_datasource_introspection(datasource_id, params, conn).get_structure()
+
+
+def get_datasource_tables(datasource_id: int, params: dict, admission: Optional[Admission] = None) -> list:
+    with acquire_datasource_conn(datasource_id, params, admission=admission) as conn:
+        with conn.cursor() as cursor:
+            return get_engine_introspection_cls(params['engine'])(conn).get_tables(cursor)
+
+
+def get_datasource_table(
+    datasource_id: int, params: dict, table: str, admission: Optional[Admission] = None
+) -> Optional[dict]:
+    with acquire_datasource_conn(datasource_id, params, admission=admission) as conn:
+        return get_datasource_introspection(datasource_id, params, conn).get_table(table)
+
+
+def refresh_datasource_structure(
+    datasource_id: int,
+    params: dict,
+    structure: Optional[list],
+    markers: Optional[dict],
+    admission: Optional[Admission] = None,
+) -> Tuple[list, Optional[dict]]:
+    """
+    Re-read tables changed since structure was read at markers, see Introspection.refresh_structure.
+    """
+    with acquire_datasource_conn(datasource_id, params, admission=admission) as conn:
+        return get_datasource_introspection(datasource_id, params, conn).refresh_structure(structure, markers)
+
+
+def get_ssh_tunnel(params: dict):
+    """
+    Lease shared SSH tunnel to data source host, the lease must be released when connection is closed.
+    """
+    if params['ssh_tunnel'] is None:
+        return
+    settings = params['settings']
+    return tunnels.lease(params['ssh_tunnel'], settings['host'], int(settings['port']))
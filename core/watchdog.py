@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Iterator, Optional, Union
+
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import Request
+
+from core.datasources.base import Connection, AsyncConnection
+
+
+DISCONNECTED = 'disconnected'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+
+
+class QueryWatchdog(object):
+    """
+    Cancels statement running on connection when client disconnects, statement deadline passes
+    or cancel is requested.
+    """
+
+    # seconds between client disconnect checks
+    poll_interval = 0.5
+
+    def __init__(self, request: Request, conn: Union[Connection, AsyncConnection], timeout: Optional[float] = None):
+        self.request = request
+        self.conn = conn
+        self.timeout = timeout
+        # why the statement has been cancelled
+        self.reason: Optional[str] = None
+        self._task = None
+        self._cancel_requested = False
+
+    @property
+    def message(self) -> Optional[str]:
+        if self.reason == TIMEOUT:
+            return 'Query has been cancelled: statement timeout of %s seconds exceeded' % self.timeout
+        if self.reason == DISCONNECTED:
+            return 'Query has been cancelled: client disconnected'
+        if self.reason == CANCELLED:
+            return 'Query has been cancelled'
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._watch())
+
+    def cancel(self):
+        """
+        Request statement cancel, e.g. when the task waiting for the statement is cancelled.
+        """
+        self._cancel_requested = True
+
+    async def stop(self):
+        if self._task is not None:
+            # cancel already sent to data source is waited for, so it never hits the next connection user
+            if self.reason is None:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def _watch(self):
+        loop = asyncio.get_event_loop()
+        deadline = loop.time() + self.timeout if self.timeout else None
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._cancel_requested:
+                self.reason = CANCELLED
+                break
+            if await self.request.is_disconnected():
+                self.reason = DISCONNECTED
+                break
+            if deadline is not None and loop.time() >= deadline:
+                self.reason = TIMEOUT
+                break
+        try:
+            if asyncio.iscoroutinefunction(self.conn.cancel):
+                await self.conn.cancel()
+            else:
+                await run_in_threadpool(self.conn.cancel)
+        except NotImplementedError:
+            pass
+        except Exception:
+            logging.exception('Failed to cancel query')
+
+
+async def iterate_watched(iterator: Iterator, watchdog: QueryWatchdog) -> AsyncIterator:
+    """
+    Iterate sync iterator in threadpool while watchdog is running.
+    Watched connection is released when iteration ends.
+    """
+    watchdog.start()
+    try:
+        async for item in iterate_in_threadpool(iterator):
+            yield item
+    finally:
+        await watchdog.stop()
+        # release resources held by iterator when the response is not sent till the end
+        if hasattr(iterator, 'close'):
+            await run_in_threadpool(iterator.close)
+        await run_in_threadpool(watchdog.conn.close)
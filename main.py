@@ -2,9 +2,17 @@ import uvicorn
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
+import crud
 from api.router import api_router
+from core.batch import batches
 from core.config import settings
+from core.jobs import jobs
+from core.pool import pools, async_pools
 from core.redis import cache
+from core.schema import schema_refresher
+from core.tunnels import tunnels
+from core.utils import get_datasource_params
+from db.session import SessionLocal
 
 
 app = FastAPI(title='CrossBase', openapi_url='/api/openapi.json')
@@ -25,11 +33,27 @@ app.include_router(api_router, prefix='/api')
 @app.on_event('startup')
 async def startup_event():
     await cache.init()
+    if settings.SCHEMA_CACHE_PREWARM:
+        db = SessionLocal()
+        try:
+            data_sources = [
+                (data_source.id, get_datasource_params(data_source), data_source.user_id)
+                for data_source in crud.data_source.get_multi(db)
+            ]
+        finally:
+            db.close()
+        schema_refresher.prewarm(data_sources)
 
 
 @app.on_event('shutdown')
 async def shutdown_event():
+    schema_refresher.shutdown()
     await cache.close()
+    jobs.shutdown()
+    batches.shutdown()
+    pools.close_all()
+    await async_pools.close_all()
+    tunnels.close_all()
 
 
 if __name__ == "__main__" and settings.DEBUG:
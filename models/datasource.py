@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Column, Float, ForeignKey, Integer, String
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm import relationship
 
@@ -14,6 +14,15 @@ class DataSource(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(length=70), nullable=False)
     settings = Column(JSON, nullable=False)
+    # query result budgets
+    max_rows = Column(Integer, nullable=True)
+    max_bytes = Column(BigInteger, nullable=True)
+    # default statement timeout in seconds
+    statement_timeout = Column(Float, nullable=True)
+    # planner estimate thresholds and action for queries exceeding them
+    cost_guard_max_rows = Column(BigInteger, nullable=True)
+    cost_guard_max_cost = Column(Float, nullable=True)
+    cost_guard_action = Column(String(length=16), nullable=True)
 
     engine_id = Column(Integer, ForeignKey('engine.id'), nullable=False)
     engine = relationship('Engine')
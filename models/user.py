@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Boolean, Column, Integer, String
+from sqlalchemy import BigInteger, Boolean, Column, Integer, String
 from sqlalchemy.ext.declarative import as_declarative, declared_attr
 
 from models.base import Base
@@ -16,6 +16,9 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # query result budgets
+    max_rows = Column(Integer, nullable=True)
+    max_bytes = Column(BigInteger, nullable=True)
 
     @declared_attr
     def __tablename__(cls) -> str:
@@ -4,3 +4,5 @@ from schemas.sshtunnel import *
 from schemas.user import *
 from schemas.token import *
 from schemas.msg import *
+from schemas.job import *
+from schemas.query import *
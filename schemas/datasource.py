@@ -1,9 +1,9 @@
 import json
 from typing import Optional, List, Any, Union
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, PositiveFloat, PositiveInt, validator
 
-from schemas.fields import TitleType, IdType
+from schemas.fields import TitleType, IdType, CostGuardActionType
 
 
 # Shared properties
@@ -12,6 +12,14 @@ class DataSourceBase(BaseModel):
     engine_id: Optional[IdType] = None
     settings: Optional[dict] = None
     ssh_tunnel_id: Optional[IdType] = None
+    max_rows: Optional[PositiveInt] = None
+    max_bytes: Optional[PositiveInt] = None
+    # seconds
+    statement_timeout: Optional[PositiveFloat] = None
+    # planner estimate thresholds checked before /query execution, confirm action is used by default
+    cost_guard_max_rows: Optional[PositiveInt] = None
+    cost_guard_max_cost: Optional[PositiveFloat] = None
+    cost_guard_action: Optional[CostGuardActionType] = None
 
 
 # Properties to receive on DataSource creation
@@ -60,6 +68,57 @@ class DataSourceInDB(DataSourceInDBBase):
 class QueryResult(BaseModel):
     data: List[List]
     columns: List[str]
+    # result has been cut by row or byte budget
+    truncated: bool = False
+    rows_returned: Optional[int] = None
+    estimated_total: Optional[int] = None
+
+
+class TablePreview(BaseModel):
+    data: List[List]
+    columns: List[str]
+    # rows are sampled across the table rather than read from its beginning
+    sampled: bool
+    # engine statistics estimate
+    table_rows: Optional[int]
+
+
+class ScriptStatementResult(BaseModel):
+    index: int
+    statement: str
+    # ok, error or skipped
+    status: str
+    rowcount: Optional[int]
+    # seconds
+    elapsed: Optional[float]
+    msg: Optional[str]
+
+
+class ScriptResult(BaseModel):
+    statements: List[ScriptStatementResult]
+    committed: bool
+
+
+class PlanNode(BaseModel):
+    operation: str
+    object: Optional[str]
+    estimated_rows: Optional[float]
+    # engine units
+    cost: Optional[float]
+    actual_rows: Optional[float]
+    # milliseconds
+    actual_time: Optional[float]
+    details: dict = {}
+    children: List['PlanNode'] = []
+
+
+PlanNode.update_forward_refs()
+
+
+class QueryPlan(BaseModel):
+    plan: PlanNode
+    # engine native plan, JSON, XML or text
+    raw: Any
 
 
 class DataSourceEntity(BaseModel):
@@ -83,3 +142,11 @@ class ConstraintEntity(DataSourceEntity):
 
 class TableEntity(DataSourceEntity):
     children: Optional[List[Union[ColumnEntity, ConstraintEntity]]]
+
+
+class TableList(BaseModel):
+    tables: List[DataSourceEntity]
+    skip: int
+    limit: int
+    # tables matching the search
+    total: int
@@ -7,3 +7,4 @@ HostType = constr(min_length=1, max_length=255)
 PasswordType = constr(min_length=1, max_length=255)
 UsernameType = constr(min_length=1, max_length=32)
 PortType = conint(ge=1, le=65535)
+CostGuardActionType = constr(regex='^(reject|queue|confirm)$')
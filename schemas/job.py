@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional, List
+
+from pydantic import BaseModel
+
+from schemas.fields import IdType
+
+
+class Job(BaseModel):
+    id: str
+    datasource_id: IdType
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    # seconds
+    elapsed: Optional[float]
+    rows_fetched: int
+    error: Optional[str]
+    # export file format and size
+    format: Optional[str]
+    size: Optional[int]
+
+    class Config:
+        orm_mode = True
+
+
+class JobResult(BaseModel):
+    status: str
+    columns: Optional[List[str]]
+    data: List[List]
+    skip: int
+    limit: int
+    total: int
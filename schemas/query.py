@@ -0,0 +1,21 @@
+from typing import Optional
+
+from pydantic import BaseModel, PositiveFloat
+
+from schemas.datasource import QueryResult
+from schemas.fields import IdType
+
+
+class BatchQueryItem(BaseModel):
+    datasource_id: IdType
+    query: str
+    # seconds
+    timeout: Optional[PositiveFloat] = None
+
+
+class BatchQueryItemResult(BaseModel):
+    # position of the item in batch
+    index: int
+    datasource_id: IdType
+    result: Optional[QueryResult]
+    msg: Optional[str]
@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, NonNegativeInt
 
 from schemas.fields import TitleType, IdType, PasswordType
 
@@ -25,8 +25,18 @@ class UserUpdate(UserBase):
     password: Optional[PasswordType] = None
 
 
+# Properties to receive via API on update by administrators
+class UserAdminUpdate(UserUpdate):
+    # query result budgets, null removes the budget
+    max_rows: Optional[NonNegativeInt] = None
+    max_bytes: Optional[NonNegativeInt] = None
+
+
 class UserInDBBase(UserBase):
     id: Optional[IdType] = None
+    # query result budgets, set by administrators
+    max_rows: Optional[int] = None
+    max_bytes: Optional[int] = None
 
     class Config:
         orm_mode = True